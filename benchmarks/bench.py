@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the modules and the CLI against the AxonOps simulator (tests/simulator), with synthetic data of
+realistic size.
+
+    python3 benchmarks/bench.py run --dataset large --output results.json
+    python3 benchmarks/bench.py compare benchmarks/baselines/large.json results.json
+
+Every scenario of scenarios.py is run --repeats times. For each one the wall time, the number of HTTP requests
+and the bytes sent and received (counted by the simulator) and the peak RSS of the module or CLI process are
+recorded. compare exits with 1 when a benchmark got slower, bigger or chattier than the baseline allows.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+SIMULATOR = os.path.join(REPO_DIR, 'tests', 'simulator', 'axonops_simulator.py')
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from scenarios import CLUSTER, DATASETS, ORG, SCENARIOS  # noqa: E402
+
+# how much worse than the baseline a metric may get before compare reports it, as a fraction of the baseline
+DEFAULT_THRESHOLDS = {'wall_s': 0.25, 'peak_rss_kb': 0.20, 'requests': 0.0, 'bytes_sent': 0.05,
+                      'bytes_received': 0.05}
+
+# the environment variables of the modules and the CLI, not passed to them so that the runs only depend on the
+# scenario
+_ENV_PREFIXES = ('AXONOPS_', 'ANSIBLE_')
+
+
+class StepFailed(Exception):
+    pass
+
+
+def _max_rss_kb(usage) -> int:
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+
+
+def run_process(argv: list, env: dict, cwd: str):
+    """
+    Run argv to completion, returns the seconds it took, its peak RSS in KB, its exit code, stdout and stderr
+    """
+    with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen(argv, stdout=stdout, stderr=stderr, stdin=subprocess.DEVNULL, env=env, cwd=cwd)
+        # wait4 gives the resource usage of this process alone, not of all the children so far
+        _, status, usage = os.wait4(process.pid, 0)
+        elapsed = time.perf_counter() - started
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stdout.seek(0)
+        stderr.seek(0)
+        return (elapsed, _max_rss_kb(usage), process.returncode, stdout.read().decode(errors='replace'),
+                stderr.read().decode(errors='replace'))
+
+
+class Runner:
+    """
+    Runs the steps of the scenarios against a simulator started for them
+    """
+
+    def __init__(self, dataset: str, workdir: str):
+        # the simulator runs in its own process, a child forked from a process holding its data would count it in
+        # its peak RSS
+        argv = [sys.executable, SIMULATOR, '--port', '0', '--org', ORG, '--clusters', CLUSTER,
+                '--data-clusters', CLUSTER]
+        for name, value in DATASETS[dataset].items():
+            argv += [f"--{name.replace('_', '-')}", str(value)]
+        self.simulator = subprocess.Popen(argv, stdout=subprocess.PIPE, stdin=subprocess.DEVNULL, text=True)
+        banner = self.simulator.stdout.readline()
+        match = re.search(r'(http://\S+)', banner)
+        if not match:
+            self.simulator.kill()
+            raise RuntimeError(f"The simulator did not start: {banner}")
+        self.base_url = match.group(1)
+
+        self.workdir = workdir
+        # the modules import the collection as ansible_collections.axonops.axonops
+        collections = os.path.join(workdir, 'collections')
+        os.makedirs(os.path.join(collections, 'ansible_collections', 'axonops'))
+        os.symlink(REPO_DIR, os.path.join(collections, 'ansible_collections', 'axonops', 'axonops'))
+        self.env = {name: value for name, value in os.environ.items() if not name.startswith(_ENV_PREFIXES)}
+        self.env['PYTHONPATH'] = collections
+        self.env['HOME'] = workdir
+
+    def close(self):
+        self.simulator.terminate()
+        self.simulator.wait()
+
+    def control(self, path: str, method: str = 'GET') -> dict:
+        """
+        Call one of the /_simulator endpoints
+        """
+        request = urllib.request.Request(f"{self.base_url}/_simulator/{path}", method=method)
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    def run_step(self, step: tuple):
+        """
+        Run a step, returns its seconds and peak RSS in KB
+        """
+        kind, name, args = step
+        if kind == 'module':
+            args_file = os.path.join(self.workdir, 'args.json')
+            with open(args_file, 'w') as f:
+                json.dump({'ANSIBLE_MODULE_ARGS': dict(args, org=ORG, cluster=CLUSTER, base_url=self.base_url)}, f)
+            argv = [sys.executable, os.path.join(REPO_DIR, 'plugins', 'modules', f"{name}.py"), args_file]
+        else:
+            argv = [sys.executable, os.path.join(REPO_DIR, 'cli', 'axonops.py'), '--url', self.base_url,
+                    '--org', ORG, '--cluster', CLUSTER, '--token', 'bench']
+            argv += [arg.replace('{tmp}', self.workdir) for arg in args]
+            name = f"cli {args[0]}"
+
+        elapsed, rss, code, stdout, stderr = run_process(argv, self.env, self.workdir)
+        if code != 0:
+            raise StepFailed(f"{name} exited with {code}: {(stderr or stdout).strip()[-2000:]}")
+        if kind == 'module':
+            try:
+                result = json.loads(stdout)
+            except ValueError:
+                raise StepFailed(f"{name} did not return JSON: {(stdout + stderr).strip()[-2000:]}")
+            if result.get('failed'):
+                raise StepFailed(f"{name} failed: {result.get('msg')}")
+        return elapsed, rss
+
+    def run(self, scenario, repeats: int) -> dict:
+        walls, peaks, stats = [], [], None
+        for _ in range(repeats):
+            self.control('reset?data=true', 'POST')
+            for step in scenario.setup:
+                self.run_step(step)
+            self.control('reset', 'POST')
+
+            wall, peak = 0.0, 0
+            for step in scenario.steps:
+                elapsed, rss = self.run_step(step)
+                wall += elapsed
+                peak = max(peak, rss)
+            walls.append(wall)
+            peaks.append(peak)
+            stats = self.control('stats')
+
+        return {
+            'description': scenario.description,
+            'wall_s': round(statistics.median(walls), 4),
+            'wall_s_min': round(min(walls), 4),
+            'wall_s_max': round(max(walls), 4),
+            'requests': stats['requests'],
+            'bytes_sent': stats['bytes_in'],
+            'bytes_received': stats['bytes_out'],
+            'peak_rss_kb': max(peaks),
+            'repeats': repeats,
+        }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_benchmarks(args) -> int:
+    scenarios = [scenario for scenario in SCENARIOS if not args.filter or re.search(args.filter, scenario.name)]
+    if not scenarios:
+        print(f"No benchmark matches {args.filter}", file=sys.stderr)
+        return 2
+
+    results = {
+        'meta': {
+            'dataset': args.dataset,
+            'volumes': DATASETS[args.dataset],
+            'commit': _git_commit(),
+            'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'benchmarks': {},
+    }
+    workdir = tempfile.mkdtemp(prefix='axonops-bench-')
+    runner = Runner(args.dataset, workdir)
+    failed = False
+    try:
+        print(f"{'benchmark':<28} {'wall s':>8} {'requests':>8} {'KB sent':>9} {'KB recv':>9} {'peak RSS MB':>11}")
+        for scenario in scenarios:
+            try:
+                result = runner.run(scenario, args.repeats)
+            except StepFailed as e:
+                print(f"{scenario.name:<28} FAILED {e}")
+                failed = True
+                continue
+            results['benchmarks'][scenario.name] = result
+            print(f"{scenario.name:<28} {result['wall_s']:>8.3f} {result['requests']:>8} "
+                  f"{result['bytes_sent'] / 1024:>9.1f} {result['bytes_received'] / 1024:>9.1f} "
+                  f"{result['peak_rss_kb'] / 1024:>11.1f}")
+    finally:
+        runner.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Results written to {args.output}")
+    return 1 if failed else 0
+
+
+def compare_results(baseline: dict, current: dict, thresholds: dict) -> tuple:
+    """
+    The lines of the comparison table and the regressions, a metric is a regression when it is more than its
+    threshold above the baseline
+    """
+    lines = [f"{'benchmark':<28} {'metric':<15} {'baseline':>12} {'current':>12} {'change':>8}"]
+    regressions = []
+    for name, before in sorted(baseline.get('benchmarks', {}).items()):
+        after = current.get('benchmarks', {}).get(name)
+        if after is None:
+            lines.append(f"{name:<28} missing from the results")
+            continue
+        for metric, threshold in thresholds.items():
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else (0.0 if new == old else float('inf'))
+            regressed = new > old and change > threshold
+            lines.append(f"{name:<28} {metric:<15} {old:>12} {new:>12} {change:>+8.1%}"
+                         f"{'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append((name, metric, old, new))
+    for name in sorted(set(current.get('benchmarks', {})) - set(baseline.get('benchmarks', {}))):
+        lines.append(f"{name:<28} not in the baseline")
+    return lines, regressions
+
+
+def compare_benchmarks(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.results) as f:
+        current = json.load(f)
+
+    if baseline.get('meta', {}).get('dataset') != current.get('meta', {}).get('dataset'):
+        print(f"The baseline was run on the {baseline.get('meta', {}).get('dataset')} dataset and the results on "
+              f"the {current.get('meta', {}).get('dataset')} one", file=sys.stderr)
+        return 2
+
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for threshold in args.threshold or []:
+        metric, _, value = threshold.partition('=')
+        if metric not in thresholds or not value:
+            print(f"Invalid threshold {threshold}, expected one of {', '.join(thresholds)}=FRACTION",
+                  file=sys.stderr)
+            return 2
+        thresholds[metric] = float(value)
+
+    lines, regressions = compare_results(baseline, current, thresholds)
+    print('\n'.join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regressions:")
+        for name, metric, old, new in regressions:
+            print(f"- {name} {metric}: {old} -> {new}")
+        return 1
+    print("\nNo regression")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the AxonOps modules and CLI against the simulator")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run the benchmarks")
+    run_parser.add_argument('--dataset', choices=sorted(DATASETS), default='small',
+                            help="Size of the synthetic data, default small")
+    run_parser.add_argument('--repeats', type=int, default=3,
+                            help="Runs of every benchmark, the median wall time is kept, default 3")
+    run_parser.add_argument('--filter', help="Only run the benchmarks whose name matches this regular expression")
+    run_parser.add_argument('--output', help="JSON file the results are written to")
+    run_parser.set_defaults(func=run_benchmarks)
+
+    compare_parser = subparsers.add_parser('compare', help="Compare results with a baseline")
+    compare_parser.add_argument('baseline', help="JSON file of the baseline")
+    compare_parser.add_argument('results', help="JSON file of the results to check")
+    compare_parser.add_argument('--threshold', action='append',
+                                help="METRIC=FRACTION, how much worse than the baseline a metric may get, e.g. "
+                                     "wall_s=0.5. Defaults: " +
+                                     ', '.join(f"{metric}={value}" for metric, value in DEFAULT_THRESHOLDS.items()))
+    compare_parser.set_defaults(func=compare_benchmarks)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+The benchmarks: what the modules and the CLI are asked to do against the simulator.
+
+Every scenario runs its setup steps, which are not measured, then its steps. A step is a module with its arguments
+(the connection arguments are added by the runner) or the arguments of the CLI (--url, --org, --cluster and
+--token are added by the runner). The data of the simulator is generated again before every run, so each run
+starts from the same state.
+"""
+
+# the synthetic data of the simulator for every dataset, the large one is the size of a big production cluster
+DATASETS = {
+    'small': {'alert_rules': 1000, 'nodes': 100, 'dashboards': 10, 'panels': 20, 'integrations': 5,
+              'healthchecks': 20},
+    'large': {'alert_rules': 10000, 'nodes': 1000, 'dashboards': 100, 'panels': 60, 'integrations': 20,
+              'healthchecks': 100},
+}
+
+# the cluster holding the synthetic data, the other clusters only have the nodes and the integrations
+CLUSTER = 'bench'
+ORG = 'bench'
+
+
+class Scenario:
+    """
+    A benchmark: steps measured together, after setup steps that are not
+    """
+
+    def __init__(self, name: str, description: str, steps: list, setup: list = None):
+        self.name = name
+        self.description = description
+        self.steps = steps
+        self.setup = setup or []
+
+
+def module(name: str, /, **args) -> tuple:
+    return ('module', name, args)
+
+
+def cli(*argv) -> tuple:
+    return ('cli', None, list(argv))
+
+
+NEW_ALERT_RULE = {
+    'name': 'bench-read-latency', 'dashboard': 'Dashboard 7', 'chart': 'Chart 7.3', 'operator': '>=',
+    'warning_value': 100, 'critical_value': 200, 'duration': '15m', 'dc': ['dc1'], 'group_by': ['dc', 'host_id'],
+    'routing': {'error': ['integration-0'], 'warning': ['integration-1']},
+}
+
+LOG_ALERT_RULE = {
+    'name': 'bench-out-of-memory', 'content': 'OutOfMemoryError', 'level': 'error,warning', 'warning_value': 1,
+    'critical_value': 5, 'duration': '5m', 'routing': {'error': ['integration-0']},
+}
+
+BACKUP = {
+    'tag': 'bench-daily', 'datacenters': ['dc1'], 'local_retention': '10d', 'remote': False, 'schedule': True,
+    'schedule_expr': '0 1 * * *', 'keyspaces': ['ks'],
+}
+
+
+def _panels(dashboard: int, count: int) -> list:
+    return [{
+        'title': f"Chart {dashboard}.{j}",
+        'type': 'line-chart',
+        'details': {'queries': [{'query': f"max(bench_{dashboard}_{j}{{dc=~'$dc'}}) by ($groupBy)"}]},
+    } for j in range(count)]
+
+
+SCENARIOS = [
+    Scenario('alert_rule_create', "alert_rule adding a rule routed to two integrations",
+             [module('alert_rule', **NEW_ALERT_RULE)]),
+    Scenario('alert_rule_unchanged', "alert_rule on a rule that is already as requested",
+             [module('alert_rule', **NEW_ALERT_RULE)], setup=[module('alert_rule', **NEW_ALERT_RULE)]),
+    Scenario('alert_rule_streamed', "alert_rule adding a rule, with the alert rules and dashboards streamed",
+             [module('alert_rule', stream_responses=True, **NEW_ALERT_RULE)]),
+    Scenario('alert_rule_delete', "alert_rule removing one of the existing rules",
+             [module('alert_rule', name='alert-rule-500', dashboard='Dashboard 0', chart='Chart 0.0',
+                     present=False)]),
+    Scenario('alert_rules_bulk', "alert_rules reconciling 100 rules in one invocation",
+             [module('alert_rules', rules=[dict(NEW_ALERT_RULE, name=f"bench-rule-{i}",
+                                                 dashboard=f"Dashboard {i % 10}", chart=f"Chart {i % 10}.{i % 20}")
+                                            for i in range(100)])]),
+    Scenario('log_alert_rule_create', "log_alert_rule adding a rule on the log events",
+             [module('log_alert_rule', **LOG_ALERT_RULE)]),
+    Scenario('dashboard_template_update', "dashboard_template replacing the charts of one dashboard",
+             [module('dashboard_template', name='Dashboard 5', panels=_panels(5, 20))]),
+    Scenario('dashboard_templates_bulk', "dashboard_templates adding 20 dashboards in one invocation",
+             [module('dashboard_templates', dashboards=[{'name': f"Bench {i}", 'panels': _panels(i, 10)}
+                                                        for i in range(20)])]),
+    Scenario('backup_create', "backup scheduling a local snapshot",
+             [module('backup', **BACKUP)]),
+    Scenario('health_checks', "http_check, tcp_check and shell_check adding one check each",
+             [module('http_check', name='bench-http', interval='1m', timeout='10s', http='http://localhost/health'),
+              module('tcp_check', name='bench-tcp', interval='1m', timeout='10s', tcp='localhost:9042'),
+              module('shell_check', name='bench-shell', interval='5m', timeout='1m', script='exit 0')]),
+    Scenario('service_checks_bulk', "service_checks reconciling 50 checks in one invocation",
+             [module('service_checks', checks=[{'type': 'tcp', 'name': f"bench-tcp-{i}", 'interval': '1m',
+                                                'timeout': '10s', 'tcp': f"localhost:{7000 + i}"}
+                                               for i in range(50)])]),
+    Scenario('cli_nodes', "CLI info, listing the nodes",
+             [cli('info')]),
+    Scenario('cli_silence', "CLI silence, creating a silence and listing them",
+             [cli('silence', '--create', '--duration', '1h'), cli('silence', '--list')]),
+    Scenario('cli_dashboard_export', "CLI dashboard, exporting all the dashboards to an archive",
+             [cli('dashboard', '--exportpath', '{tmp}/dashboards.jsonl')]),
+    Scenario('cli_dashboard_export_streamed', "CLI dashboard, exporting the dashboards as they are read with --stream",
+             [cli('--stream', 'dashboard', '--exportpath', '{tmp}/dashboards.jsonl')]),
+    Scenario('cli_migrate', "CLI migrate, copying the dashboards, alert routes and checks to two clusters",
+             [cli('migrate', '--targets', 'bench-copy-1,bench-copy-2', '--resources',
+                  'dashboards,alert_routes,healthchecks')]),
+    Scenario('cli_scheduled_repair', "CLI scheduledrepair, replacing a tagged scheduled repair",
+             [cli('scheduledrepair', '--keyspace', 'ks', '--tags', 'bench', '--scheduleexpr', '0 2 * * *')],
+             setup=[cli('scheduledrepair', '--keyspace', 'ks', '--tags', 'bench', '--scheduleexpr', '0 1 * * *')]),
+]
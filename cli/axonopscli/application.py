@@ -6,6 +6,7 @@ from typing import Sequence
 
 from .axonops import AxonOps
 from .components.dashboard import Dashboard
+from .components.migrate import RESOURCES, Migrate
 from .components.repair import AdaptiveRepair
 from .components.scheduled_repair import ScheduledRepair
 from .components.silence import Silence
@@ -30,7 +31,19 @@ class Application:
                                    username=args.username,
                                    password=args.password,
                                    cluster_type=args.cluster,
-                                   verbose=args.v)
+                                   verbose=args.v,
+                                   pool_size=max(args.poolsize, args.concurrency),
+                                   retries=args.retries,
+                                   retry_backoff=args.retrybackoff,
+                                   retry_non_idempotent=args.retryall,
+                                   timeout=args.timeout,
+                                   rate_limit=args.ratelimit,
+                                   profile=args.profile,
+                                   compress=args.compress,
+                                   stream=args.stream)
+            if self.axonops.errors:
+                print('\n'.join(self.axonops.errors))
+                sys.exit(1)
         return self.axonops
 
     def run(self, argv: Sequence):
@@ -50,6 +63,37 @@ class Application:
         parser.add_argument('--url', type=str, default=os.getenv('AXONOPS_URL'),
                             help='Specify the AxonOps URL if not using the AxonOps Cloud environment')
 
+        parser.add_argument('--poolsize', type=int, default=int(os.getenv('AXONOPS_POOL_SIZE', 10)),
+                            help='Number of connections to the AxonOps server kept open and reused')
+
+        parser.add_argument('--concurrency', type=int, default=int(os.getenv('AXONOPS_CONCURRENCY', 10)),
+                            help='Maximum number of requests sent at the same time by the bulk operations')
+        parser.add_argument('--ratelimit', type=float, default=float(os.getenv('AXONOPS_RATE_LIMIT', 0)),
+                            help='Maximum number of requests per second sent to the AxonOps server, 0 for no limit')
+        parser.add_argument('--retries', type=int, default=int(os.getenv('AXONOPS_RETRIES', 3)),
+                            help='Number of times a request is sent again when the server is unreachable or busy '
+                                 '(429, 502, 503, 504)')
+        parser.add_argument('--retrybackoff', type=float, default=float(os.getenv('AXONOPS_RETRY_BACKOFF', 0.5)),
+                            help='Seconds to wait before the first retry, doubled at every retry (with jitter)')
+        parser.add_argument('--retryall', action='store_true',
+                            default=os.getenv('AXONOPS_RETRY_NON_IDEMPOTENT', '').lower() in ('1', 'true', 'yes'),
+                            help='Also retry the POST requests, which may then be applied twice')
+        parser.add_argument('--timeout', type=float, default=float(os.getenv('AXONOPS_REQUEST_TIMEOUT', 30)),
+                            help='Seconds to wait for the AxonOps server to answer a request')
+
+        parser.add_argument('--compress', action='store_true',
+                            default=os.getenv('AXONOPS_COMPRESS_REQUESTS', '').lower() in ('1', 'true', 'yes'),
+                            help='Gzip the request bodies over 1 KB, like the imported dashboards, once the server '
+                                 'said it takes them')
+        parser.add_argument('--stream', action='store_true',
+                            default=os.getenv('AXONOPS_STREAM_RESPONSES', '').lower() in ('1', 'true', 'yes'),
+                            help='Decode the lists of dashboards and nodes one element at a time as they are '
+                                 'received, to list and export them with bounded memory')
+
+        parser.add_argument('--profile', action='store_true',
+                            default=os.getenv('AXONOPS_PROFILE', '').lower() in ('1', 'true', 'yes'),
+                            help='Print at the end the number of requests and where the time went, by endpoint')
+
         parser.add_argument("-v", action='count', default=0, help="Verbosity")
 
         commands_subparser = parser.add_subparsers(help="commands")
@@ -148,9 +192,11 @@ class Application:
                                       help='List all dashboards for the specified cluster')
         file_dash_group = dashboard_parser.add_mutually_exclusive_group()
         file_dash_group.add_argument('--exportpath', type=str, required=False,
-                                     help='Path to export dashboards to JSON files')
-        file_dash_group.add_argument('--importfile', type=str, required=False,
-                                     help='File path to import dashboard from a JSON file')
+                                     help='Directory to export dashboards to JSON files, or a .jsonl file to export '
+                                          'them to a single archive with a dashboard per line')
+        file_dash_group.add_argument('--importfile', '--importpath', dest='importfile', type=str, required=False,
+                                     help='JSON file, .jsonl archive or directory of them to import the dashboards '
+                                          'from, all the dashboards are applied with a single update')
         dashboard_parser.add_argument('--dashboardname', type=str, required=False,
                                       help='Name of the dashboard to export or delete')
         dashboard_parser.add_argument('--deletedashboard', type=str, required=False,
@@ -160,6 +206,21 @@ class Application:
         dashboard_parser.add_argument('--overwrite', action='store_true',
                                       help='Overwrite existing dashboard when importing')
 
+        migrate_parser = commands_subparser.add_parser(
+            "migrate",
+            help="Copy the dashboards, alert rules, alert routes and health checks of --cluster to other clusters")
+
+        migrate_parser.set_defaults(func=self.run_migrate)
+
+        migrate_parser.add_argument('--targets', type=str, required=True,
+                                    help='Comma separated list of the clusters to copy to, they are updated '
+                                         'concurrently')
+        migrate_parser.add_argument('--resources', type=str, required=False, default=','.join(RESOURCES),
+                                    help=f"Comma separated list of what to copy, any of {', '.join(RESOURCES)}. "
+                                         f"Default all")
+        migrate_parser.add_argument('--dryrun', action='store_true', default=False,
+                                    help='Print what would change without changing anything')
+
         silence_parser = commands_subparser.add_parser(
             "silence",
             help="Manage Silences in AxonOps")
@@ -171,7 +232,7 @@ class Application:
         silence_parser.add_argument('--create', action='store_true',
                                     help='Create a new silence')
         silence_parser.add_argument('--deletesilence', type=str, required=False,
-                                    help='Delete silences by ID')
+                                    help='Delete silences by ID, a comma separated list of IDs is deleted concurrently')
         silence_parser.add_argument('--duration', type=str, required=False,
                                     help='Duration of the silence. Integer number followed by one of "s, m, h, d, w, M, y", default 1h',
                                     default="1h")
@@ -225,10 +286,20 @@ class Application:
         # if func() is not present it means that no command was inserted
         if hasattr(parsed_result, 'func'):
             self.run_mandatory_args_check(parsed_result)
-            parsed_result.func(parsed_result)
+            try:
+                parsed_result.func(parsed_result)
+            finally:
+                if self.axonops is not None and self.axonops.timings is not None:
+                    self.print_profile()
         else:
             parser.print_help()
 
+    def print_profile(self):
+        """ Print the profile of the requests sent, on stderr to keep it apart from the output of the command """
+        print("Profile:", file=sys.stderr)
+        for line in self.axonops.timings.report_lines():
+            print(f"  {line}", file=sys.stderr)
+
     def _normalize_parallelism(self, value: str) -> str:
         """ Normalize and validate parallelism input """
         choices = ["Sequential", "Parallel", "DC-Aware"]
@@ -269,7 +340,9 @@ class Application:
 
         dashboard = Dashboard(axonops, args)
 
-        dashboard.get_actual_dashboards()
+        # listing and exporting read the dashboards as they go, the changes need all of them first
+        if not (args.list or args.exportpath):
+            dashboard.get_actual_dashboards()
         if args.list:
             dashboard.list_dashboards()
         elif args.exportpath:
@@ -281,6 +354,27 @@ class Application:
         else:
             print("No action specified for dashboard management.")
 
+    def run_migrate(self, args: argparse.Namespace):
+        """ Run the migration of a cluster to other clusters """
+        if args.v:
+            print(f"Running migration of {args.cluster} on {args.org}")
+            print(args)
+
+        resources = [resource.strip() for resource in args.resources.split(',') if resource.strip()]
+        unknown = [resource for resource in resources if resource not in RESOURCES]
+        if unknown:
+            print(f"Unknown resources: {', '.join(unknown)}. Choose from: {', '.join(RESOURCES)}")
+            sys.exit(1)
+
+        axonops = self.get_axonops(args)
+
+        migrate = Migrate(axonops, args)
+        results = migrate.migrate(args.targets.split(','), resources, args.dryrun)
+        migrate.print_results(results, args.dryrun)
+
+        if any(result['errors'] for result in results.values()):
+            sys.exit(1)
+
     def run_adaptive_repair(self, args: argparse.Namespace):
         """ Run the adaptive repair """
         if args.v:
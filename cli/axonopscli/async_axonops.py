@@ -0,0 +1,76 @@
+import asyncio
+from typing import List
+
+from .axonops import AxonOps
+from .single_flight import url_family
+
+
+class AsyncAxonOps:
+    """
+    asyncio front end of AxonOps to run many requests at the same time.
+
+    Every request is sent by the synchronous client in a worker thread, so it shares its authentication and its
+    pooled session, its retries and its rate limit. At most concurrency requests are in flight. A GET of a URL
+    already in flight is awaited instead of being sent again, without taking a slot.
+    """
+
+    def __init__(self, axonops: AxonOps, concurrency: int = 10):
+        self.axonops = axonops
+        self.concurrency = max(concurrency, 1)
+        # the GETs in flight by URL, for the event loop running them
+        self.in_flight = {}
+
+    async def do_request(self, semaphore: asyncio.Semaphore, url: str, **kwargs) -> dict:
+        """ Same as AxonOps.do_request, waiting for a free slot first. """
+        if kwargs.get('method', 'GET').upper() != 'GET':
+            try:
+                return await self._send(semaphore, url, **kwargs)
+            finally:
+                # the GETs in flight of this resource may have read what was just changed, don't join them any more
+                family = url_family(url)
+                for key in [key for key in self.in_flight if url_family(key[0]) == family]:
+                    del self.in_flight[key]
+
+        key = (url, tuple(kwargs.get('ok_codes', ())))
+        flight = self.in_flight.get(key)
+        if flight is not None:
+            # shielded, a caller cancelled while waiting doesn't cancel the request of the others
+            return await asyncio.shield(flight)
+
+        flight = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = flight
+        try:
+            result = await self._send(semaphore, url, **kwargs)
+            flight.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as e:
+            flight.set_exception(e)
+            # retrieved here, nobody else may be waiting for it
+            flight.exception()
+            raise
+        finally:
+            if self.in_flight.get(key) is flight:
+                del self.in_flight[key]
+
+    async def _send(self, semaphore: asyncio.Semaphore, url: str, **kwargs) -> dict:
+        """ Send the request in a worker thread once there is a free slot. """
+        async with semaphore:
+            return await asyncio.to_thread(self.axonops.do_request, url, **kwargs)
+
+    async def gather(self, requests: List[dict]) -> list:
+        """
+        Send all the requests, each one is a dict of AxonOps.do_request arguments.
+        Returns the responses in the same order, or the exception raised by the failed ones.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self.do_request(semaphore, **request) for request in requests),
+                                    return_exceptions=True)
+
+    def run_all(self, requests: List[dict]) -> list:
+        """ Blocking version of gather, for the synchronous code of the CLI. """
+        if not requests:
+            return []
+        return asyncio.run(self.gather(requests))
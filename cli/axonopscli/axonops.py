@@ -1,15 +1,45 @@
 import json
+import time
 import urllib.parse
 from typing import List
 import requests
+from requests.adapters import HTTPAdapter
 
-from .utils import HTTPCodeError
+from .json_stream import CHUNK_SIZE, iter_json_items, items_at
+from .retry import RetryPolicy, TokenBucket
+from .single_flight import SingleFlight
+from .timings import PHASES, TIMED_POOL_CLASSES, RequestTimings, take_connection_phases, url_cluster, \
+    url_template
+from .utils import ACCEPT_ENCODING, HTTPCodeError, accepts_gzip, compress_body, received_size
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter giving up on the requests sent without a timeout after timeout seconds.
+    With timed, the connections record how long connecting took (see timings.take_connection_phases)
+    """
+
+    def __init__(self, *args, timeout: float = None, timed: bool = False, **kwargs):
+        self.timeout = timeout
+        self.timed = timed
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if self.timed:
+            self.poolmanager.pool_classes_by_scheme = dict(TIMED_POOL_CLASSES)
+
+    def send(self, request, timeout=None, **kwargs):
+        return super().send(request, timeout=timeout if timeout is not None else self.timeout, **kwargs)
 
 
 class AxonOps:
 
     def __init__(self, org_name: str, base_url: str = '', username: str = '', password: str = '',
-                 cluster_type: str = 'cassandra', api_token: str = '', verbose=False):
+                 cluster_type: str = 'cassandra', api_token: str = '', verbose=False, pool_size: int = 10,
+                 retries: int = 3, retry_backoff: float = 0.5, retry_non_idempotent: bool = False,
+                 timeout: float = 30, rate_limit: float = 0, profile: bool = False, compress: bool = False,
+                 stream: bool = False):
         self.org_name = org_name
         self.api_token = api_token
         self.username = username
@@ -18,9 +48,37 @@ class AxonOps:
         self.jwt = ''
         self.verbose = verbose
 
+        # reuse the connections to the server instead of doing a new TCP/TLS handshake for every request
+        self.session = requests.Session()
+        adapter = TimeoutHTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1), timeout=timeout,
+                                     timed=profile)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # the requests failing on a busy server are sent again, never faster than rate_limit requests per second
+        self.retry_policy = RetryPolicy(retries, backoff=retry_backoff, retry_non_idempotent=retry_non_idempotent)
+        self.rate_limiter = TokenBucket(rate_limit)
+
+        # the responses are always asked gzipped, the large request bodies are only gzipped with compress and once
+        # the server said in the Accept-Encoding of a response that it takes them
+        self.compress = compress
+        self.server_accepts_gzip = False
+
+        # with stream, the lists (dashboards, nodes) are decoded one element at a time as the response is received
+        self.stream = stream
+
+        # the method, endpoint, status, sizes and timings of every request, printed at the end with --profile
+        self.timings = RequestTimings() if profile else None
+
         # save the integration output to a var so we can use it multiple times
         self.integrations_output = {}
 
+        # nodes of the clusters by url, fetched once per client
+        self.nodes_cache = {}
+
+        # the same GET asked by several threads while it is in flight is sent once
+        self.in_flight = SingleFlight()
+
         # collect the errors, will check it on every module
         self.errors = []
 
@@ -57,10 +115,15 @@ class AxonOps:
                 "password": self.password
             }
 
-            result, return_error = self.do_request("/api/login", json_data=json_data, method='POST')
+            try:
+                result = self.do_request("/api/login", json_data=json_data, method='POST')
+            except (HTTPCodeError, requests.RequestException, ValueError) as e:
+                self.errors.append(f"Login to {self.dash_url()} failed: {e}")
+                return ''
 
-            if return_error:
-                self.errors.append(return_error)
+            if not isinstance(result, dict) or not result.get('token'):
+                self.errors.append(f"{self.dash_url()}/api/login returned an invalid result {result}")
+                return ''
             self.jwt = result['token']
             return self.jwt
 
@@ -77,28 +140,29 @@ class AxonOps:
         Parameters:
             url (str): The relative URL after the base and the org name.
             method (str): HTTP method to use for the request (GET, POST, PUT, DELETE, etc.)
+
+        A GET of a URL already in flight in another thread isn't sent again, the callers share its response.
         """
+        if method.upper() != 'GET':
+            try:
+                return self._request(url, method, json_data, data, form_field, ok_codes)
+            finally:
+                # the GETs in flight of this resource may have read what was just changed, don't join them any more
+                self.in_flight.forget(url)
+
+        result, _ = self.in_flight.do((url, tuple(ok_codes)),
+                                      lambda: self._request(url, method, json_data, data, form_field, ok_codes))
+        return result
+
+    def _request(self, url: str, method: str, json_data: any, data: any, form_field: str,
+                 ok_codes: List[int]) -> dict:
+        """ do_request without the coalescing of the GETs in flight. """
         full_url = f'{self.dash_url()}{url}'
 
-        # Select the bearer if it is necessary
-        bearer = ''
-
-        # If we have user and password, use them
-        if self.username and self.password:
-            bearer = self.do_login()
-
-        # If we have a token, use it
-        if self.api_token:
-            bearer = self.api_token
-
         if data is None and json_data is not None:
             data = json.dumps(json_data).encode('utf-8')
 
-        headers = {
-            'Accept': 'application/json',
-            'Authorization': f'Bearer {bearer}',
-            'User-agent': 'AxonOps Python Module'
-        }
+        headers = self.request_headers()
 
         if form_field != "":
             headers['Content-type'] = 'application/x-www-form-urlencoded'
@@ -111,7 +175,7 @@ class AxonOps:
             print(f"{method} {full_url} {headers}")
 
         try:
-            response = requests.request(method, full_url, headers=headers, data=data)
+            response = self.timed_send(url, method, full_url, headers, data)
             if response.status_code == 204:
                 if self.verbose:
                     print(f"204 No Content received from {full_url}")
@@ -127,6 +191,175 @@ class AxonOps:
             print(f"url: {full_url} header: {headers} return: {response.status_code}")
             raise
 
+    def request_headers(self) -> dict:
+        """ The headers sent with every request. """
+        # Select the bearer if it is necessary
+        bearer = ''
+
+        # If we have user and password, use them
+        if self.username and self.password:
+            bearer = self.jwt
+
+        # If we have a token, use it
+        if self.api_token:
+            bearer = self.api_token
+
+        return {
+            'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Authorization': f'Bearer {bearer}',
+            'User-agent': 'AxonOps Python Module'
+        }
+
+    def iter_items(self, url: str, path: tuple = ()):
+        """
+        Iterate over the elements of the array at path in the JSON document returned by a GET of url, e.g.
+        ('dashboards',) for the dashboard templates or () when the document is the array, nothing when it is missing.
+        With stream the body is decoded one element at a time as it is received, so only the current element is
+        held in memory, otherwise the whole document is decoded first like do_request does.
+        """
+        if not self.stream:
+            return iter(items_at(self.do_request(url), path))
+
+        full_url = f'{self.dash_url()}{url}'
+        if self.verbose:
+            print(f"GET {full_url} (streamed)")
+        response = self.timed_send(url, 'GET', full_url, self.request_headers(), None, stream=True)
+        if response.status_code not in (200, 204):
+            response.close()
+            raise HTTPCodeError(f"Call to {full_url} returned {response.status_code}")
+        if response.status_code == 204:
+            response.close()
+            return iter(())
+        return self._stream_items(response, path)
+
+    def _stream_items(self, response: requests.Response, path: tuple):
+        """ The elements read from a streamed response, which is closed once they are all read. """
+        decoded = 0
+
+        def chunks():
+            nonlocal decoded
+            for chunk in response.iter_content(CHUNK_SIZE):
+                decoded += len(chunk)
+                yield chunk
+
+        body = chunks()
+        try:
+            yield from iter_json_items(body, path)
+            # read what follows the array when it is short, so that the connection can be reused
+            tail = 0
+            for chunk in body:
+                tail += len(chunk)
+                if tail > CHUNK_SIZE:
+                    break
+        finally:
+            response.close()
+            # the size of the body is only known once it has been read, timed_send left it to be filled in here
+            record = getattr(response, 'timing', None)
+            if record is not None:
+                size = getattr(response.raw, 'tell', lambda: decoded)()
+                record['bytes_in'] = size if isinstance(size, int) and size > 0 else decoded
+                record['bytes_in_decoded'] = decoded
+
+    def timed_send(self, url: str, method: str, full_url: str, headers: dict, data: any,
+                   stream: bool = False) -> requests.Response:
+        """
+        send_compressed, adding the request to the timings when profiling. The size of a streamed response isn't
+        known yet, its record is kept in response.timing for the reader to fill in.
+        """
+        if self.timings is None:
+            return self.send_compressed(method, full_url, headers, data, stream)
+
+        take_connection_phases()
+        started = time.perf_counter()
+        record = {
+            'method': method,
+            'endpoint': url_template(url, self.org_name),
+            'cluster': url_cluster(url, self.org_name),
+            'status': None,
+            'bytes_out': len(data) if data else 0,
+            'bytes_in': 0,
+            'bytes_out_decoded': len(data) if data else 0,
+            'bytes_in_decoded': 0,
+            'attempts': 1,
+            **dict.fromkeys(PHASES, 0.0),
+        }
+        try:
+            response = self.send_compressed(method, full_url, headers, data, stream)
+            record.update({
+                'status': response.status_code,
+                'bytes_out': response.bytes_sent,
+                'attempts': getattr(response, 'attempts', 1),
+                'ttfb': response.elapsed.total_seconds() * 1000,
+            })
+            if stream:
+                response.timing = record
+            else:
+                record['bytes_in'] = received_size(response)
+                record['bytes_in_decoded'] = len(response.content or b'')
+            return response
+        except (requests.ConnectionError, requests.Timeout) as e:
+            record['attempts'] = getattr(e, 'attempts', 1)
+            raise
+        finally:
+            record.update(take_connection_phases())
+            record['total'] = (time.perf_counter() - started) * 1000
+            for phase in PHASES:
+                record[phase] = round(float(record.get(phase, 0)), 1)
+            self.timings.add(record)
+
+    def send_compressed(self, method: str, full_url: str, headers: dict, data: any,
+                        stream: bool = False) -> requests.Response:
+        """
+        send with the body gzipped when compress is set and the server takes it, the size of the body sent is kept
+        in response.bytes_sent. A gzipped body refused with a 415 is sent again as it is.
+        """
+        body = compress_body(data) if self.compress and self.server_accepts_gzip else None
+        if body is not None:
+            response = self.send(method, full_url, dict(headers, **{'Content-Encoding': 'gzip'}), body, stream)
+            if response.status_code != 415:
+                response.bytes_sent = len(body)
+                return response
+            # the server doesn't take a gzipped body here after all, send them as they are from now on
+            self.server_accepts_gzip = False
+            response.close()
+        response = self.send(method, full_url, headers, data, stream)
+        response.bytes_sent = len(data) if data else 0
+        if self.compress and not self.server_accepts_gzip:
+            self.server_accepts_gzip = accepts_gzip(getattr(response, 'headers', None))
+        return response
+
+    def send(self, method: str, full_url: str, headers: dict, data: any, stream: bool = False) -> requests.Response:
+        """
+        Send the request under the rate limit, sending it again as the retry policy says when the server can't be
+        reached or is busy. A 429 holds all the requests of the client for the time the server asked.
+        With stream the body of the response is left to be read from it.
+        """
+        # only passed when streaming, requests reads the body otherwise
+        options = {'stream': True} if stream else {}
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.request(method, full_url, headers=headers, data=data, **options)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not self.retry_policy.should_retry(method, None, attempt):
+                    e.attempts = attempt + 1
+                    raise
+                delay = self.retry_policy.delay(attempt)
+            else:
+                if not self.retry_policy.should_retry(method, response.status_code, attempt):
+                    response.attempts = attempt + 1
+                    return response
+                delay = self.retry_policy.delay(attempt, response.headers)
+                response.close()
+                if response.status_code == 429:
+                    self.rate_limiter.pause(delay)
+            if self.verbose:
+                print(f"Retrying {method} {full_url} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
     def get_integration_output(self, cluster: str):
         """
         get the integration output from local variable if present, or from API
@@ -0,0 +1,26 @@
+import importlib.util
+import os
+import sys
+
+# the CLI runs from the cli directory of the collection, see README.md
+MODULE_UTILS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                'plugins', 'module_utils')
+
+
+def load_module_utils(name: str):
+    """
+    Load one of the pure Python module utils of the collection, which the CLI shares instead of keeping a copy.
+    Importing it through ansible_collections would need Ansible, so the file is loaded on its own.
+    """
+    module_name = f"{__name__}.{name}"
+    module = sys.modules.get(module_name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(MODULE_UTILS_DIR, f"{name}.py"))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[module_name]
+            raise
+    return module
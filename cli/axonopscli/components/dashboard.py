@@ -1,4 +1,6 @@
+import itertools
 import json
+import os
 
 
 class Dashboard:
@@ -33,105 +35,168 @@ class Dashboard:
                 print("No dashboards found")
             return []
 
+    def iter_dashboards(self):
+        """ The dashboards already fetched, otherwise the dashboards read from AxonOps one at a time, which with
+        --stream are decoded as they are received instead of all at once. """
+        if self.dashboard_data is not None:
+            return iter(self.dashboard_data)
+        if self.args.v:
+            print("Reading the dashboards")
+        return self.axonops.iter_items(self.full_dashboard_url, ('dashboards',))
+
     def list_dashboards(self):
         """ List all dashboards in AxonOps. """
-        dashboards = self.dashboard_data
-        if dashboards:
-            print("Dashboards in AxonOps:")
-            for dashboard in dashboards:
-                print(f"- {dashboard['name']}")
-        else:
+        found = False
+        for dashboard in self.iter_dashboards():
+            if not found:
+                print("Dashboards in AxonOps:")
+                found = True
+            print(f"- {dashboard['name']}")
+        if not found:
             print("No dashboards found in AxonOps.")
 
     def export_dashboard(self, path: str, dashboard_name: str | None = None):
-        """ Export a specific dashboard from AxonOps, or all of them if no name is given. """
-        dashboards = self.dashboard_data
-        if not dashboards:
-            print("No dashboards data available to export.")
-            return
+        """ Export a specific dashboard from AxonOps, or all of them if no name is given.
+        path is a directory where every dashboard is written to its own JSON file, or a .jsonl archive
+        where the dashboards are written one per line. The dashboards are written as they are read. """
+        dashboards = self.iter_dashboards()
         if dashboard_name:
-            for dashboard in dashboards:
-                if dashboard['name'] == dashboard_name:
-                    self._dowload_dashboard(dashboard, path, dashboard_name)
-                    break
+            # stop reading at the dashboard asked
+            dashboards = itertools.islice((dashboard for dashboard in dashboards
+                                           if dashboard['name'] == dashboard_name), 1)
+
+        if path.endswith('.jsonl'):
+            exported = self._write_archive(dashboards, path)
         else:
+            exported = 0
             for dashboard in dashboards:
-                dashboard_name = dashboard['name']
-                self._dowload_dashboard(dashboard, path, dashboard_name)
+                self._dowload_dashboard(dashboard, path, dashboard['name'])
+                exported += 1
+        if not exported:
+            print("No dashboards data available to export.")
 
     def _dowload_dashboard(self, dashboard: dict, path: str, dashboard_name: str):
         """ Download a specific dashboard to a file. """
         filename = f"{path}/{dashboard_name}_dashboard.json"
         with open(filename, 'w') as f:
+            # json.dump writes the encoded chunks as they are produced, without building the whole string
             json.dump(dashboard, f, indent=4)
         print(f"Exported dashboard '{dashboard_name}' to file '{filename}'")
 
+    def _write_archive(self, dashboards, filename: str) -> int:
+        """ Write the dashboards to a JSONL archive, one dashboard per line, and return how many were written. """
+        count = 0
+        with open(filename, 'w') as f:
+            for dashboard in dashboards:
+                json.dump(dashboard, f, separators=(',', ':'))
+                f.write('\n')
+                count += 1
+                if self.args.v:
+                    print(f"Exported dashboard '{dashboard['name']}' to archive '{filename}'")
+        print(f"Exported {count} dashboards to archive '{filename}'")
+        return count
+
+    @staticmethod
+    def read_dashboards(path: str):
+        """ Yield the dashboards found in path: a JSON file with a dashboard, a list of dashboards or a dashboard
+        template export, a .jsonl archive with a dashboard per line, or a directory of such files. """
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.json') or name.endswith('.jsonl'):
+                    yield from Dashboard.read_dashboards(os.path.join(path, name))
+            return
+
+        with open(path, 'r') as f:
+            if path.endswith('.jsonl'):
+                # one dashboard per line, only the current one is decoded at a time
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+                return
+            data = json.load(f)
+
+        if isinstance(data, dict) and 'dashboards' in data:
+            data = data['dashboards']
+        if isinstance(data, list):
+            yield from data
+        else:
+            yield data
+
     def import_dashboard(self, file_path: str, dashboard_name: str | None = None, position: int | None = None,
                          overwrite: bool = False):
-        """ Import a specific dashboard to AxonOps. If no name is given, import all dashboards found in the file. """
-        old_position = None
-        # Load dashboard(s) from the specified file
-        with open(file_path, 'r') as f:
-            dashboard_data = json.load(f)
-
-        # Determine which dashboards to import
-        dashboards_to_import = []
-        if dashboard_name:
-            if dashboard_data['name'] == dashboard_name:
-                dashboards_to_import.append(dashboard_data)
+        """ Import the dashboards found in a file, a JSONL archive or a directory to AxonOps, or only the one
+        called dashboard_name. All the dashboards are merged into the existing ones and sent with a single PUT. """
+        # the last definition of a dashboard wins
+        dashboards_to_import = {}
+        for dashboard in self.read_dashboards(file_path):
+            if dashboard_name and dashboard['name'] != dashboard_name:
+                continue
+            dashboards_to_import.pop(dashboard['name'], None)
+            dashboards_to_import[dashboard['name']] = dashboard
+
+        if not dashboards_to_import:
+            if dashboard_name:
+                print(f"Dashboard '{dashboard_name}' not found in '{file_path}'.")
             else:
-                print(f"Dashboard '{dashboard_name}' not found in file '{file_path}'.")
-                return
-        else:
-            dashboards_to_import.append(dashboard_data)
-
-        for dashboard in dashboards_to_import:
-
-            # Remove existing dashboard if it exists and overwrite is specified
-            existing_dashboards = self.dashboard_data
-            for i, existing_dashboard in enumerate(existing_dashboards):
-                if existing_dashboard['name'] == dashboard['name']:
-                    if overwrite:
-                        if self.args.v:
-                            print(f"Overwriting existing dashboard '{dashboard['name']}', position {i + 1}")
-                        del existing_dashboards[i]
-                        old_position = i
-                        break
-                    else:
-                        print(f"Dashboard '{dashboard['name']}' already exists. Use overwrite option to replace it.")
-                        return
-
-            if position:
-                n = len(self.dashboard_data)
-                if position > 0:
-                    insert_position = (position - 1) % len(self.dashboard_data)
-                else:
-                    insert_position = n + position + 1
-                # clamp to [0, n] so insert works correctly
-                insert_position = max(0, min(insert_position, n))
+                print(f"No dashboards found in '{file_path}'.")
+            return
+
+        existing_dashboards = self.dashboard_data or []
+        existing_positions = {}
+        for i, existing_dashboard in enumerate(existing_dashboards):
+            existing_positions.setdefault(existing_dashboard['name'], i)
+
+        # don't send anything if a dashboard can't be imported
+        already_existing = [name for name in dashboards_to_import if name in existing_positions]
+        if already_existing and not overwrite:
+            for name in already_existing:
+                print(f"Dashboard '{name}' already exists. Use overwrite option to replace it.")
+            return
+
+        merged = list(existing_dashboards)
+        to_insert = []
+        for name, dashboard in dashboards_to_import.items():
+            old_position = existing_positions.get(name)
+            if old_position is not None and not position:
                 if self.args.v:
-                    print(f"Inserting dashboard '{dashboard['name']}' at specified position {insert_position + 1}")
-            else:
-                if old_position is None:
-                    insert_position = len(self.dashboard_data)
-                else:
-                    insert_position = old_position
+                    print(f"Overwriting existing dashboard '{name}' at position {old_position + 1}")
+                merged[old_position] = dashboard
+                continue
+            if old_position is not None:
                 if self.args.v:
-                    print(f"Inserting dashboard '{dashboard['name']}' at old position {insert_position + 1}")
-            # Insert the new dashboard at the specified position
-
-            self.dashboard_data.insert(insert_position, dashboard)
-
-            # Update AxonOps with the new list of dashboards
-            update_payload = {
-                'type': 'cassandra',
-                'dashboards': self.dashboard_data
-            }
-            response = self.axonops.do_request(
-                url=self.full_dashboard_url,
-                method='PUT',
-                json_data=update_payload,
-            )
+                    print(f"Overwriting existing dashboard '{name}', position {old_position + 1}")
+                merged[old_position] = None
+            to_insert.append(dashboard)
+        merged = [dashboard for dashboard in merged if dashboard is not None]
+
+        n = len(merged)
+        if position and n:
+            if position > 0:
+                insert_position = (position - 1) % n
+            else:
+                insert_position = n + position + 1
+            # clamp to [0, n] so insert works correctly
+            insert_position = max(0, min(insert_position, n))
+        else:
+            insert_position = n
+        if self.args.v:
+            for i, dashboard in enumerate(to_insert):
+                print(f"Inserting dashboard '{dashboard['name']}' at position {insert_position + i + 1}")
+        merged[insert_position:insert_position] = to_insert
+
+        self.dashboard_data = merged
+
+        # Update AxonOps with the new list of dashboards, once for all the imported dashboards
+        update_payload = {
+            'type': 'cassandra',
+            'dashboards': self.dashboard_data
+        }
+        self.axonops.do_request(
+            url=self.full_dashboard_url,
+            method='PUT',
+            json_data=update_payload,
+        )
+        print(f"Imported {len(dashboards_to_import)} dashboards")
 
     def delete_dashboard(self, deletedashboard: str):
         """ Delete a specific dashboard from AxonOps"""
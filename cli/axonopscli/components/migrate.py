@@ -0,0 +1,289 @@
+import uuid
+
+from axonopscli.async_axonops import AsyncAxonOps
+
+RESOURCES = ('dashboards', 'alert_rules', 'alert_routes', 'healthchecks')
+SEVERITIES = ('info', 'warning', 'error')
+HEALTHCHECK_KEYS = {'http': 'httpchecks', 'tcp': 'tcpchecks', 'shell': 'shellchecks'}
+
+
+def parse_widget_url(widget_url: str):
+    """ Split the widget_url of an alert rule into (dashboard uuid, chart uuid, filter). """
+    parts = (widget_url or '').split('/')
+    if len(parts) < 6:
+        return None, None, None
+    dash_uuid, _, query = parts[5].partition('?')
+    chart_uuid, separator, url_filter = query.partition('&')
+    if chart_uuid.startswith('uuid='):
+        chart_uuid = chart_uuid[5:]
+    return dash_uuid, chart_uuid or None, url_filter if separator else None
+
+
+def index_charts(dashboards: list):
+    """ Return (dashboard uuid, chart uuid) -> (dashboard name, chart title) and the reverse, first chart wins. """
+    by_uuid = {}
+    by_title = {}
+    for dashboard in dashboards or []:
+        for panel in dashboard.get('panels') or []:
+            key = (dashboard.get('name'), panel.get('title'))
+            value = (dashboard.get('uuid'), panel.get('uuid'))
+            by_uuid.setdefault(value, key)
+            by_title.setdefault(key, value)
+    return by_uuid, by_title
+
+
+def index_integrations(integrations: dict):
+    """ Return ID -> (type, name) and (type, name) -> ID of the integration definitions, first one wins. """
+    by_id = {}
+    by_type_and_name = {}
+    for definition in (integrations or {}).get('Definitions') or []:
+        key = (definition.get('Type'), (definition.get('Params') or {}).get('name'))
+        by_id.setdefault(definition.get('ID'), key)
+        by_type_and_name.setdefault(key, definition.get('ID'))
+    return by_id, by_type_and_name
+
+
+def keep_target_uuids(dashboard: dict, current) -> dict:
+    """ The source dashboard with the uuids of the target one and of its charts with the same title, so that the
+    alert rules of the target still point to them. """
+    if current is None:
+        return dashboard
+    panel_uuids = {}
+    for panel in reversed(current.get('panels') or []):
+        panel_uuids[panel.get('title')] = panel.get('uuid')
+    panels = []
+    for panel in dashboard.get('panels') or []:
+        target_uuid = panel_uuids.pop(panel.get('title'), None)
+        panels.append({**panel, 'uuid': target_uuid} if target_uuid else panel)
+    dashboard = {**dashboard, 'panels': panels}
+    if current.get('uuid'):
+        dashboard['uuid'] = current['uuid']
+    return dashboard
+
+
+def merge_by_name(existing: list, items: list, prepare):
+    """ Merge the items into existing by name, replacing in place and appending the new ones.
+    Returns (merged, [(name, action)]) where action is none, create or update. """
+    positions = {}
+    for i, current in enumerate(existing or []):
+        positions.setdefault(current.get('name'), i)
+    merged = list(existing or [])
+    actions = []
+    for item in items:
+        position = positions.get(item.get('name'))
+        current = merged[position] if position is not None else None
+        new = prepare(item, current)
+        if current is None:
+            positions[item.get('name')] = len(merged)
+            merged.append(new)
+            action = 'create'
+        elif new != current:
+            merged[position] = new
+            action = 'update'
+        else:
+            action = 'none'
+        actions.append((item.get('name'), action))
+    return merged, actions
+
+
+class Migrate:
+    """ Copy the dashboards, alert rules, alert routes and health checks of a cluster to other clusters.
+
+    The source cluster is read once. The targets are read concurrently, the changes of every target are worked
+    out in memory and all the writes are then sent concurrently, with at most --concurrency requests in flight.
+    The alert rules are pointed to the chart with the same dashboard name and title on the target, the
+    integrations are matched by type and name. Nothing is removed from the targets. """
+
+    def __init__(self, axonops, args):
+        self.axonops = axonops
+        self.args = args
+        self.async_axonops = AsyncAxonOps(axonops, concurrency=getattr(args, 'concurrency', 10))
+
+    def urls(self, cluster: str) -> dict:
+        base = f"{self.args.org}/cassandra/{cluster}"
+        return {
+            'dashboards': f"/api/v1/dashboardtemplate/{base}?dashver=2.0",
+            'alert_rules': f"/api/v1/alert-rules/{base}",
+            'integrations': f"/api/v1/integrations/{base}",
+            'healthchecks': f"/api/v1/healthchecks/{base}",
+        }
+
+    def read_clusters(self, clusters: list) -> dict:
+        """ Read the dashboards, alert rules, integrations and health checks of all the clusters concurrently.
+        Returns cluster -> dict of the responses, or the exception raised reading the cluster. """
+        keys = ('dashboards', 'alert_rules', 'integrations', 'healthchecks')
+        requests = [{'url': self.urls(cluster)[key]} for cluster in clusters for key in keys]
+        responses = self.async_axonops.run_all(requests)
+
+        states = {}
+        for i, cluster in enumerate(clusters):
+            cluster_responses = responses[i * len(keys):(i + 1) * len(keys)]
+            errors = [response for response in cluster_responses if isinstance(response, Exception)]
+            states[cluster] = errors[0] if errors else {
+                'dashboards': (cluster_responses[0] or {}).get('dashboards') or [],
+                'alert_rules': (cluster_responses[1] or {}).get('metricrules') or [],
+                'integrations': cluster_responses[2] or {},
+                'healthchecks': cluster_responses[3] or {},
+            }
+        return states
+
+    def plan(self, source: dict, target: dict, cluster: str, resources) -> dict:
+        """ Work out the changes to copy source to the target cluster.
+        Returns a dict with the requests to send, the actions per resource and the skipped references. """
+        plan = {'requests': [], 'actions': {}, 'skipped': []}
+        urls = self.urls(cluster)
+        source_integrations, _ = index_integrations(source['integrations'])
+        _, target_integrations = index_integrations(target['integrations'])
+
+        def target_integration_id(integration_id):
+            return target_integrations.get(source_integrations.get(integration_id))
+
+        def rewrite_integrations(integrations, what):
+            if not integrations or integrations.get('Routing') is None:
+                return integrations
+            routing = []
+            for entry in integrations['Routing']:
+                target_id = target_integration_id(entry.get('ID'))
+                if target_id is None:
+                    plan['skipped'].append(f"{what}: integration {entry.get('ID')} not found, route dropped")
+                    continue
+                routing.append({**entry, 'ID': target_id})
+            return {**integrations, 'Routing': routing}
+
+        target_dashboards = target['dashboards']
+        if 'dashboards' in resources:
+            target_dashboards, actions = merge_by_name(target_dashboards, source['dashboards'], keep_target_uuids)
+            plan['actions']['dashboards'] = actions
+            if any(action != 'none' for _, action in actions):
+                plan['requests'].append({'url': urls['dashboards'], 'method': 'PUT',
+                                         'json_data': {'type': 'cassandra', 'dashboards': target_dashboards}})
+
+        if 'alert_rules' in resources:
+            source_charts, _ = index_charts(source['dashboards'])
+            _, target_charts = index_charts(target_dashboards)
+            existing = {}
+            for rule in target['alert_rules']:
+                existing.setdefault(rule.get('alert'), rule)
+            plan['actions']['alert_rules'] = []
+            for rule in source['alert_rules']:
+                name = rule.get('alert')
+                rule = dict(rule)
+                annotations = dict(rule.get('annotations') or {})
+                dash_uuid, chart_uuid, url_filter = parse_widget_url(annotations.get('widget_url'))
+                if dash_uuid:
+                    target_uuids = target_charts.get(source_charts.get((dash_uuid, chart_uuid)))
+                    if target_uuids is None:
+                        plan['skipped'].append(f"alert rule {name}: its chart was not found, rule skipped")
+                        continue
+                    annotations['widget_url'] = \
+                        f"/{self.args.org}/cassandra/{cluster}/performance/{target_uuids[0]}?uuid={target_uuids[1]}"
+                    if url_filter is not None:
+                        annotations['widget_url'] += f"&{url_filter}"
+                    if rule.get('correlationId') == chart_uuid:
+                        rule['correlationId'] = target_uuids[1]
+                rule['annotations'] = annotations
+                rule['integrations'] = rewrite_integrations(rule.get('integrations'), f"alert rule {name}")
+                current = existing.get(name)
+                rule['id'] = current['id'] if current else str(uuid.uuid4())
+                action = 'create' if current is None else ('update' if rule != current else 'none')
+                plan['actions']['alert_rules'].append((name, action))
+                if action != 'none':
+                    plan['requests'].append({'url': urls['alert_rules'], 'method': 'POST', 'json_data': rule})
+
+        if 'alert_routes' in resources:
+            existing_routes = set()
+            existing_overrides = {}
+            for routing in target['integrations'].get('Routings') or []:
+                for entry in routing.get('Routing') or []:
+                    existing_routes.add((routing.get('Type'), entry.get('Severity'), entry.get('ID')))
+                for severity in SEVERITIES:
+                    existing_overrides[(routing.get('Type'), severity)] = routing.get('Override' + severity.title())
+            plan['actions']['alert_routes'] = []
+            for routing in source['integrations'].get('Routings') or []:
+                axon_type = routing.get('Type')
+                for severity in SEVERITIES:
+                    override = routing.get('Override' + severity.title())
+                    if override is None or existing_overrides.get((axon_type, severity)) == override:
+                        continue
+                    plan['actions']['alert_routes'].append((f"{axon_type} {severity} override {override}", 'update'))
+                    plan['requests'].append({
+                        'url': f"/api/v1/integrations-override/{self.args.org}/cassandra/{cluster}/{axon_type}/{severity}",
+                        'method': 'PUT', 'json_data': {'value': override}})
+                for entry in routing.get('Routing') or []:
+                    target_id = target_integration_id(entry.get('ID'))
+                    name = f"{axon_type} {entry.get('Severity')} route"
+                    if target_id is None:
+                        plan['skipped'].append(f"{name}: integration {entry.get('ID')} not found, route dropped")
+                        continue
+                    if (axon_type, entry.get('Severity'), target_id) in existing_routes:
+                        continue
+                    plan['actions']['alert_routes'].append((name, 'create'))
+                    plan['requests'].append({
+                        'url': f"/api/v1/integrations-routing/{self.args.org}/cassandra/{cluster}/{axon_type}/"
+                               f"{entry.get('Severity')}/{target_id}",
+                        'method': 'POST'})
+
+        if 'healthchecks' in resources:
+            payload = {}
+            plan['actions']['healthchecks'] = []
+            for check_type, key in HEALTHCHECK_KEYS.items():
+
+                def prepare(check, current):
+                    return {**check,
+                            'id': current['id'] if current else str(uuid.uuid4()),
+                            'integrations': rewrite_integrations(check.get('integrations'),
+                                                                 f"{check_type} check {check.get('name')}")}
+
+                payload[key], actions = merge_by_name(target['healthchecks'].get(key),
+                                                      source['healthchecks'].get(key) or [], prepare)
+                plan['actions']['healthchecks'].extend((f"{check_type} {name}", action) for name, action in actions)
+            if any(action != 'none' for _, action in plan['actions']['healthchecks']):
+                plan['requests'].append({'url': urls['healthchecks'], 'method': 'PUT', 'json_data': payload})
+
+        return plan
+
+    def migrate(self, targets: list, resources=RESOURCES, dry_run: bool = False) -> dict:
+        """ Copy the source cluster, --cluster, to the targets.
+        Returns target -> {'plan': ..., 'errors': [...]} """
+        targets = list(dict.fromkeys(target for target in targets if target))
+        states = self.read_clusters([self.args.cluster] + targets)
+        source = states.pop(self.args.cluster)
+        if isinstance(source, Exception):
+            raise source
+
+        results = {}
+        requests = []
+        owners = []
+        for target in targets:
+            if isinstance(states[target], Exception):
+                results[target] = {'plan': None, 'errors': [states[target]]}
+                continue
+            plan = self.plan(source, states[target], target, resources)
+            results[target] = {'plan': plan, 'errors': []}
+            if not dry_run:
+                requests.extend(plan['requests'])
+                owners.extend([target] * len(plan['requests']))
+
+        # the writes of all the targets are sent at the same time
+        for target, response in zip(owners, self.async_axonops.run_all(requests)):
+            if isinstance(response, Exception):
+                results[target]['errors'].append(response)
+        return results
+
+    def print_results(self, results: dict, dry_run: bool = False):
+        """ Print what has been done, or would be done with dry_run, on every target. """
+        for target, result in results.items():
+            plan = result['plan']
+            if plan is None:
+                print(f"{target}: failed to read the cluster: {result['errors'][0]}")
+                continue
+            changes = [(resource, name, action) for resource, actions in plan['actions'].items()
+                       for name, action in actions if action != 'none']
+            status = 'failed' if result['errors'] else ('would change' if dry_run else 'changed')
+            print(f"{target}: {status if changes else 'unchanged'}, {len(changes)} changes")
+            for resource, name, action in changes:
+                print(f"  {action} {resource}: {name}")
+            for skipped in plan['skipped']:
+                print(f"  skipped {skipped}")
+            for error in result['errors']:
+                print(f"  error: {error}")
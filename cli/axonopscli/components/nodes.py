@@ -1,4 +1,5 @@
-_cached_data = None
+from ..node_directory import NodeDirectory, node_lookup_fields
+
 
 class Nodes:
     node_url = "/api/v1/nodes"
@@ -11,43 +12,41 @@ class Nodes:
         self.get_nodes()
 
     def get_nodes(self):
-        global _cached_data
-        if _cached_data is None:
+        if self.full_url not in self.axonops.nodes_cache:
 
             if self.args.v:
                 print("Getting nodes with URL:", self.full_url)
 
-            response = self.axonops.do_request(
-                url=self.full_url,
-                method='GET',
-            )
+            # only what the lookups need is kept of every node, read one at a time with --stream
+            response = [node_lookup_fields(node) for node in self.axonops.iter_items(self.full_url)]
             if self.args.v:
                 print("Response node:", response)
             if response:
-                _cached_data = response
+                self.axonops.nodes_cache[self.full_url] = NodeDirectory(response)
             else:
                 print("No nodes found")
-        return _cached_data
+                return None
+        return self.axonops.nodes_cache[self.full_url].nodes
+
+    @property
+    def directory(self):
+        if self.get_nodes() is None:
+            return NodeDirectory([])
+        return self.axonops.nodes_cache[self.full_url]
+
+    def resolve_ids(self, names):
+        return self.directory.resolve_ids(names)
 
     def print_by_id(self, node_id):
-        for node in self.get_nodes():
-            if node['host_id'] == node_id:
-                if 'Details' in node and node['Details'] and 'human_readable_identifier' in node['Details']:
-                    return node['Details']['human_readable_identifier']
-                elif 'HostIP' in node:
-                    return node['HostIP']
-                else:
-                    return node_id
-        return node_id
+        return self.directory.display_name(node_id)
 
     def __str__(self) -> str:
         if self.get_nodes():
             result = "Nodes:\n"
             for node in self.get_nodes():
-                if 'Details' in node and node['Details'] and 'human_readable_identifier' in node['Details']:
-                    result += f"- {node['Details']['human_readable_identifier']} (ID: {node['host_id']})\n"
-                elif 'HostIP' in node:
-                    result += f"- {node['HostIP']} (ID: {node['host_id']})\n"
+                name = self.directory.display_name(node['host_id'])
+                if name != node['host_id']:
+                    result += f"- {name} (ID: {node['host_id']})\n"
                 else:
                     result += f"- {node['host_id']}\n"
             return result
@@ -1,4 +1,4 @@
-from axonopscli.axonops import HTTPCodeError
+from axonopscli.async_axonops import AsyncAxonOps
 
 
 class ScheduledRepair:
@@ -14,6 +14,7 @@ class ScheduledRepair:
         self.full_add_repair_url = f"{self.schedule_repair_add_url}/{args.org}/cassandra/{args.cluster}"
         self.full_repair_url = f"{self.repair_url}/{args.org}/cassandra/{args.cluster}"
         self.full_cassandrascheduledrepair_url = f"{self.cassandrascheduledrepair_url}/{args.org}/cassandra/{args.cluster}"
+        self.async_axonops = AsyncAxonOps(axonops, concurrency=getattr(args, 'concurrency', 10))
 
     def remove_all_repairs_from_axonops(self):
         """ Remove all scheduled repairs from AxonOps. """
@@ -32,9 +33,9 @@ class ScheduledRepair:
             for repair in response['ScheduledRepairs']:
                 if self.args.v:
                     print(f"Deleting scheduled repair: {repair['ID']}")
-                self.remove_repair(repair['ID'])
                 if 'Params' in repair:
                     print(repair['Params'])
+            self.remove_repairs([repair['ID'] for repair in response['ScheduledRepairs']])
         else:
             print("No scheduled repairs found")
 
@@ -103,6 +104,7 @@ class ScheduledRepair:
                     print("No response received when checking for existing scheduled repair")
                 return
             elif 'ScheduledRepairs' in response and response['ScheduledRepairs']:
+                repair_ids = []
                 for repair in response['ScheduledRepairs']:
                     if 'tag' not in repair['Params'][0]:
                         if self.args.v:
@@ -114,9 +116,10 @@ class ScheduledRepair:
                         continue
                     if self.args.v:
                         print(f"Deleting scheduled repair: {repair['ID']}")
-                    self.remove_repair(repair['ID'])
+                    repair_ids.append(repair['ID'])
                     if 'Params' in repair and self.args.v:
                         print(repair['Params'])
+                self.remove_repairs(repair_ids)
             else:
                 print("No scheduled repairs found")
         else:
@@ -129,21 +132,24 @@ class ScheduledRepair:
             json_data=self.repair_data,
         )
 
-    def remove_repair(self, repair_id: str) -> bool:
-        """ Remove a scheduled repair from AxonOps by its ID. """
+    def remove_repairs(self, repair_ids: list) -> bool:
+        """ Remove many scheduled repairs from AxonOps at the same time. """
         if self.args.v:
-            print(f"Removing scheduled repair with ID: {repair_id}")
-
-        try:
-            response = self.axonops.do_request(
-                url=f"{self.full_cassandrascheduledrepair_url}?id={repair_id}",
-                method='DELETE',
-            )
-        except HTTPCodeError:
-            print(f"Failed to remove scheduled repair with ID: {repair_id}")
-            raise
-        else:
-            if self.args.v:
+            print(f"Removing {len(repair_ids)} scheduled repairs")
+
+        responses = self.async_axonops.run_all([
+            {'url': f"{self.full_cassandrascheduledrepair_url}?id={repair_id}", 'method': 'DELETE'}
+            for repair_id in repair_ids
+        ])
+
+        errors = []
+        for repair_id, response in zip(repair_ids, responses):
+            if isinstance(response, Exception):
+                print(f"Failed to remove scheduled repair with ID: {repair_id}")
+                errors.append(response)
+            elif self.args.v:
                 print(f"Response received when removing scheduled repair with ID: {repair_id}: {response}")
 
-            return True
+        if errors:
+            raise errors[0]
+        return True
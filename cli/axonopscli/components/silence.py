@@ -1,4 +1,5 @@
 from .nodes import Nodes
+from ..async_axonops import AsyncAxonOps
 
 
 class Silence:
@@ -10,16 +11,26 @@ class Silence:
         self.full_url = f"{self.silence_window_url}/{self.args.org}/cassandra/{self.args.cluster}"
 
         self.nodes = Nodes(axonops, args)
+        self.async_axonops = AsyncAxonOps(axonops, concurrency=getattr(args, 'concurrency', 10))
 
     def delete_silence(self, id_argument: str):
-        delete_url = f"{self.full_url}/{id_argument}"
-        print("Deleting silence with ID:", id_argument)
-        if self.args.v:
-            print("DELETE", delete_url)
-        self.axonops.do_request(
-            url=delete_url,
-            method='DELETE',
-        )
+        """ Delete the silences, id_argument is one ID or a comma separated list of IDs deleted concurrently """
+        silence_ids = [silence_id.strip() for silence_id in id_argument.split(",") if silence_id.strip()]
+        requests = []
+        for silence_id in silence_ids:
+            delete_url = f"{self.full_url}/{silence_id}"
+            print("Deleting silence with ID:", silence_id)
+            if self.args.v:
+                print("DELETE", delete_url)
+            requests.append({'url': delete_url, 'method': 'DELETE'})
+
+        errors = []
+        for silence_id, response in zip(silence_ids, self.async_axonops.run_all(requests)):
+            if isinstance(response, Exception):
+                print(f"Failed to delete silence with ID: {silence_id}")
+                errors.append(response)
+        if errors:
+            raise errors[0]
 
     def create_silence(self):
         silenceall = True
@@ -0,0 +1,9 @@
+"""The streaming JSON reader of the collection, plugins/module_utils/axonops_json.py"""
+from .collection import load_module_utils
+
+_axonops_json = load_module_utils('axonops_json')
+
+CHUNK_SIZE = _axonops_json.CHUNK_SIZE
+JsonStreamError = _axonops_json.JsonStreamError
+items_at = _axonops_json.items_at
+iter_json_items = _axonops_json.iter_json_items
@@ -0,0 +1,7 @@
+"""The node directory of the collection, plugins/module_utils/axonops_nodes.py"""
+from .collection import load_module_utils
+
+_axonops_nodes = load_module_utils('axonops_nodes')
+
+NodeDirectory = _axonops_nodes.NodeDirectory
+node_lookup_fields = _axonops_nodes.node_lookup_fields
@@ -0,0 +1,10 @@
+"""The retry policy and rate limit of the collection, plugins/module_utils/axonops_retry.py"""
+from .collection import load_module_utils
+
+_axonops_retry = load_module_utils('axonops_retry')
+
+IDEMPOTENT_METHODS = _axonops_retry.IDEMPOTENT_METHODS
+RETRY_STATUS = _axonops_retry.RETRY_STATUS
+RetryPolicy = _axonops_retry.RetryPolicy
+TokenBucket = _axonops_retry.TokenBucket
+parse_retry_after = _axonops_retry.parse_retry_after
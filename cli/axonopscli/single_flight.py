@@ -0,0 +1,7 @@
+"""The GET coalescing of the collection, plugins/module_utils/axonops_flight.py"""
+from .collection import load_module_utils
+
+_axonops_flight = load_module_utils('axonops_flight')
+
+SingleFlight = _axonops_flight.SingleFlight
+url_family = _axonops_flight.url_family
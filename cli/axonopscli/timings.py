@@ -0,0 +1,185 @@
+import math
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# path segments holding an ID rather than naming an endpoint
+_ID_SEGMENT_RE = re.compile(r'^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                            r'|[0-9a-fA-F]{16,}|\d+)$')
+
+# the phases of a request, in milliseconds: connect (with the DNS lookup) and tls are the duration of opening a new
+# connection, ttfb and total are from the start of the request to the response headers and to the end of the body
+PHASES = ('connect', 'tls', 'ttfb', 'total')
+
+# phases of the connections opened by the request running in the current thread
+_connection_phases = threading.local()
+
+
+def take_connection_phases() -> dict:
+    """ The connect and tls phases recorded in this thread since the last call. """
+    phases = getattr(_connection_phases, 'phases', None) or {}
+    _connection_phases.phases = {}
+    return phases
+
+
+def _record_phase(name: str, milliseconds: float):
+    if getattr(_connection_phases, 'phases', None) is None:
+        _connection_phases.phases = {}
+    _connection_phases.phases[name] = milliseconds
+
+
+class TimedConnectionMixin:
+    """ urllib3 connection recording how long opening the socket took, DNS lookup included. """
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        self.connect_time = (time.perf_counter() - started) * 1000
+        _record_phase('connect', self.connect_time)
+        return sock
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    """ Also records the TLS handshake. """
+
+    def connect(self):
+        started = time.perf_counter()
+        self.connect_time = 0
+        super().connect()
+        _record_phase('tls', max((time.perf_counter() - started) * 1000 - self.connect_time, 0))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+TIMED_POOL_CLASSES = {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+def url_template(url: str, org: str) -> str:
+    """
+    The endpoint of url without the values that change from one call to another: the organisation, cluster type and
+    cluster following it are replaced by {org}, {cluster_type} and {cluster}, the IDs by {id} and the values of the
+    query string by the name of the parameter.
+    """
+    parts = urlsplit(url)
+    template = []
+    after_org = None
+    for segment in parts.path.strip('/').split('/'):
+        if after_org is None and org and segment == org:
+            after_org = 0
+            template.append('{org}')
+        elif after_org == 0:
+            after_org = 1
+            template.append('{cluster_type}')
+        elif after_org == 1:
+            after_org = 2
+            template.append('{cluster}')
+        elif _ID_SEGMENT_RE.match(segment):
+            template.append('{id}')
+        else:
+            template.append(segment)
+
+    endpoint = '/' + '/'.join(template)
+    if parts.query:
+        endpoint += '?' + '&'.join(f"{name}={{{name}}}" for name, _ in parse_qsl(parts.query, keep_blank_values=True))
+    return endpoint
+
+
+def url_cluster(url: str, org: str) -> str:
+    """ The cluster of url, the path segment two after the organisation, or None for the endpoints without one. """
+    segments = urlsplit(url).path.strip('/').split('/')
+    if org and org in segments:
+        position = segments.index(org) + 2
+        if position < len(segments):
+            return segments[position]
+    return None
+
+
+def percentile(values: list, fraction: float) -> float:
+    """ The value under which fraction of the values fall, nearest rank on the sorted values. """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(max(math.ceil(fraction * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[rank]
+
+
+def summarize(records: list, top: int = None) -> list:
+    """
+    The requests grouped by method and endpoint, the endpoints where the most time went first, with the number of
+    requests, the cumulative, median and 95th percentile total time in milliseconds and the bytes sent and received,
+    on the network and once decompressed.
+    """
+    endpoints = {}
+    for record in records:
+        endpoints.setdefault((record['method'], record['endpoint']), []).append(record)
+
+    summary = []
+    for (method, endpoint), calls in endpoints.items():
+        totals = [call['total'] for call in calls]
+        summary.append({
+            'method': method,
+            'endpoint': endpoint,
+            'count': len(calls),
+            'total': round(sum(totals), 1),
+            'p50': round(percentile(totals, 0.5), 1),
+            'p95': round(percentile(totals, 0.95), 1),
+            'bytes_out': sum(call['bytes_out'] for call in calls),
+            'bytes_in': sum(call['bytes_in'] for call in calls),
+            'bytes_out_decoded': sum(call.get('bytes_out_decoded', call['bytes_out']) for call in calls),
+            'bytes_in_decoded': sum(call.get('bytes_in_decoded', call['bytes_in']) for call in calls),
+        })
+    summary.sort(key=lambda entry: entry['total'], reverse=True)
+    return summary[:top] if top else summary
+
+
+class RequestTimings:
+    """
+    The timings of the requests sent by an AxonOps client, recorded with --profile.
+
+    Every record has the method, the endpoint (see url_template), the cluster (see url_cluster), the HTTP status
+    (None when the server couldn't be reached), the bytes sent and received on the network and the size of the bodies
+    before compression (bytes_out_decoded, bytes_in_decoded), the number of attempts and the PHASES
+    in milliseconds. Thread safe, the bulk operations send their requests from worker threads.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+
+    def add(self, record: dict):
+        with self.lock:
+            self.records.append(record)
+
+    def report_lines(self, top: int = 10) -> list:
+        """ The profile printed at the end of the run: totals, then the top endpoints by cumulative time. """
+        with self.lock:
+            records = list(self.records)
+        wall = (time.perf_counter() - self.started) * 1000
+        lines = [f"{len(records)} requests, {sum(record['total'] for record in records):.1f} ms in requests, "
+                 f"{wall:.1f} ms elapsed, {sum(record['bytes_out'] for record in records)} bytes sent "
+                 f"({sum(record['bytes_out_decoded'] for record in records)} uncompressed), "
+                 f"{sum(record['bytes_in'] for record in records)} bytes received "
+                 f"({sum(record['bytes_in_decoded'] for record in records)} uncompressed)"]
+        if not records:
+            return lines
+
+        lines.append(f"{'count':>6} {'total ms':>10} {'p50 ms':>9} {'p95 ms':>9} {'KB in':>9}  endpoint")
+        for entry in summarize(records, top):
+            lines.append(f"{entry['count']:>6} {entry['total']:>10.1f} {entry['p50']:>9.1f} {entry['p95']:>9.1f} "
+                         f"{entry['bytes_in'] / 1024:>9.1f}  {entry['method']} {entry['endpoint']}")
+        return lines
@@ -1,3 +1,12 @@
+import gzip
+
+# the compressions of the responses we can read, requests decompresses them
+ACCEPT_ENCODING = 'gzip, deflate'
+
+# request bodies smaller than this are sent as they are, compressing them saves less than it costs
+COMPRESS_MIN_SIZE = 1024
+
+
 class HTTPCodeError(Exception):
     pass
 
@@ -5,3 +14,34 @@ class HTTPCodeError(Exception):
 def remove_not_alphanumeric(s: str) -> str:
     """Remove non-alphanumeric characters from a string."""
     return ''.join(c for c in s if c.isalnum())
+
+
+def compress_body(data) -> bytes:
+    """data gzipped, or None when compressing it wouldn't make it smaller."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if not data or len(data) < COMPRESS_MIN_SIZE:
+        return None
+    compressed = gzip.compress(data, compresslevel=6)
+    return compressed if len(compressed) < len(data) else None
+
+
+def accepts_gzip(headers) -> bool:
+    """Whether the server said in the Accept-Encoding of a response that it takes gzipped bodies (RFC 7694)."""
+    value = headers.get('Accept-Encoding') if headers is not None else None
+    if not isinstance(value, str):
+        return False
+    for coding in value.split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', 'x-gzip'):
+            return params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+def received_size(response) -> int:
+    """Bytes of the response body received on the network, before requests decompressed it."""
+    tell = getattr(getattr(response, 'raw', None), 'tell', None)
+    size = tell() if callable(tell) else None
+    if isinstance(size, int) and size > 0:
+        return size
+    return len(response.content or b'')
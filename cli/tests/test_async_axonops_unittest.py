@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from axonopscli.async_axonops import AsyncAxonOps
+from axonopscli.axonops import AxonOps, HTTPCodeError
+from axonopscli.components.scheduled_repair import ScheduledRepair
+
+
+class TestAsyncAxonOps(unittest.TestCase):
+    def test_run_all_limits_concurrency_and_keeps_order(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        lock = threading.Lock()
+        in_flight = {'now': 0, 'max': 0}
+
+        def fake_do_request(url, method='GET', **kwargs):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            time.sleep(0.02)
+            with lock:
+                in_flight['now'] -= 1
+            return {'url': url}
+
+        with patch.object(client, 'do_request', side_effect=fake_do_request):
+            responses = AsyncAxonOps(client, concurrency=3).run_all([{'url': f"/api/{i}"} for i in range(12)])
+
+        self.assertEqual(responses, [{'url': f"/api/{i}"} for i in range(12)])
+        self.assertLessEqual(in_flight['max'], 3)
+        self.assertGreater(in_flight['max'], 1)
+
+    def test_run_all_returns_the_exceptions(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+
+        def fake_do_request(url, method='GET', **kwargs):
+            if url == "/api/bad":
+                raise HTTPCodeError("Call to /api/bad returned 500")
+            return {}
+
+        with patch.object(client, 'do_request', side_effect=fake_do_request):
+            responses = AsyncAxonOps(client).run_all([{'url': "/api/good"}, {'url': "/api/bad"}])
+
+        self.assertEqual(responses[0], {})
+        self.assertIsInstance(responses[1], HTTPCodeError)
+
+
+class TestScheduledRepairDeleteAll(unittest.TestCase):
+    def test_remove_all_repairs_deletes_every_repair(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        args = SimpleNamespace(org="acme", cluster="prod", v=0, concurrency=5, ratelimit=0)
+        repairs = {'ScheduledRepairs': [{'ID': f"id-{i}", 'Params': [{}]} for i in range(20)]}
+        deleted = []
+
+        def fake_do_request(url, method='GET', **kwargs):
+            if method == 'GET':
+                return repairs
+            deleted.append(url.split("?id=")[1])
+            return {}
+
+        with patch.object(client, 'do_request', side_effect=fake_do_request):
+            ScheduledRepair(client, args).remove_all_repairs_from_axonops()
+
+        self.assertEqual(sorted(deleted), sorted(f"id-{i}" for i in range(20)))
+
+
+if __name__ == "__main__":
+    unittest.main()
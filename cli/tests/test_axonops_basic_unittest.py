@@ -1,4 +1,5 @@
 import unittest
+from unittest.mock import MagicMock, patch
 
 from axonopscli.axonops import AxonOps
 
@@ -20,6 +21,18 @@ class TestAxonOpsBasics(unittest.TestCase):
         client = AxonOps(org_name="acme", base_url="https://example.com/")
         self.assertEqual(client.dash_url(), "https://example.com")
 
+    def test_requests_share_a_pooled_session(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", pool_size=3)
+        self.assertEqual(client.session.get_adapter("https://example.com")._pool_maxsize, 3)
+
+        response = MagicMock(status_code=200, text='{"ok": true}')
+        response.json.return_value = {"ok": True}
+        with patch.object(client.session, 'request', return_value=response) as mocked_request:
+            client.do_request("/api/a")
+            client.do_request("/api/b")
+
+        self.assertEqual(mocked_request.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,87 @@
+import gzip
+import json
+import os
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from axonopscli.axonops import AxonOps
+from axonopscli.utils import COMPRESS_MIN_SIZE, accepts_gzip, compress_body
+
+DOCUMENT = {'dashboards': [{'name': f"Dashboard {i}", 'panels': ['chart'] * 20} for i in range(20)]}
+
+
+def response(status_code=200, headers=None, wire_size=None):
+    mocked = MagicMock(status_code=status_code, text='{"ok": true}', content=b'{"ok": true}', headers=headers or {},
+                       elapsed=timedelta(milliseconds=5))
+    mocked.json.return_value = {"ok": True}
+    mocked.raw.tell.return_value = wire_size if wire_size is not None else len(mocked.content)
+    return mocked
+
+
+class TestCompression(unittest.TestCase):
+    def test_accepts_gzip(self):
+        self.assertTrue(accepts_gzip({'Accept-Encoding': 'gzip'}))
+        self.assertTrue(accepts_gzip({'Accept-Encoding': 'br, GZIP;q=0.5'}))
+        self.assertFalse(accepts_gzip({'Accept-Encoding': 'gzip;q=0'}))
+        self.assertFalse(accepts_gzip({'Accept-Encoding': 'deflate'}))
+        self.assertFalse(accepts_gzip({}))
+
+    def test_compress_body(self):
+        data = json.dumps(DOCUMENT).encode('utf-8')
+        self.assertEqual(gzip.decompress(compress_body(data)), data)
+        self.assertIsNone(compress_body(b'{"a": 1}'))
+        self.assertIsNone(compress_body(None))
+        # random bytes don't get smaller
+        self.assertIsNone(compress_body(os.urandom(COMPRESS_MIN_SIZE * 2)))
+
+    def test_body_gzipped_once_the_server_takes_it(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", compress=True)
+        with patch.object(client.session, 'request',
+                          side_effect=[response(headers={'Accept-Encoding': 'gzip'}), response()]) as mocked_request:
+            client.do_request("/api/v1/dashboardtemplate/acme/cassandra/prod", method='PUT', json_data=DOCUMENT)
+            client.do_request("/api/v1/dashboardtemplate/acme/cassandra/prod", method='PUT', json_data=DOCUMENT)
+
+        first, second = mocked_request.call_args_list
+        self.assertNotIn('Content-Encoding', first.kwargs['headers'])
+        self.assertEqual(first.kwargs['headers']['Accept-Encoding'], 'gzip, deflate')
+        self.assertEqual(second.kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(second.kwargs['data'])), DOCUMENT)
+
+    def test_body_sent_as_it_is_without_compress(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        with patch.object(client.session, 'request',
+                          return_value=response(headers={'Accept-Encoding': 'gzip'})) as mocked_request:
+            client.do_request("/api/a", method='PUT', json_data=DOCUMENT)
+            client.do_request("/api/a", method='PUT', json_data=DOCUMENT)
+
+        self.assertNotIn('Content-Encoding', mocked_request.call_args.kwargs['headers'])
+
+    def test_refused_gzip_body_is_sent_again_as_it_is(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", compress=True)
+        client.server_accepts_gzip = True
+        with patch.object(client.session, 'request', side_effect=[response(415), response()]) as mocked_request:
+            self.assertEqual(client.do_request("/api/a", method='PUT', json_data=DOCUMENT), {"ok": True})
+
+        first, second = mocked_request.call_args_list
+        self.assertEqual(first.kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Encoding', second.kwargs['headers'])
+        self.assertEqual(json.loads(second.kwargs['data']), DOCUMENT)
+        self.assertFalse(client.server_accepts_gzip)
+
+    def test_profile_records_the_bytes_on_the_network(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", compress=True, profile=True)
+        client.server_accepts_gzip = True
+        data = json.dumps(DOCUMENT).encode('utf-8')
+        with patch.object(client.session, 'request', return_value=response(wire_size=7)):
+            client.do_request("/api/a", method='PUT', json_data=DOCUMENT)
+
+        record = client.timings.records[0]
+        self.assertEqual(record['bytes_out'], len(compress_body(data)))
+        self.assertEqual(record['bytes_out_decoded'], len(data))
+        self.assertEqual((record['bytes_in'], record['bytes_in_decoded']), (7, 12))
+        self.assertIn(f"({len(data)} uncompressed)", client.timings.report_lines()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
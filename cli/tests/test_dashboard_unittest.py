@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from axonopscli.axonops import AxonOps
+from axonopscli.components.dashboard import Dashboard
+
+
+def make_dashboard(client, dashboards):
+    args = SimpleNamespace(org="acme", cluster="prod", v=0)
+    dashboard = Dashboard(client, args)
+    dashboard.dashboard_data = [dict(d) for d in dashboards]
+    return dashboard
+
+
+class TestDashboardExportImport(unittest.TestCase):
+    def setUp(self):
+        self.client = AxonOps(org_name="acme", base_url="https://example.com")
+        self.existing = [{'name': 'Overview', 'panels': []}, {'name': 'System', 'panels': []}]
+
+    def test_export_to_archive_and_read_it_back(self):
+        dashboard = make_dashboard(self.client, self.existing)
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = os.path.join(tmp, 'dashboards.jsonl')
+            dashboard.export_dashboard(archive)
+
+            with open(archive) as f:
+                self.assertEqual(len(f.readlines()), 2)
+            self.assertEqual(list(Dashboard.read_dashboards(archive)), self.existing)
+
+    def test_import_directory_with_a_single_put(self):
+        dashboard = make_dashboard(self.client, self.existing)
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(5):
+                with open(os.path.join(tmp, f"New{i}_dashboard.json"), 'w') as f:
+                    json.dump({'name': f"New{i}", 'panels': []}, f)
+            with open(os.path.join(tmp, 'more.jsonl'), 'w') as f:
+                f.write(json.dumps({'name': 'Overview', 'panels': [{'title': 'new'}]}) + '\n')
+
+            with patch.object(self.client, 'do_request', return_value={}) as do_request:
+                dashboard.import_dashboard(tmp, overwrite=True)
+
+        self.assertEqual(do_request.call_count, 1)
+        sent = do_request.call_args.kwargs['json_data']['dashboards']
+        # the overwritten dashboard keeps its position, the new ones are appended
+        self.assertEqual([d['name'] for d in sent], ['Overview', 'System'] + [f"New{i}" for i in range(5)])
+        self.assertEqual(sent[0]['panels'], [{'title': 'new'}])
+
+    def test_import_without_overwrite_sends_nothing(self):
+        dashboard = make_dashboard(self.client, self.existing)
+        with tempfile.TemporaryDirectory() as tmp:
+            archive = os.path.join(tmp, 'dashboards.jsonl')
+            with open(archive, 'w') as f:
+                f.write(json.dumps({'name': 'New', 'panels': []}) + '\n')
+                f.write(json.dumps({'name': 'System', 'panels': []}) + '\n')
+
+            with patch.object(self.client, 'do_request', return_value={}) as do_request:
+                dashboard.import_dashboard(archive)
+
+        do_request.assert_not_called()
+
+    def test_import_at_position(self):
+        dashboard = make_dashboard(self.client, self.existing)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'Overview_dashboard.json')
+            with open(path, 'w') as f:
+                json.dump({'name': 'Overview', 'panels': []}, f)
+
+            with patch.object(self.client, 'do_request', return_value={}) as do_request:
+                dashboard.import_dashboard(path, position=-1, overwrite=True)
+
+        sent = do_request.call_args.kwargs['json_data']['dashboards']
+        self.assertEqual([d['name'] for d in sent], ['System', 'Overview'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,19 @@
+import os
+import sys
+import threading
 import unittest
 from unittest.mock import patch
 
 from axonopscli.axonops import AxonOps
+from axonopscli.utils import HTTPCodeError
+
+SIMULATOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'tests', 'simulator')
 
 
 class TestGetJWT(unittest.TestCase):
     def test_get_jwt_returns_cached_token_without_calling_do_request(self):
-        client = AxonOps(org_name="acme", base_url="https://example.com", username="u", password="p")
+        with patch.object(AxonOps, 'do_request', return_value={"token": "first-token"}):
+            client = AxonOps(org_name="acme", base_url="https://example.com", username="u", password="p")
         client.jwt = "cached-token"
 
         with patch.object(AxonOps, 'do_request') as mocked_do_request:
@@ -16,32 +23,69 @@ class TestGetJWT(unittest.TestCase):
         mocked_do_request.assert_not_called()
 
     def test_get_jwt_calls_do_request_and_caches_token(self):
-        client = AxonOps(org_name="acme", base_url="https://example.com", username="u", password="p")
-        client.jwt = ""
-
         def fake_do_request(url, json_data=None, method=None):
             # Validate inputs
             self.assertEqual(url, "/api/login")
             self.assertEqual(method, 'POST')
             self.assertEqual(json_data, {"username": "u", "password": "p"})
-            return {"token": "new-token"}, None
+            return {"token": "new-token"}
 
         with patch.object(AxonOps, 'do_request', side_effect=fake_do_request):
+            client = AxonOps(org_name="acme", base_url="https://example.com", username="u", password="p")
+            client.jwt = ""
             token = client.get_jwt()
 
         self.assertEqual(token, "new-token")
         self.assertEqual(client.jwt, "new-token")
         self.assertEqual(client.errors, [])
 
-    def test_get_jwt_appends_error_if_return_error_present(self):
-        client = AxonOps(org_name="acme", base_url="https://example.com", username="u", password="p")
-        client.jwt = ""
+    def test_get_jwt_appends_error_if_the_login_fails(self):
+        with patch.object(AxonOps, 'do_request', side_effect=HTTPCodeError("Call to /api/login returned 401")):
+            client = AxonOps(org_name="acme", base_url="https://example.com", username="u", password="p")
 
-        with patch.object(AxonOps, 'do_request', return_value=({"token": "t"}, "some-error")):
-            token = client.get_jwt()
+        self.assertEqual(client.jwt, "")
+        self.assertEqual(len(client.errors), 1)
+        self.assertIn("returned 401", client.errors[0])
+
+    def test_get_jwt_appends_error_if_there_is_no_token(self):
+        with patch.object(AxonOps, 'do_request', return_value={}):
+            client = AxonOps(org_name="acme", base_url="https://example.com", username="u", password="p")
+
+        self.assertEqual(client.jwt, "")
+        self.assertIn("invalid result", client.errors[0])
+
+
+@unittest.skipUnless(os.path.exists(os.path.join(SIMULATOR_DIR, 'axonops_simulator.py')), "no simulator")
+class TestLoginAgainstSimulator(unittest.TestCase):
+    def setUp(self):
+        sys.path.insert(0, SIMULATOR_DIR)
+        try:
+            import axonops_simulator
+        finally:
+            sys.path.remove(SIMULATOR_DIR)
+        options = axonops_simulator.parse_args(['--port', '0', '--require-auth', '--username', 'admin',
+                                                '--password', 'secret'])
+        self.server = axonops_simulator.make_server(options)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_login_and_use_the_token(self):
+        client = AxonOps(org_name="testorg", base_url=self.url, username="admin", password="secret")
+
+        self.assertEqual(client.errors, [])
+        self.assertTrue(client.jwt.startswith("sim-"))
+        # the simulator answers 401 to the requests without a valid JWT
+        self.assertEqual(len(client.do_request("/api/v1/nodes/testorg/cassandra/prod")), 3)
+
+    def test_wrong_password(self):
+        client = AxonOps(org_name="testorg", base_url=self.url, username="admin", password="wrong")
 
-        self.assertEqual(token, "t")
-        self.assertIn("some-error", client.errors)
+        self.assertEqual(client.jwt, "")
+        self.assertIn("returned 401", client.errors[0])
 
 
 if __name__ == "__main__":
@@ -19,7 +19,7 @@ class TestHTTPCodeError(unittest.TestCase):
         def fake_request(method, url, headers=None, data=None):
             return DummyResponse(status_code=500)
 
-        with patch("requests.request", side_effect=fake_request):
+        with patch("requests.Session.request", side_effect=fake_request):
             client = AxonOps(org_name="acme", base_url="https://example.com")
 
             # Act + Assert
@@ -34,7 +34,7 @@ class TestHTTPCodeError(unittest.TestCase):
         def fake_request(method, url, headers=None, data=None):
             return DummyResponse(status_code=200, json_payload={"ok": True})
 
-        with patch("requests.request", side_effect=fake_request):
+        with patch("requests.Session.request", side_effect=fake_request):
             client = AxonOps(org_name="acme", base_url="https://example.com")
 
             # Act + Assert
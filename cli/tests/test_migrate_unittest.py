@@ -0,0 +1,95 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from axonopscli.axonops import AxonOps, HTTPCodeError
+from axonopscli.components.migrate import Migrate, parse_widget_url
+
+SOURCE = {
+    'dashboardtemplate': {'dashboards': [{'name': 'Overview', 'uuid': 'd-src',
+                                          'panels': [{'title': 'CPU', 'uuid': 'c-src', 'type': 'line-chart'}]}]},
+    'alert-rules': {'metricrules': [{
+        'id': 'a-src', 'alert': 'CPU high', 'correlationId': 'c-src',
+        'annotations': {'widget_url': '/acme/cassandra/src/performance/d-src?uuid=c-src&dc=eu'},
+        'integrations': {'Routing': [{'ID': 'i-slack', 'Severity': 'error'}, {'ID': 'i-mail', 'Severity': 'info'}]},
+    }]},
+    'integrations': {
+        'Definitions': [{'ID': 'i-slack', 'Type': 'slack', 'Params': {'name': 'ops'}},
+                        {'ID': 'i-mail', 'Type': 'smtp', 'Params': {'name': 'mail'}}],
+        'Routings': [{'Type': 'global', 'Routing': [{'ID': 'i-slack', 'Severity': 'error'}]}],
+    },
+    'healthchecks': {'tcpchecks': [{'id': 't-src', 'name': 'cql', 'tcp': 'localhost:9042'}]},
+}
+
+
+def target(cluster):
+    return {
+        'dashboardtemplate': {'dashboards': [{'name': 'Overview', 'uuid': 'd-' + cluster,
+                                              'panels': [{'title': 'CPU', 'uuid': 'c-' + cluster}]}]},
+        'alert-rules': {'metricrules': []},
+        'integrations': {'Definitions': [{'ID': 'slack-' + cluster, 'Type': 'slack', 'Params': {'name': 'ops'}}],
+                         'Routings': []},
+        'healthchecks': {},
+    }
+
+
+class TestMigrate(unittest.TestCase):
+    def setUp(self):
+        self.client = AxonOps(org_name="acme", base_url="https://example.com")
+        self.args = SimpleNamespace(org="acme", cluster="src", v=0, concurrency=4, ratelimit=0)
+        self.states = {'src': SOURCE, 't1': target('t1'), 't2': target('t2')}
+        self.reads = []
+        self.writes = []
+
+    def fake_do_request(self, url, method='GET', json_data=None, **kwargs):
+        parts = url.split('?')[0].split('/')
+        if method == 'GET':
+            self.reads.append(url)
+            if parts[6] == 'broken':
+                raise HTTPCodeError(f"Call to {url} returned 500")
+            return self.states[parts[6]][parts[3]]
+        self.writes.append((method, url, json_data))
+        return {}
+
+    def test_parse_widget_url(self):
+        self.assertEqual(parse_widget_url('/acme/cassandra/prod/performance/d1?uuid=c1&dc=eu&rack=r1'),
+                         ('d1', 'c1', 'dc=eu&rack=r1'))
+        self.assertEqual(parse_widget_url('/acme/cassandra/prod/performance/d1?uuid=c1'), ('d1', 'c1', None))
+        self.assertEqual(parse_widget_url(''), (None, None, None))
+
+    def test_source_read_once_and_references_rewritten(self):
+        with patch.object(self.client, 'do_request', side_effect=self.fake_do_request):
+            results = Migrate(self.client, self.args).migrate(['t1', 't2'])
+
+        self.assertEqual(len([url for url in self.reads if '/src' in url]), 4)
+        self.assertEqual([result['errors'] for result in results.values()], [[], []])
+
+        rule = next(data for method, url, data in self.writes
+                    if method == 'POST' and url == '/api/v1/alert-rules/acme/cassandra/t1')
+        self.assertEqual(rule['annotations']['widget_url'], '/acme/cassandra/t1/performance/d-t1?uuid=c-t1&dc=eu')
+        self.assertEqual(rule['correlationId'], 'c-t1')
+        self.assertEqual(rule['integrations']['Routing'], [{'ID': 'slack-t1', 'Severity': 'error'}])
+        self.assertIn(('POST', '/api/v1/integrations-routing/acme/cassandra/t2/global/error/slack-t2', None),
+                      self.writes)
+        self.assertEqual(results['t1']['plan']['skipped'],
+                         ['alert rule CPU high: integration i-mail not found, route dropped'])
+
+        # the dashboard of the target keeps its uuids
+        dashboards = next(data for method, url, data in self.writes
+                          if method == 'PUT' and url.startswith('/api/v1/dashboardtemplate/acme/cassandra/t1'))
+        self.assertEqual(dashboards['dashboards'][0]['uuid'], 'd-t1')
+        self.assertEqual(dashboards['dashboards'][0]['panels'],
+                         [{'title': 'CPU', 'uuid': 'c-t1', 'type': 'line-chart'}])
+
+    def test_dry_run_and_failed_target(self):
+        with patch.object(self.client, 'do_request', side_effect=self.fake_do_request):
+            results = Migrate(self.client, self.args).migrate(['t1', 'broken'], ['dashboards'], dry_run=True)
+
+        self.assertEqual(self.writes, [])
+        self.assertEqual(results['t1']['plan']['actions'], {'dashboards': [('Overview', 'update')]})
+        self.assertIsNone(results['broken']['plan'])
+        self.assertIsInstance(results['broken']['errors'][0], HTTPCodeError)
+
+
+if __name__ == "__main__":
+    unittest.main()
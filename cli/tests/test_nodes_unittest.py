@@ -0,0 +1,58 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from axonopscli.axonops import AxonOps
+from axonopscli.components.nodes import Nodes
+from axonopscli.node_directory import NodeDirectory
+
+NODES = [
+    {'host_id': 'id-1', 'HostIP': '10.0.0.1', 'Details': {'human_readable_identifier': 'cass-1'}},
+    {'host_id': 'id-2', 'HostIP': '10.0.0.2', 'Details': {}},
+    {'host_id': 'id-3', 'HostIP': '10.0.0.3', 'Details': {'human_readable_identifier': '10.0.0.1'}},
+]
+
+
+class TestNodeDirectory(unittest.TestCase):
+    def test_resolve_by_hostname_ip_and_host_id(self):
+        directory = NodeDirectory(NODES)
+        ids, unresolved = directory.resolve_ids(['cass-1', '10.0.0.2', 'id-3', 'missing'])
+
+        self.assertEqual(ids, ['id-1', 'id-2', 'id-3'])
+        self.assertEqual(unresolved, ['missing'])
+
+    def test_first_node_wins(self):
+        # 10.0.0.1 is the IP of the first node and the hostname of the third one
+        self.assertEqual(NodeDirectory(NODES).find('10.0.0.1')['host_id'], 'id-1')
+
+    def test_display_name(self):
+        directory = NodeDirectory(NODES)
+        self.assertEqual(directory.display_name('id-1'), 'cass-1')
+        self.assertEqual(directory.display_name('id-2'), '10.0.0.2')
+        self.assertEqual(directory.display_name('unknown'), 'unknown')
+
+
+class TestNodes(unittest.TestCase):
+    def test_nodes_are_fetched_once_per_client(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        args = SimpleNamespace(org="acme", cluster="prod", v=0)
+
+        with patch.object(client, 'do_request', return_value=NODES) as do_request:
+            nodes = Nodes(client, args)
+            self.assertEqual(nodes.print_by_id('id-1'), 'cass-1')
+            self.assertEqual(Nodes(client, args).print_by_id('id-2'), '10.0.0.2')
+
+        self.assertEqual(do_request.call_count, 1)
+
+    def test_no_nodes(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        args = SimpleNamespace(org="acme", cluster="prod", v=0)
+
+        with patch.object(client, 'do_request', return_value=[]):
+            nodes = Nodes(client, args)
+            self.assertEqual(nodes.print_by_id('id-1'), 'id-1')
+            self.assertEqual(str(nodes), "No nodes found")
+
+
+if __name__ == "__main__":
+    unittest.main()
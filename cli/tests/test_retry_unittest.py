@@ -0,0 +1,98 @@
+import unittest
+from email.utils import formatdate
+import time
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from axonopscli.axonops import AxonOps, HTTPCodeError
+from axonopscli.retry import RetryPolicy, TokenBucket, parse_retry_after
+
+
+def response(status_code, headers=None):
+    mocked = MagicMock(status_code=status_code, text='{"ok": true}', headers=headers or {})
+    mocked.json.return_value = {"ok": True}
+    return mocked
+
+
+class TestRetry(unittest.TestCase):
+    def setUp(self):
+        self.client = AxonOps(org_name="acme", base_url="https://example.com")
+        sleep = patch('axonopscli.axonops.time.sleep')
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_busy_server_is_retried(self):
+        with patch.object(self.client.session, 'request',
+                          side_effect=[response(503), response(502), response(200)]) as mocked_request:
+            self.assertEqual(self.client.do_request("/api/a"), {"ok": True})
+
+        self.assertEqual(mocked_request.call_count, 3)
+        self.assertEqual(self.client.session.get_adapter("https://example.com").timeout, 30)
+
+    def test_gives_up_after_the_retries(self):
+        with patch.object(self.client.session, 'request', return_value=response(503)) as mocked_request:
+            with self.assertRaises(HTTPCodeError):
+                self.client.do_request("/api/a")
+
+        self.assertEqual(mocked_request.call_count, 4)
+
+    def test_post_is_only_retried_on_429(self):
+        with patch.object(self.client.session, 'request', return_value=response(503)) as mocked_request:
+            with self.assertRaises(HTTPCodeError):
+                self.client.do_request("/api/a", method='POST', json_data={})
+        self.assertEqual(mocked_request.call_count, 1)
+
+        with patch.object(self.client.session, 'request',
+                          side_effect=[response(429, {'Retry-After': '2'}), response(200)]) as mocked_request:
+            self.assertEqual(self.client.do_request("/api/a", method='POST', json_data={}), {"ok": True})
+        self.assertEqual(mocked_request.call_count, 2)
+        self.sleep.assert_any_call(2.0)
+        # the other requests of the client wait as well
+        self.assertGreater(self.client.rate_limiter.reserve(), 1.5)
+
+    def test_connection_errors_are_retried(self):
+        with patch.object(self.client.session, 'request',
+                          side_effect=[requests.ConnectionError(), response(200)]) as mocked_request:
+            self.assertEqual(self.client.do_request("/api/a", method='DELETE'), {"ok": True})
+        self.assertEqual(mocked_request.call_count, 2)
+
+        with patch.object(self.client.session, 'request', side_effect=requests.Timeout()):
+            with self.assertRaises(requests.Timeout):
+                self.client.do_request("/api/a", method='POST', json_data={})
+
+    def test_backoff_doubles_with_jitter(self):
+        policy = RetryPolicy(retries=5, backoff=0.5, max_backoff=3)
+        for attempt, ceiling in enumerate([0.5, 1, 2, 3, 3]):
+            delays = [policy.delay(attempt) for _ in range(50)]
+            self.assertTrue(all(0 <= delay <= ceiling for delay in delays))
+            self.assertGreater(len(set(delays)), 1)
+        self.assertEqual(policy.delay(0, {'Retry-After': '60'}), 3)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after({'Retry-After': '7'}), 7.0)
+        self.assertAlmostEqual(parse_retry_after({'Retry-After': formatdate(time.time() + 10, usegmt=True)}), 10,
+                               delta=1.5)
+        self.assertIsNone(parse_retry_after({'Retry-After': 'soon'}))
+        self.assertIsNone(parse_retry_after({}))
+
+    def test_token_bucket_limits_the_rate(self):
+        bucket = TokenBucket(rate=10, capacity=1)
+        waits = [bucket.reserve() for _ in range(3)]
+
+        self.assertEqual(waits[0], 0.0)
+        self.assertAlmostEqual(waits[1], 0.1, delta=0.02)
+        self.assertAlmostEqual(waits[2], 0.2, delta=0.02)
+
+    def test_token_bucket_without_rate_never_waits(self):
+        bucket = TokenBucket(rate=0)
+        self.assertEqual([bucket.reserve() for _ in range(100)], [0.0] * 100)
+
+    def test_token_bucket_pause(self):
+        bucket = TokenBucket(rate=0)
+        bucket.pause(5)
+        self.assertAlmostEqual(bucket.reserve(), 5, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import os
+import unittest
+
+from axonopscli import collection, json_stream, node_directory, retry, single_flight
+
+MODULE_UTILS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'plugins', 'module_utils')
+
+# the CLI modules re-exporting the pure Python module utils of the collection
+SHARED = {
+    json_stream: 'axonops_json.py',
+    node_directory: 'axonops_nodes.py',
+    retry: 'axonops_retry.py',
+    single_flight: 'axonops_flight.py',
+}
+
+
+class TestSharedCode(unittest.TestCase):
+    def test_the_collection_code_is_used(self):
+        for cli_module, collection_file in SHARED.items():
+            module_utils = collection.load_module_utils(collection_file[:-3])
+            self.assertTrue(os.path.samefile(module_utils.__file__, os.path.join(MODULE_UTILS_DIR, collection_file)))
+            for name, value in vars(module_utils).items():
+                if not name.startswith('_') and getattr(value, '__module__', None) == module_utils.__name__:
+                    self.assertIs(getattr(cli_module, name, None), value, f"{cli_module.__name__}.{name}")
+
+    def test_modules_are_loaded_once(self):
+        self.assertIs(collection.load_module_utils('axonops_nodes'), collection.load_module_utils('axonops_nodes'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from axonopscli.async_axonops import AsyncAxonOps
+from axonopscli.axonops import AxonOps
+from axonopscli.single_flight import SingleFlight
+from axonopscli.utils import HTTPCodeError
+
+
+def slow_response(status_code=200):
+    def request(method, url, headers=None, data=None):
+        time.sleep(0.1)
+        mocked = MagicMock(status_code=status_code, text='{"ok": true}', content=b'{"ok": true}', headers={},
+                           elapsed=timedelta(milliseconds=100))
+        mocked.json.return_value = {"ok": True}
+        return mocked
+    return request
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_gets_share_one_request(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        with patch.object(client.session, 'request', side_effect=slow_response()) as mocked_request:
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                responses = list(executor.map(lambda _: client.do_request("/api/v1/integrations/acme/cassandra/prod"),
+                                              range(5)))
+
+        self.assertEqual(mocked_request.call_count, 1)
+        self.assertEqual(responses, [{"ok": True}] * 5)
+        self.assertTrue(all(response is responses[0] for response in responses))
+        self.assertEqual(client.in_flight._flights, {})
+
+    def test_the_error_is_shared(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", retries=0)
+
+        def get(_):
+            try:
+                return client.do_request("/api/a")
+            except HTTPCodeError as e:
+                return e
+
+        with patch.object(client.session, 'request', side_effect=slow_response(500)) as mocked_request:
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                responses = list(executor.map(get, range(3)))
+
+        self.assertEqual(mocked_request.call_count, 1)
+        self.assertTrue(all(isinstance(response, HTTPCodeError) for response in responses))
+
+    def test_writes_and_later_gets_are_sent(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        with patch.object(client.session, 'request', side_effect=slow_response()) as mocked_request:
+            client.do_request("/api/a")
+            client.do_request("/api/a", method='PUT', json_data={})
+            client.do_request("/api/a")
+
+        self.assertEqual(mocked_request.call_count, 3)
+
+    def test_forget_detaches_the_calls_in_flight_of_the_resource(self):
+        single_flight = SingleFlight()
+        key = ("/api/v1/alert-rules/acme/cassandra/prod", (200,))
+        started = threading.Event()
+        calls = []
+
+        def call(value):
+            calls.append(value)
+            started.set()
+            time.sleep(0.1)
+            return value
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            first = executor.submit(single_flight.do, key, lambda: call('before'))
+            started.wait()
+            # a write to another resource doesn't change what the alert rules GET reads
+            single_flight.forget("/api/v1/dashboardtemplate/acme/cassandra/prod")
+            shared = executor.submit(single_flight.do, key, lambda: call('shared'))
+            time.sleep(0.02)
+            single_flight.forget("/api/v1/alert-rules/acme/cassandra/prod/123")
+            second = executor.submit(single_flight.do, key, lambda: call('after'))
+
+        self.assertEqual((first.result(), shared.result(), second.result()),
+                         (('before', False), ('before', True), ('after', False)))
+        self.assertEqual(calls, ['before', 'after'])
+
+    def test_async_gets_of_the_same_url_are_awaited_once(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+
+        def fake_do_request(url, method='GET', **kwargs):
+            time.sleep(0.05)
+            return {'url': url}
+
+        requests = [{'url': "/api/a"}] * 4 + [{'url': "/api/b"}, {'url': "/api/a", 'method': 'DELETE'}]
+        with patch.object(client, 'do_request', side_effect=fake_do_request) as do_request:
+            responses = AsyncAxonOps(client, concurrency=2).run_all(requests)
+
+        self.assertEqual(responses, [{'url': "/api/a"}] * 4 + [{'url': "/api/b"}, {'url': "/api/a"}])
+        self.assertEqual(do_request.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from axonopscli.axonops import AxonOps
+from axonopscli.components.dashboard import Dashboard
+from axonopscli.components.nodes import Nodes
+from axonopscli.json_stream import JsonStreamError, iter_json_items
+from axonopscli.utils import HTTPCodeError
+
+DOCUMENT = {
+    'version': 2,
+    'filters': [{'name': 'dc', 'values': ['dc1', 'dc2']}],
+    'dashboards': [{'name': f"Dashboard {i}", 'uuid': f"u-{i}", 'threshold': i * 1.5e3,
+                    'panels': [{'title': f"Chart {i}.{j} é \"q\"", 'type': 'line-chart'} for j in range(3)]}
+                   for i in range(10)],
+    'after': {'ignored': True},
+}
+
+
+def split(data: bytes, size: int) -> list:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def streamed(document, status_code=200):
+    body = json.dumps(document).encode('utf-8')
+    mocked = MagicMock(status_code=status_code, headers={}, elapsed=timedelta(milliseconds=5))
+    mocked.iter_content.side_effect = lambda size: iter(split(body, 7))
+    mocked.raw.tell.return_value = len(body) // 4
+    return mocked
+
+
+class TestJsonStream(unittest.TestCase):
+    def test_items_are_the_same_whatever_the_chunks(self):
+        data = json.dumps(DOCUMENT).encode('utf-8')
+        for size in (1, 2, 3, 7, 64, len(data)):
+            self.assertEqual(list(iter_json_items(split(data, size), ('dashboards',))), DOCUMENT['dashboards'])
+
+    def test_top_level_array(self):
+        self.assertEqual(list(iter_json_items([b'[1, 2.5', b'e3, "a", null, [] ,{}]'])), [1, 2.5e3, 'a', None, [], {}])
+
+    def test_missing_or_null(self):
+        self.assertEqual(list(iter_json_items([b'{"other": [1]}'], ('dashboards',))), [])
+        self.assertEqual(list(iter_json_items([b'{"dashboards": null}'], ('dashboards',))), [])
+        self.assertEqual(list(iter_json_items([b'null'])), [])
+
+    def test_invalid_documents(self):
+        for document in (b'{"dashboards": {}}', b'[1, 2', b'[1 2]', b'{"a" 1}', b''):
+            with self.assertRaises(ValueError):
+                list(iter_json_items([document], ('dashboards',) if document.startswith(b'{') else ()))
+        with self.assertRaises(JsonStreamError):
+            list(iter_json_items([b'{"dashboards": 3}'], ('dashboards',)))
+
+
+class TestStreamedRequests(unittest.TestCase):
+    def test_items_read_from_the_stream(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", stream=True, profile=True)
+        with patch.object(client.session, 'request', return_value=streamed(DOCUMENT)) as mocked_request:
+            items = client.iter_items("/api/v1/dashboardtemplate/acme/cassandra/prod", ('dashboards',))
+            self.assertEqual([dashboard['name'] for dashboard in items],
+                             [dashboard['name'] for dashboard in DOCUMENT['dashboards']])
+
+        self.assertTrue(mocked_request.call_args.kwargs['stream'])
+        mocked_request.return_value.close.assert_called()
+        record = client.timings.records[0]
+        size = len(json.dumps(DOCUMENT).encode('utf-8'))
+        self.assertEqual((record['bytes_in'], record['bytes_in_decoded']), (size // 4, size))
+
+    def test_error_status(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", stream=True, retries=0)
+        with patch.object(client.session, 'request', return_value=streamed({}, status_code=404)):
+            with self.assertRaises(HTTPCodeError):
+                client.iter_items("/api/a")
+
+    def test_without_stream_the_document_is_read_whole(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com")
+        with patch.object(client, 'do_request', return_value=DOCUMENT):
+            self.assertEqual(list(client.iter_items("/api/a", ('dashboards',))), DOCUMENT['dashboards'])
+        with patch.object(client, 'do_request', return_value={}):
+            self.assertEqual(list(client.iter_items("/api/a", ('dashboards',))), [])
+
+    def test_export_stops_reading_at_the_dashboard_asked(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", stream=True)
+        dashboard = Dashboard(client, SimpleNamespace(org="acme", cluster="prod", v=0))
+        read = []
+
+        def items(url, path):
+            for item in DOCUMENT['dashboards']:
+                read.append(item['name'])
+                yield item
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(client, 'iter_items', side_effect=items):
+            archive = os.path.join(tmp, 'dashboards.jsonl')
+            dashboard.export_dashboard(archive, 'Dashboard 2')
+            with open(archive) as f:
+                self.assertEqual([json.loads(line) for line in f], [DOCUMENT['dashboards'][2]])
+        self.assertEqual(read, ['Dashboard 0', 'Dashboard 1', 'Dashboard 2'])
+
+    def test_nodes_keep_the_lookup_fields(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", stream=True)
+        nodes = [{'host_id': 'id-1', 'HostIP': '10.0.0.1', 'Details': {'human_readable_identifier': 'cass-1',
+                                                                       'comp_os_version': 'x' * 1000}}]
+        with patch.object(client.session, 'request', return_value=streamed(nodes)):
+            directory = Nodes(client, SimpleNamespace(org="acme", cluster="prod", v=0)).directory
+
+        self.assertEqual(directory.nodes, [{'host_id': 'id-1', 'HostIP': '10.0.0.1',
+                                            'Details': {'human_readable_identifier': 'cass-1'}}])
+        self.assertEqual(directory.resolve_ids(['cass-1', '10.0.0.1']), (['id-1', 'id-1'], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+from axonopscli.axonops import AxonOps
+from axonopscli.timings import TimedHTTPSConnectionPool, percentile, summarize, url_template
+
+
+class TestTimings(unittest.TestCase):
+    def test_url_template(self):
+        self.assertEqual(url_template("/api/v1/dashboardtemplate/acme/cassandra/prod?dashver=2.0", "acme"),
+                         "/api/v1/dashboardtemplate/{org}/{cluster_type}/{cluster}?dashver={dashver}")
+        self.assertEqual(url_template("/api/v1/silenceWindow/acme/cassandra/prod/"
+                                      "0b8e2f6c-2a41-4b5e-9d1e-1f3f0c2b7a11", "acme"),
+                         "/api/v1/silenceWindow/{org}/{cluster_type}/{cluster}/{id}")
+        self.assertEqual(url_template("/api/login", "acme"), "/api/login")
+
+    def test_percentile(self):
+        values = list(range(1, 21))
+        self.assertEqual(percentile(values, 0.5), 10)
+        self.assertEqual(percentile(values, 0.95), 19)
+        self.assertEqual(percentile([7], 0.95), 7)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+    def test_summarize_orders_by_cumulative_time(self):
+        records = [{'method': 'GET', 'endpoint': '/a', 'total': 5, 'bytes_out': 0, 'bytes_in': 10},
+                   {'method': 'GET', 'endpoint': '/b', 'total': 3, 'bytes_out': 0, 'bytes_in': 1},
+                   {'method': 'GET', 'endpoint': '/b', 'total': 4, 'bytes_out': 0, 'bytes_in': 1}]
+        summary = summarize(records)
+        self.assertEqual([(entry['endpoint'], entry['count'], entry['total']) for entry in summary],
+                         [('/b', 2, 7), ('/a', 1, 5)])
+        self.assertEqual(summarize(records, top=1)[0]['endpoint'], '/b')
+
+    def test_profile_records_the_requests(self):
+        client = AxonOps(org_name="acme", base_url="https://example.com", profile=True)
+        self.assertIs(client.session.get_adapter("https://example.com").poolmanager.pool_classes_by_scheme['https'],
+                      TimedHTTPSConnectionPool)
+
+        response = MagicMock(status_code=200, text='{"ok": true}', content=b'{"ok": true}',
+                             elapsed=timedelta(milliseconds=12))
+        response.json.return_value = {"ok": True}
+        with patch.object(client.session, 'request', return_value=response):
+            client.do_request("/api/v1/nodes/acme/cassandra/prod")
+            client.do_request("/api/v1/nodes/acme/cassandra/prod", method='PUT', json_data={'a': 1})
+
+        self.assertEqual([(record['method'], record['endpoint'], record['status'], record['bytes_in'],
+                           record['bytes_out'], record['ttfb']) for record in client.timings.records],
+                         [('GET', '/api/v1/nodes/{org}/{cluster_type}/{cluster}', 200, 12, 0, 12.0),
+                          ('PUT', '/api/v1/nodes/{org}/{cluster_type}/{cluster}', 200, 12, 8, 12.0)])
+        lines = client.timings.report_lines()
+        self.assertTrue(lines[0].startswith("2 requests"))
+        self.assertTrue(any(line.endswith("PUT /api/v1/nodes/{org}/{cluster_type}/{cluster}") for line in lines))
+
+    def test_no_timings_without_profile(self):
+        self.assertIsNone(AxonOps(org_name="acme", base_url="https://example.com").timings)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,5 @@
+from ansible_collections.axonops.axonops.plugins.plugin_utils.axonops_action import AxonOpsActionModule
+
+
+class ActionModule(AxonOpsActionModule):
+    module_name = 'alert_rules'
@@ -0,0 +1,281 @@
+DOCUMENTATION = r'''
+    name: axonops_metrics
+    type: aggregate
+    short_description: Summarise the AxonOps API requests of a playbook
+    version_added: '0.7.0'
+    description:
+        - Aggregates the C(timings) returned by the AxonOps modules when profiling (see the C(profile) option of the
+          modules) across the whole playbook, per module and per cluster, and prints a summary at the end with the
+          number of requests, the cache hits, the errors, the retries, the latencies (cumulative, p50, p95) and the
+          bytes sent and received, on the network and before compression, to see what the compression saves.
+        - The summary can also be written to a JSON or OpenMetrics file, to follow the API cost of a playbook over
+          time or to be picked up by the Prometheus node exporter textfile collector.
+        - The tasks without C(timings), the modules of other collections or the AxonOps modules run without
+          profiling, are ignored.
+    requirements:
+        - enable in configuration, for example C(callbacks_enabled = axonops.axonops.axonops_metrics) in ansible.cfg
+    options:
+        enable_profile:
+            description:
+                - Set C(AXONOPS_PROFILE=true) in the environment of the controller when the plugin is loaded, so that
+                  the modules run on the controller (controller execution or the local connection) return their
+                  timings without setting C(profile) on every task.
+                - The modules run on other hosts need C(profile) or C(AXONOPS_PROFILE) in their environment.
+            type: bool
+            default: true
+            env:
+                - name: AXONOPS_METRICS_ENABLE_PROFILE
+            ini:
+                - section: callback_axonops_metrics
+                  key: enable_profile
+        output_file:
+            description:
+                - File written at the end of the playbook with the aggregated metrics, nothing is written when not set.
+            type: path
+            env:
+                - name: AXONOPS_METRICS_FILE
+            ini:
+                - section: callback_axonops_metrics
+                  key: output_file
+        output_format:
+            description:
+                - Format of I(output_file), C(json) or C(openmetrics).
+            type: str
+            default: json
+            choices: ['json', 'openmetrics']
+            env:
+                - name: AXONOPS_METRICS_FORMAT
+            ini:
+                - section: callback_axonops_metrics
+                  key: output_format
+        top:
+            description:
+                - Number of endpoints listed in the summary, the ones where the most time went.
+            type: int
+            default: 10
+            env:
+                - name: AXONOPS_METRICS_TOP
+            ini:
+                - section: callback_axonops_metrics
+                  key: top
+'''
+
+import json
+import os
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_timings import percentile
+
+# the cluster label of the requests not bound to a cluster, like the login
+NO_CLUSTER = '-'
+
+
+class MetricsBucket:
+    """
+    The requests counted under one module, cluster or endpoint
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.cached = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.bytes_out_decoded = 0
+        self.bytes_in_decoded = 0
+        self.durations = []
+
+    def add(self, record: dict):
+        self.requests += 1
+        if record.get('cached'):
+            self.cached += 1
+        status = record.get('status')
+        if status is None or status >= 400:
+            self.errors += 1
+        self.retries += max(record.get('attempts', 1) - 1, 0)
+        self.bytes_out += record.get('bytes_out', 0)
+        self.bytes_in += record.get('bytes_in', 0)
+        # the modules of the versions without compression only have the bytes on the network
+        self.bytes_out_decoded += record.get('bytes_out_decoded', record.get('bytes_out', 0))
+        self.bytes_in_decoded += record.get('bytes_in_decoded', record.get('bytes_in', 0))
+        self.durations.append(record.get('total', 0.0))
+
+    def to_dict(self) -> dict:
+        return {
+            'requests': self.requests,
+            'cached': self.cached,
+            'cache_hit_rate': round(self.cached / self.requests, 3) if self.requests else 0.0,
+            'errors': self.errors,
+            'retries': self.retries,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'bytes_out_decoded': self.bytes_out_decoded,
+            'bytes_in_decoded': self.bytes_in_decoded,
+            'total_ms': round(sum(self.durations), 1),
+            'p50_ms': round(percentile(self.durations, 0.5), 1),
+            'p95_ms': round(percentile(self.durations, 0.95), 1),
+        }
+
+
+def _label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class CallbackModule(CallbackBase):
+    """
+    Aggregates the timings of the AxonOps modules per module, per cluster and per endpoint
+    """
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'axonops.axonops.axonops_metrics'
+    CALLBACK_NEEDS_ENABLED = True
+
+    def __init__(self, display=None):
+        super(CallbackModule, self).__init__(display=display)
+        self.runs = {}
+        self.modules = {}
+        self.clusters = {}
+        self.pairs = {}
+        self.endpoints = {}
+        self.started = time.time()
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(CallbackModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        if self.get_option('enable_profile'):
+            os.environ.setdefault('AXONOPS_PROFILE', 'true')
+
+    def _add_timings(self, module: str, timings: dict):
+        self.runs[module] = self.runs.get(module, 0) + 1
+        for record in timings.get('requests') or []:
+            cluster = record.get('cluster') or NO_CLUSTER
+            endpoint = f"{record.get('method', '')} {record.get('endpoint', '')}"
+            for buckets, key in ((self.modules, module), (self.clusters, cluster), (self.pairs, (module, cluster)),
+                                 (self.endpoints, endpoint)):
+                buckets.setdefault(key, MetricsBucket()).add(record)
+
+    def _collect(self, result):
+        module = result._task.action.split('.')[-1]
+        outcome = result._result
+        # a loop reports the outcome of every item in results
+        for item in outcome.get('results') or [outcome]:
+            if isinstance(item, dict) and isinstance(item.get('timings'), dict):
+                self._add_timings(module, item['timings'])
+
+    def v2_runner_on_ok(self, result):
+        self._collect(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._collect(result)
+
+    def summary(self) -> dict:
+        """
+        The aggregated metrics, as written to the JSON file
+        """
+        totals = MetricsBucket()
+        for bucket in self.modules.values():
+            totals.requests += bucket.requests
+            totals.cached += bucket.cached
+            totals.errors += bucket.errors
+            totals.retries += bucket.retries
+            totals.bytes_out += bucket.bytes_out
+            totals.bytes_in += bucket.bytes_in
+            totals.bytes_out_decoded += bucket.bytes_out_decoded
+            totals.bytes_in_decoded += bucket.bytes_in_decoded
+            totals.durations.extend(bucket.durations)
+
+        endpoints = sorted(self.endpoints.items(), key=lambda entry: sum(entry[1].durations), reverse=True)
+        return {
+            'started': self.started,
+            'duration': round(time.time() - self.started, 3),
+            'totals': dict(totals.to_dict(), runs=sum(self.runs.values())),
+            'modules': {name: dict(bucket.to_dict(), runs=self.runs.get(name, 0))
+                        for name, bucket in sorted(self.modules.items())},
+            'clusters': {name: bucket.to_dict() for name, bucket in sorted(self.clusters.items())},
+            'module_clusters': [dict(bucket.to_dict(), module=module, cluster=cluster)
+                                for (module, cluster), bucket in sorted(self.pairs.items())],
+            'endpoints': [dict(bucket.to_dict(), endpoint=endpoint)
+                          for endpoint, bucket in endpoints[:self.get_option('top')]],
+        }
+
+    def openmetrics(self) -> str:
+        """
+        The metrics per module and cluster in the OpenMetrics text format
+        """
+        counters = (
+            ('axonops_api_requests', 'API requests sent by the AxonOps modules', 'requests'),
+            ('axonops_api_cache_hits', 'API responses served from the response cache', 'cached'),
+            ('axonops_api_errors', 'API requests that failed', 'errors'),
+            ('axonops_api_retries', 'API requests sent again', 'retries'),
+            ('axonops_api_sent_bytes', 'Bytes sent to the AxonOps API', 'bytes_out'),
+            ('axonops_api_received_bytes', 'Bytes received from the AxonOps API', 'bytes_in'),
+            ('axonops_api_sent_decoded_bytes', 'Bytes of the request bodies before compression', 'bytes_out_decoded'),
+            ('axonops_api_received_decoded_bytes', 'Bytes of the response bodies once decompressed',
+             'bytes_in_decoded'),
+        )
+        pairs = sorted(self.pairs.items())
+        lines = []
+        for name, description, attribute in counters:
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"# HELP {name} {description}.")
+            for (module, cluster), bucket in pairs:
+                lines.append(f'{name}_total{{module="{_label(module)}",cluster="{_label(cluster)}"}} '
+                             f'{getattr(bucket, attribute)}')
+
+        name = 'axonops_api_request_duration_seconds'
+        lines.append(f"# TYPE {name} summary")
+        lines.append(f"# UNIT {name} seconds")
+        lines.append(f"# HELP {name} Duration of the API requests, retries included.")
+        for (module, cluster), bucket in pairs:
+            labels = f'module="{_label(module)}",cluster="{_label(cluster)}"'
+            for quantile in (0.5, 0.95):
+                lines.append(f'{name}{{{labels},quantile="{quantile}"}} '
+                             f'{percentile(bucket.durations, quantile) / 1000:.6f}')
+            lines.append(f'{name}_sum{{{labels}}} {sum(bucket.durations) / 1000:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {len(bucket.durations)}')
+        lines.append("# EOF")
+        return '\n'.join(lines) + '\n'
+
+    def _print_table(self, title: str, rows: list):
+        width = max([len(title)] + [len(name) for name, _ in rows])
+        self._display.display(f"{title:<{width}} {'requests':>8} {'cached':>7} {'errors':>6} {'retries':>7} "
+                              f"{'total ms':>10} {'p50 ms':>8} {'p95 ms':>8} {'KB in':>8}")
+        for name, metrics in rows:
+            self._display.display(f"{name:<{width}} {metrics['requests']:>8} {metrics['cached']:>7} "
+                                  f"{metrics['errors']:>6} {metrics['retries']:>7} {metrics['total_ms']:>10.1f} "
+                                  f"{metrics['p50_ms']:>8.1f} {metrics['p95_ms']:>8.1f} "
+                                  f"{metrics['bytes_in'] / 1024:>8.1f}")
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.modules:
+            return
+
+        summary = self.summary()
+        totals = summary['totals']
+        self._display.banner("AXONOPS API METRICS")
+        self._display.display(f"{totals['requests']} requests from {totals['runs']} module runs, "
+                              f"{totals['total_ms'] / 1000:.1f}s in requests, "
+                              f"cache hit rate {totals['cache_hit_rate']:.0%}, {totals['errors']} errors, "
+                              f"{totals['retries']} retries, {totals['bytes_out']} bytes sent "
+                              f"({totals['bytes_out_decoded']} uncompressed), {totals['bytes_in']} bytes received "
+                              f"({totals['bytes_in_decoded']} uncompressed)")
+        self._display.display("")
+        self._print_table("module", sorted(summary['modules'].items(), key=lambda entry: -entry[1]['total_ms']))
+        self._display.display("")
+        self._print_table("cluster", sorted(summary['clusters'].items(), key=lambda entry: -entry[1]['total_ms']))
+        self._display.display("")
+        self._print_table("endpoint", [(entry['endpoint'], entry) for entry in summary['endpoints']])
+
+        output_file = self.get_option('output_file')
+        if not output_file:
+            return
+        try:
+            with open(output_file, 'w') as f:
+                if self.get_option('output_format') == 'openmetrics':
+                    f.write(self.openmetrics())
+                else:
+                    json.dump(summary, f, indent=2)
+        except OSError as e:
+            self._display.warning(f"Could not write the AxonOps API metrics to {output_file}: {e}")
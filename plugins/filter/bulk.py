@@ -0,0 +1,58 @@
+DOCUMENTATION = r"""
+  name: bulk
+  short_description: Split the resources of the configurations role between the bulk and the per-item tasks
+  description:
+    - C(bulk_split) and C(merge_bulk) are used internally by the configurations role in bulk mode.
+"""
+
+# the settings an item can override, an item with one of them can't share the bulk call made with the role settings
+ITEM_SETTINGS = ('cluster_type', 'auth_token', 'username', 'password')
+
+
+def bulk_split(items, shared_count, cluster, clusters=None, bulk_mode=False, key='items', item_type=None):
+    """
+    Split the items loaded by the configurations role, the first shared_count of them organization-wide and the
+    others specific to cluster.
+
+    Out of bulk mode every item is applied on cluster by the per-item task. In bulk mode the organization-wide items
+    are applied to all the clusters (only cluster when clusters is not set) and the cluster-specific ones stay on
+    cluster. The items overriding one of ITEM_SETTINGS can't share the bulk call, they are applied one by one on the
+    same clusters.
+    Returns a dict with per_item, the [cluster, item] pairs of the per-item task, and bulk, the batches of the bulk
+    task: a dict with the cluster or the clusters and the items under key, tagged with item_type if set.
+    """
+    items = list(items or [])
+    shared_count = int(shared_count)
+    if not bulk_mode:
+        return {'per_item': [[cluster, item] for item in items], 'bulk': []}
+
+    def in_bulk(item):
+        return not any(setting in item for setting in ITEM_SETTINGS)
+
+    def batch_items(some_items):
+        return [dict(item, type=item_type) if item_type else item for item in some_items if in_bulk(item)]
+
+    shared, specific = items[:shared_count], items[shared_count:]
+    per_item = [[name, item] for name in (clusters or [cluster]) for item in shared if not in_bulk(item)]
+    per_item += [[cluster, item] for item in specific if not in_bulk(item)]
+    if clusters is None:
+        bulk = [{'cluster': cluster, key: batch_items(shared + specific)}]
+    else:
+        bulk = [{'clusters': clusters, key: batch_items(shared)}, {'cluster': cluster, key: batch_items(specific)}]
+    return {'per_item': per_item, 'bulk': bulk}
+
+
+def merge_bulk(batches, other_batches, key='items'):
+    """
+    Merge the bulk batches of two bulk_split made with the same clusters, e.g. the tcp and the shell checks applied
+    by a single service_checks call
+    """
+    return [dict(batch, **{key: batch[key] + other[key]}) for batch, other in zip(batches, other_batches)]
+
+
+class FilterModule(object):
+    def filters(self):
+        return {
+            "bulk_split": bulk_split,
+            "merge_bulk": merge_bulk,
+        }
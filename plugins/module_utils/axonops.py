@@ -1,16 +1,40 @@
+import hashlib
+import http.client
 import json
+import os
+import random
+import time
 import urllib.parse
+from contextlib import nullcontext
 from urllib.error import HTTPError
 
 from ansible.module_utils.urls import open_url
 from typing import List
 
+from .axonops_cache import FingerprintStore, ResponseCache, TokenCache, default_cache_dir, fingerprint, locked
+from .axonops_flight import SingleFlight
+from .axonops_http import ACCEPT_ENCODING, ConnectionPool, StreamDecoder, StreamedResponse, accepts_gzip, \
+    compress_body, decode_content
+from .axonops_integrations import IntegrationIndex
+from .axonops_json import CHUNK_SIZE, iter_json_items, items_at
+from .axonops_nodes import NodeDirectory, node_lookup_fields
+from .axonops_retry import IDEMPOTENT_METHODS, RetryPolicy, TokenBucket
+from .axonops_timings import PHASES, RequestTimings, url_cluster, url_template
+
+# status codes open_url follows by itself, the connection pool leaves these requests to it
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+
 
 class AxonOps:
 
     def __init__(self, org_name: str, auth_token: str = '', base_url: str = '', username: str = '', password: str = '',
                  cluster_type: str = 'cassandra', api_token: str = '', override_saas: bool = False, use_saml: bool = False,
-                 validate_certs: bool = True):
+                 validate_certs: bool = True, token_cache: bool = False, cache_dir: str = '', pool_size: int = 4,
+                 response_cache: str = 'none', cache_ttl: int = 30, cache_max_size: int = 64,
+                 skip_unchanged: bool = False, conflict_retries: int = 0, retries: int = 3,
+                 retry_backoff: float = 0.5, retry_non_idempotent: bool = False, request_timeout: float = 30,
+                 rate_limit: float = 0, profile: bool = False, compress_requests: bool = False,
+                 stream_responses: bool = False):
         self.org_name = org_name
         self.auth_token = auth_token
         self.api_token = api_token
@@ -21,8 +45,49 @@ class AxonOps:
         self.use_saml = use_saml
         self.validate_certs = validate_certs
 
+        # the JWT can be kept on disk and shared by the following module invocations
+        self.token_cache = TokenCache(cache_dir) if token_cache else None
+
+        # GET responses reused by the following requests, also by the following modules if kept on disk
+        self.response_cache = None
+        if response_cache in ('memory', 'disk'):
+            scope = hashlib.sha256(f"{username}\n{auth_token}\n{api_token}".encode('utf-8')).hexdigest()
+            self.response_cache = ResponseCache(ttl=cache_ttl, max_bytes=cache_max_size * 1024 * 1024,
+                                                disk=response_cache == 'disk', cache_dir=cache_dir, scope=scope)
+
+        # the same GET asked again while it is in flight, by the clusters reconciled in parallel, waits for it
+        self.in_flight = SingleFlight()
+
+        # fingerprints of the last applied desired state, to skip the resources whose configuration wasn't edited
+        self.fingerprints = FingerprintStore(cache_dir) if skip_unchanged else None
+
+        # how many times a document changed by someone else while we were updating it is read again
+        self.conflict_retries = conflict_retries
+        self.lock_dir = os.path.join(cache_dir or default_cache_dir(), 'locks')
+
+        # keep-alive connections to the server, a pool_size of 0 opens a new connection for every request
+        self.request_timeout = request_timeout
+        self.http_pool = ConnectionPool(pool_size, timeout=request_timeout, validate_certs=validate_certs) \
+            if pool_size > 0 else None
+
+        # the requests failing on a busy server are sent again, never faster than rate_limit requests per second
+        self.retry_policy = RetryPolicy(retries, backoff=retry_backoff, retry_non_idempotent=retry_non_idempotent)
+        self.rate_limiter = TokenBucket(rate_limit)
+
+        # the responses are always asked gzipped, the large request bodies are only gzipped with compress_requests
+        # and once the server said in the Accept-Encoding of a response that it takes them
+        self.compress_requests = compress_requests
+        self.server_accepts_gzip = False
+
+        # the large lists read only to look things up are decoded as they are received, see get_items
+        self.stream_responses = stream_responses
+
+        # the method, endpoint, status, sizes and timings of every request, returned by the modules when profiling
+        self.timings = RequestTimings() if profile else None
+
         # save the integration output to a var so we can use it multiple times
         self.integrations_output = {}
+        self.integrations_index = {}
 
         # collect the errors, will check it on every module
         self.errors = []
@@ -62,28 +127,68 @@ class AxonOps:
         """
         return self.cluster_type
 
+    def _fingerprint_key(self, resource: tuple) -> str:
+        return FingerprintStore.make_key(self.base_url, self.org_name, self.cluster_type, *resource)
+
+    def desired_state_unchanged(self, resource: tuple, desired) -> bool:
+        """
+        True if desired is the state last applied to resource, e.g. ('dashboard_template', cluster, name).
+        Always False unless skip_unchanged is enabled
+        """
+        if self.fingerprints is None:
+            return False
+        return self.fingerprints.get(self._fingerprint_key(resource)) == fingerprint(desired)
+
+    def remember_desired_state(self, resource: tuple, desired):
+        """
+        Record desired as the state now applied to resource
+        """
+        if self.fingerprints is not None:
+            self.fingerprints.put(self._fingerprint_key(resource), fingerprint(desired))
+
     def get_jwt(self):
         """
-        Get the JWT from the login endpoint
+        Get the JWT from the token cache or from the login endpoint
         """
         # if you have it already, use it
         if self.jwt:
             return self.jwt
-        else:
-            json_data = {
-                "username": self.username,
-                "password": self.password
-            }
-
-            result, return_error = self.do_request("/api/login", json_data=json_data, method='POST')
-
-            if return_error:
-                self.errors.append(return_error)
-            if not result or 'token' not in result:
-                self.errors.append(f"{self.base_url}/api/login returned an invalid result {result} {return_error}")
-                return None
-            self.jwt = result['token']
-            return self.jwt
+
+        if self.token_cache:
+            token = self.token_cache.get(self._token_cache_key())
+            if token:
+                self.jwt = token
+                return self.jwt
+
+        json_data = {
+            "username": self.username,
+            "password": self.password
+        }
+
+        result, return_error = self.do_request("/api/login", json_data=json_data, method='POST')
+
+        if return_error:
+            self.errors.append(return_error)
+        if not result or 'token' not in result:
+            self.errors.append(f"{self.base_url}/api/login returned an invalid result {result} {return_error}")
+            return None
+        self.jwt = result['token']
+
+        if self.token_cache:
+            self.token_cache.put(self._token_cache_key(), self.jwt)
+        return self.jwt
+
+    def refresh_jwt(self):
+        """
+        Forget the current JWT, also from the token cache, and login again
+        """
+        if self.token_cache:
+            self.token_cache.invalidate(self._token_cache_key())
+        self.jwt = ''
+        return self.get_jwt()
+
+    def _token_cache_key(self) -> str:
+        return TokenCache.make_key(self.base_url, self.org_name, self.username)
 
     def dash_url(self):
         return self.base_url
@@ -91,9 +196,135 @@ class AxonOps:
     def do_request(self, rel_url: str, method: str = 'GET', ok_codes: List[int] = [200, 201, 204],
                    data: any = None,
                    json_data: any = None,
-                   form_field: str = ""):
+                   form_field: str = "",
+                   fresh: bool = False):
+        """
+        Perform a GET request to AxonOps and return the response or an error.
+        With fresh, a GET is always checked with the server instead of being served from the response cache.
+        A GET of a URL already in flight in another thread isn't sent again, the callers share its result and
+        must not modify it. A fresh GET is always sent, it may have to see a change made after the other started.
+        """
+        if method.upper() != 'GET' or fresh:
+            return self._request(rel_url, method, ok_codes, data, json_data, form_field, fresh)
+
+        started = time.perf_counter()
+        full_url = self.base_url + '/' + rel_url.lstrip('/')
+        (result, error), shared = self.in_flight.do(
+            full_url, lambda: self._request(rel_url, method, ok_codes, data, json_data, form_field))
+        if shared:
+            # served without a request of its own, like a response from the cache
+            self._record_timing('GET', rel_url, 200 if error is None else None, None, None, started, cached=True)
+        return result, error
+
+    def _request(self, rel_url: str, method: str, ok_codes: List[int], data: any, json_data: any,
+                 form_field: str, fresh: bool = False):
+        """
+        do_request without the coalescing of the GETs in flight, returns the response and an error
+        """
+        result, error, status = self._do_request(rel_url, method, ok_codes, data, json_data, form_field, fresh)
+
+        # the JWT may have expired or been revoked since it was cached, login again and retry once
+        if status == 401 and self.jwt and self.username and self.password and rel_url != "/api/login":
+            if self.refresh_jwt():
+                result, error, status = self._do_request(rel_url, method, ok_codes, data, json_data, form_field,
+                                                         fresh)
+
+        # the GETs of the resource still in flight may have read it before the change, don't join them any more
+        if method.upper() != 'GET':
+            self.in_flight.forget(self.base_url + '/' + rel_url.lstrip('/'))
+
+        # the integrations are kept for the lifetime of the client, forget them once they change
+        if error is None and method.upper() != 'GET' and 'integrations' in rel_url:
+            self.integrations_output = {}
+            self.integrations_index = {}
+
+        return result, error
+
+    def _do_request(self, rel_url: str, method: str, ok_codes: List[int], data: any, json_data: any,
+                    form_field: str, fresh: bool = False):
+        """
+        Send a single request, returns the decoded response, the error and the HTTP status code
+        """
+        started = time.perf_counter()
+        full_url = self.base_url + '/' + rel_url.lstrip('/')
+
+        if data is None and json_data is not None:
+            data = json.dumps(json_data).encode('utf-8')
+
+        headers = self._headers()
+        if form_field != "":
+            headers['Content-type'] = 'application/x-www-form-urlencoded'
+            data = form_field + "=" + urllib.parse.quote_plus(data)
+        elif data is not None:
+            headers['Content-type'] = 'application/json'
+
+        method = method.upper()
+
+        # serve the GET from the response cache when possible, or ask the server if the cached one is still valid
+        cached = None
+        if method == 'GET' and self.response_cache is not None:
+            cached = self.response_cache.get(full_url)
+            if cached is not None:
+                if not fresh and self.response_cache.is_fresh(cached):
+                    self._record_timing(method, rel_url, 200, None, cached.body, started, cached=True)
+                    return self._decode(cached.body, 200)
+                if cached.etag:
+                    headers['If-None-Match'] = cached.etag
+                if cached.last_modified:
+                    headers['If-Modified-Since'] = cached.last_modified
+
+        body = compress_body(data) if self.compress_requests and self.server_accepts_gzip else None
+        if body is not None:
+            headers['Content-Encoding'] = 'gzip'
+
+        try:
+            response = self._send_with_retries(method, full_url, headers, body if body is not None else data)
+            if body is not None and response[0] == 415:
+                # the server doesn't take a gzipped body here after all, send them as they are from now on
+                self.server_accepts_gzip = False
+                del headers['Content-Encoding']
+                body = None
+                response = self._send_with_retries(method, full_url, headers, data)
+            status, reason, res_headers, raw, timings = response
+        except Exception as e:
+            self._record_timing(method, rel_url, None, data, None, started, {'attempts': getattr(e, 'attempts', 1)})
+            return None, str(e) + f" Exception {method} {full_url} headers: {headers} data: {data}", None
+
+        if self.compress_requests and not self.server_accepts_gzip:
+            self.server_accepts_gzip = accepts_gzip(res_headers)
+
+        # the bytes that went over the network, the sizes of the bodies before compression are recorded as well
+        timings['bytes_in'] = len(raw) if raw else 0
+        if body is not None:
+            timings['bytes_out'] = len(body)
+
+        try:
+            content = decode_content(raw, res_headers.get('Content-Encoding'))
+        except ValueError as e:
+            self._record_timing(method, rel_url, status, data, None, started, timings)
+            return None, f"{e} {method} {full_url}", status
+
+        self._record_timing(method, rel_url, status, data, content, started, timings)
+
+        if status == 304 and cached is not None:
+            self.response_cache.revalidated(full_url, cached)
+            return self._decode(cached.body, 200)
+        if status >= 400:
+            return None, f"HTTP Error {status}: {reason} HTTPError {method} {full_url} headers: {headers} data: {data} body: {content}", status
+        if status not in ok_codes:
+            return None, f'{method}: {full_url} return code is {status} headers: {res_headers} \n body: {content}', status
+
+        if self.response_cache is not None:
+            if method != 'GET':
+                self.response_cache.invalidate(full_url)
+            elif 'no-store' not in (res_headers.get('Cache-Control') or ''):
+                self.response_cache.put(full_url, content, res_headers.get('ETag'), res_headers.get('Last-Modified'))
+
+        return self._decode(content, status)
+
+    def _headers(self) -> dict:
         """
-        Perform a GET request to AxonOps and return the response or an error
+        The headers of every request, with the credentials
         """
         # bearer empty is for anonymous
         bearer = ''
@@ -113,13 +344,9 @@ class AxonOps:
         if self.jwt:
             bearer = self.jwt
 
-        full_url = self.base_url + '/' + rel_url.lstrip('/')
-
-        if data is None and json_data is not None:
-            data = json.dumps(json_data).encode('utf-8')
-
         headers = {
             'Accept': 'application/json',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'User-agent': 'AxonOps Ansible Module',
         }
 
@@ -127,38 +354,273 @@ class AxonOps:
             headers['Authorization'] = f'Bearer {bearer}'
         if api_token:
             headers['Authorization'] = f'AxonApi {api_token}'
-        if form_field != "":
-            headers['Content-type'] = 'application/x-www-form-urlencoded'
-            data = form_field + "=" + urllib.parse.quote_plus(data)
-        elif data is not None:
-            headers['Content-type'] = 'application/json'
+        return headers
 
+    def _record_timing(self, method: str, rel_url: str, status: int, data: any, content: bytes, started: float,
+                       timings: dict = None, cached: bool = False):
+        """
+        Add the request to the timings when profiling
+        """
+        if self.timings is None:
+            return
+        timings = timings or {}
+        bytes_out = len(data) if data else 0
+        bytes_in = len(content) if content else 0
+        record = {
+            'method': method,
+            'endpoint': url_template(rel_url, self.org_name),
+            'cluster': url_cluster(rel_url, self.org_name),
+            'status': status,
+            'bytes_out': timings.get('bytes_out', bytes_out),
+            'bytes_in': timings.get('bytes_in', bytes_in),
+            'bytes_out_decoded': bytes_out,
+            'bytes_in_decoded': timings.get('bytes_in_decoded', bytes_in),
+            'cached': cached,
+            'attempts': timings.get('attempts', 0 if cached else 1),
+            'reused': timings.get('reused', False),
+        }
+        for phase in PHASES:
+            record[phase] = round(float(timings.get(phase, 0)), 1)
+        # the whole call, with the waits between the retries
+        record['total'] = round((time.perf_counter() - started) * 1000, 1)
+        self.timings.add(record)
+
+    @staticmethod
+    def _decode(content: bytes, status: int):
+        # Not all requests return a response so ignore json decoding errors
+        try:
+            return json.loads(content), None, status
+        except json.JSONDecodeError:
+            return None, None, status
+
+    def _send(self, method: str, full_url: str, headers: dict, data: any):
+        """
+        Send the request on a keep-alive connection if possible, otherwise with open_url.
+        Returns the status code, the reason, the response headers, the body, HTTP errors included, and the timings
+        of the request in milliseconds (only ttfb and total with open_url)
+        """
+        if self.http_pool is not None and self.http_pool.handles(full_url):
+            res = self.http_pool.request(method, full_url, headers, data)
+            # open_url follows the redirects, leave them to it when sending the request again is safe, the others
+            # have already been sent once and get the redirect as an error
+            if res.status not in REDIRECT_CODES or method.upper() not in IDEMPOTENT_METHODS:
+                return res.status, res.reason, res.headers, res.body, res.timings
+
+        started = time.perf_counter()
         res = None
         try:
-            with open_url(
-                    method=method.upper(),
-                    url=full_url,
-                    headers=headers,
-                    data=data,
-                    timeout=30,
-                    validate_certs=self.validate_certs
-            ) as res:
-                if res.status not in ok_codes:
-                    return None, f'{method.upper()}: {full_url} return code is {res.status} headers: {res.headers} \n body: {res.read()}'
-                content = res.read()
+            res = open_url(
+                method=method,
+                url=full_url,
+                headers=headers,
+                data=data,
+                timeout=self.request_timeout,
+                validate_certs=self.validate_certs
+            )
+            ttfb = (time.perf_counter() - started) * 1000
+            body = res.read()
+            return res.status, res.reason, res.headers, body, {'ttfb': ttfb,
+                                                               'total': (time.perf_counter() - started) * 1000}
         except HTTPError as e:
-            return None, str(e) + f" HTTPError {method.upper()} {full_url} headers: {headers} data: {data} body: {e.fp.read()}"
-        except Exception as e:
-            return None, str(e) + f" Exception {method.upper()} {full_url} headers: {headers} data: {data}"
+            ttfb = (time.perf_counter() - started) * 1000
+            body = e.fp.read() if e.fp is not None else b''
+            return e.code, e.reason, e.headers, body, {'ttfb': ttfb, 'total': (time.perf_counter() - started) * 1000}
         finally:
             if res is not None:
                 res.close()
 
-        # Not all requests return a response so ignore json decoding errors
+    def _open(self, method: str, full_url: str, headers: dict, data: any):
+        """
+        Same as _send on a pooled connection, with the StreamedResponse in place of the body
+        """
+        res = self.http_pool.open(method, full_url, headers, data)
+        return res.status, res.reason, res.headers, res, res.timings
+
+    def _send_with_retries(self, method: str, full_url: str, headers: dict, data: any, send=None):
+        """
+        _send (or send) under the rate limit, sent again as the retry policy says when the server can't be reached
+        or is busy. A 429 holds all the requests of the client, not only this one, for the time the server asked
+        """
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                response = (send or self._send)(method, full_url, headers, data)
+            except Exception as e:
+                if not self.retry_policy.should_retry(method, None, attempt):
+                    e.attempts = attempt + 1
+                    raise
+                time.sleep(self.retry_policy.delay(attempt))
+            else:
+                status, res_headers = response[0], response[2]
+                if not self.retry_policy.should_retry(method, status, attempt):
+                    response[4]['attempts'] = attempt + 1
+                    return response
+                if isinstance(response[3], StreamedResponse):
+                    response[3].close()
+                delay = self.retry_policy.delay(attempt, res_headers)
+                if status == 429:
+                    self.rate_limiter.pause(delay)
+                time.sleep(delay)
+            attempt += 1
+
+    def get_items(self, rel_url: str, path: tuple = (), keep=None):
+        """
+        The elements of the array at path in the JSON document returned by a GET of rel_url, e.g. ('dashboards',)
+        for the dashboard templates or () when the document is the array, [] when it is missing.
+        keep is called with every element and returns what is kept of it, None to drop it.
+        With stream_responses the body is decoded as it is received and only what keep returns is held in memory,
+        otherwise the whole document is decoded first, and cached, like do_request does.
+        Returns a tuple (items, error)
+        """
+        items, error = self.iter_items(rel_url, path)
+        if error is not None:
+            return None, error
+        kept = []
         try:
-            return json.loads(content), None
-        except json.JSONDecodeError:
-            return None, None
+            for item in items:
+                if keep is not None:
+                    item = keep(item)
+                if item is not None:
+                    kept.append(item)
+        except (ValueError, OSError, http.client.HTTPException) as e:
+            return None, f"Error reading the response of GET {self.base_url}/{rel_url.lstrip('/')}: {e}"
+        return kept, None
+
+    def iter_items(self, rel_url: str, path: tuple = ()):
+        """
+        Same as get_items with an iterator over the elements. When streaming, the iterator raises ValueError if
+        the body isn't valid JSON and OSError if the connection breaks, and it has to be exhausted or closed.
+        Returns a tuple (items, error)
+        """
+        full_url = self.base_url + '/' + rel_url.lstrip('/')
+        if self.stream_responses and self.http_pool is not None and self.http_pool.handles(full_url):
+            # a response still fresh in the cache is read from there
+            cached = self.response_cache.get(full_url) if self.response_cache is not None else None
+            if cached is None or not self.response_cache.is_fresh(cached):
+                items, error, status = self._open_stream(rel_url, full_url, path)
+                if status == 401 and self.jwt and self.username and self.password and self.refresh_jwt():
+                    items, error, status = self._open_stream(rel_url, full_url, path)
+                if items is not None or error is not None:
+                    return items, error
+
+        document, error = self.do_request(rel_url)
+        if error is not None:
+            return None, error
+        return iter(items_at(document, path)), None
+
+    def _open_stream(self, rel_url: str, full_url: str, path: tuple):
+        """
+        Send the GET of rel_url for iter_items and return a tuple (items, error, status), items and error are None
+        when the response is a redirect, left to do_request
+        """
+        started = time.perf_counter()
+        try:
+            status, reason, res_headers, res, timings = self._send_with_retries('GET', full_url, self._headers(),
+                                                                               None, send=self._open)
+        except Exception as e:
+            self._record_timing('GET', rel_url, None, None, None, started, {'attempts': getattr(e, 'attempts', 1)})
+            return None, str(e) + f" Exception GET {full_url}", None
+
+        if self.compress_requests and not self.server_accepts_gzip:
+            self.server_accepts_gzip = accepts_gzip(res_headers)
+        if status == 200:
+            return self._stream_items(rel_url, res, started, path), None, status
+
+        # the error responses are small, read them whole
+        try:
+            raw = res.read()
+        finally:
+            res.close()
+        timings['bytes_in'] = len(raw)
+        self._record_timing('GET', rel_url, status, None, raw, started, timings)
+        if status in REDIRECT_CODES:
+            return None, None, status
+        try:
+            content = decode_content(raw, res_headers.get('Content-Encoding'))
+        except ValueError:
+            content = raw
+        return None, f"HTTP Error {status}: {reason} HTTPError GET {full_url} body: {content}", status
+
+    def _stream_items(self, rel_url: str, res: StreamedResponse, started: float, path: tuple):
+        """
+        The elements at path of the body of res, decoded as the body is read
+        """
+        decoder = StreamDecoder(res.headers.get('Content-Encoding'))
+        sizes = {'bytes_in': 0, 'bytes_in_decoded': 0}
+
+        def chunks():
+            while True:
+                raw = res.read(CHUNK_SIZE)
+                if not raw:
+                    break
+                sizes['bytes_in'] += len(raw)
+                chunk = decoder.decode(raw)
+                sizes['bytes_in_decoded'] += len(chunk)
+                yield chunk
+            chunk = decoder.flush()
+            sizes['bytes_in_decoded'] += len(chunk)
+            yield chunk
+
+        try:
+            yield from iter_json_items(chunks(), path)
+            # what follows the array is usually short, reading it lets the connection be reused
+            sizes['bytes_in'] += len(res.read(CHUNK_SIZE))
+        finally:
+            res.close()
+            self._record_timing('GET', rel_url, 200, None, None, started, dict(res.timings, **sizes))
+
+    def _resource_lock(self, rel_url: str):
+        """
+        A lock on the resource at rel_url held by one module run at a time on this machine, or no lock at all
+        if the lock directory can't be created. It is a file lock, the runs on other machines don't see it
+        """
+        key = hashlib.sha256(f"{self.base_url}\n{rel_url.split('?')[0]}".encode('utf-8')).hexdigest()
+        try:
+            os.makedirs(self.lock_dir, mode=0o700, exist_ok=True)
+        except OSError:
+            return nullcontext()
+        return locked(os.path.join(self.lock_dir, key + '.lock'))
+
+    def update_document(self, rel_url: str, base, build, method: str = 'PUT', form_field: str = ""):
+        """
+        Write back a whole document read from rel_url without losing the changes made by others since it was read.
+
+        base is the document the changes were worked out on and build(document) returns the (payload, error) to
+        send for a given document, with None as payload if there is nothing to write.
+        With conflict_retries above 0, while holding a lock on the resource shared by the forks and the threads
+        running on this machine (not by other machines), the document is read again from the server. If it isn't
+        base any more someone else changed it: it is read again after a short random wait until it stops changing,
+        up to conflict_retries times, and the payload is built again from what is on the server. With
+        conflict_retries 0, the default, the payload built on base is written straight away.
+        Returns the response and an error message
+        """
+        if self.conflict_retries <= 0:
+            payload, error = build(base)
+            if error is not None or payload is None:
+                return None, error
+            return self.do_request(rel_url=rel_url, method=method, json_data=payload, form_field=form_field)
+
+        with self._resource_lock(rel_url):
+            document = base
+            for attempt in range(self.conflict_retries + 1):
+                current, error = self.do_request(rel_url, fresh=True)
+                if error is not None:
+                    return None, error
+                if fingerprint(current) == fingerprint(document):
+                    break
+                document = current
+                if attempt < self.conflict_retries:
+                    # someone else is writing it, let them finish before reading it again
+                    time.sleep(random.uniform(0.05, 0.2) * 2 ** attempt)
+            else:
+                return None, (f"{rel_url} was changed by someone else {self.conflict_retries + 1} times while "
+                              f"updating it, giving up")
+
+            payload, error = build(document)
+            if error is not None or payload is None:
+                return None, error
+            return self.do_request(rel_url=rel_url, method=method, json_data=payload, form_field=form_field)
 
     def get_integration_output(self, cluster: str):
         """
@@ -175,76 +637,66 @@ class AxonOps:
             self.integrations_output[cluster] = integrations
         return self.integrations_output[cluster], None
 
-    def find_integration_by_name_and_type(self, cluster, integration_type, name):
+    def get_integration_index(self, cluster: str):
         """
-        get the integration by the name and type
+        get the lookup indexes of the integrations, built once for every integrations output
         """
-        # Get the list of current integrations
         integrations, error = self.get_integration_output(cluster)
         if error is not None:
             return None, error
 
-        definitions = integrations['Definitions'] if 'Definitions' in integrations else []
+        if cluster not in self.integrations_index:
+            self.integrations_index[cluster] = IntegrationIndex(integrations)
+        return self.integrations_index[cluster], None
 
-        # Check if the named integration already exists
-        if definitions:
-            for definition in definitions:
-                if 'Type' in definition and 'Params' in definition and 'name' in definition['Params'] \
-                        and definition['Type'] == integration_type and definition['Params']['name'] == name:
-                    return definition, None
+    def find_integration_by_name_and_type(self, cluster, integration_type, name):
+        """
+        get the integration by the name and type
+        """
+        index, error = self.get_integration_index(cluster)
+        if error is not None:
+            return None, error
 
-        return None, None
+        return index.find_by_name_and_type(integration_type, name), None
 
     def find_integration_id_by_name(self, cluster, name):
         """
         get the integration by the name
         """
-        # Get the list of current integrations
-        integrations, error = self.get_integration_output(cluster)
+        index, error = self.get_integration_index(cluster)
         if error is not None:
             return None, error
 
-        definitions = integrations['Definitions'] if 'Definitions' in integrations else []
-
-        # Check if the named integration already exists
-        if definitions:
-            for definition in definitions:
-                if 'Params' in definition and 'name' in definition['Params'] and definition['Params']['name'] == name:
-                    return definition["ID"], None
-
-        return None, None
+        return index.find_id_by_name(name), None
 
     def find_integration_name_by_id(self, cluster, integration_id):
         """
         get the integration by the ID
         """
-        # Get the list of current integrations
-        integrations, error = self.get_integration_output(cluster)
+        index, error = self.get_integration_index(cluster)
         if error is not None:
             return None, error
 
-        definitions = integrations['Definitions'] if 'Definitions' in integrations else []
+        return index.find_name_by_id(integration_id), None
 
-        # find the definition
-        if definitions:
-            for definition in definitions:
-                if definition["ID"] == integration_id:
-                    return definition['Params']['name'], None
+    def get_node_directory(self, org, cluster):
+        """
+        get the nodes of the cluster, indexed by hostname, IP address and host_id
+        """
+        nodes, error = self.get_items(f"api/v1/nodes/{org}/{self.get_cluster_type()}/{cluster}",
+                                      keep=node_lookup_fields)
+        if error is not None:
+            return None, error
 
-        return None, None
+        return NodeDirectory(nodes), None
 
     def find_nodes_ids(self, nodes, org, cluster):
-        nodes_returned, error = self.do_request(f"api/v1/nodes/{org}/{self.get_cluster_type()}/{cluster}")
+        """
+        get the host_ids of the nodes given by hostname or IP address, the names not found are skipped
+        """
+        directory, error = self.get_node_directory(org, cluster)
         if error is not None:
             return None, error
 
-        list_of_ids = []
-
-        for node in nodes:
-            for node_returned in nodes_returned:
-                details = node_returned['Details']
-                if node == details['human_readable_identifier'] or node == node_returned['HostIP']:
-                    list_of_ids.append(node_returned['host_id'])
-                    break
-
+        list_of_ids, _ = directory.resolve_ids(nodes)
         return list_of_ids, None
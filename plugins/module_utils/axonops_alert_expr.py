@@ -0,0 +1,124 @@
+import re
+from functools import lru_cache
+
+# compiled once, the same patterns are applied to every chart query of a play
+_LABEL_SET_RE = re.compile(r'\{([^}]*)\}')
+_GROUP_BY_RE = re.compile(r'by \([^\)]*\)')
+_TEMPLATE_LABEL_RE = re.compile(r'(\w+)=~\'([$]\w*)?\',?')
+_TRAILING_COMMA_RE = re.compile(r', *}')
+_SPACES_RE = re.compile(r' +')
+_THRESHOLD_RE = re.compile(r' [^ ]+ [^ ]+$')
+
+# the filters an alert rule can add to the labels of the chart query, in the order they are rendered
+ALERT_FILTERS = ('consistency', 'percentile', 'keyspace', 'scope', 'dc', 'rack', 'host_id')
+
+# placeholders for the parts of a query rewritten when rendering the alert expression
+LABEL_SET = object()
+GROUP_BY = object()
+
+
+class ChartQuery:
+    """
+    A chart query split around its label sets and its group by clauses.
+
+    parts is the query as a tuple of literal strings and of the LABEL_SET and GROUP_BY placeholders, labels are
+    the labels of the first label set that don't use a dashboard variable.
+    That is all render needs: the group by of the expression is the one of the alert rule, not the chart's, and the
+    metric reported for the rule is chart_metric of the raw query, which keeps the labels of every set, so neither
+    is kept here.
+    """
+    __slots__ = ('parts', 'labels')
+
+    def __init__(self, parts: tuple, labels: tuple):
+        self.parts = parts
+        self.labels = labels
+
+    @property
+    def label_filters(self) -> str:
+        return ','.join(self.labels).strip()
+
+    def render(self, group_by: list, filters: str) -> str:
+        """
+        The query with every label set replaced by the fixed labels followed by filters, and every group by
+        clause grouping by group_by
+        """
+        label_set = '{' + self.label_filters + filters + '}'
+        group_by_clause = 'by (' + ','.join(group_by) + ')'
+        rendered = []
+        for part in self.parts:
+            if part is LABEL_SET:
+                rendered.append(label_set)
+            elif part is GROUP_BY:
+                rendered.append(group_by_clause)
+            else:
+                rendered.append(part)
+        return ''.join(rendered)
+
+
+def _split_group_by(text: str, parts: list):
+    position = 0
+    for match in _GROUP_BY_RE.finditer(text):
+        parts.append(text[position:match.start()])
+        parts.append(GROUP_BY)
+        position = match.end()
+    parts.append(text[position:])
+
+
+@lru_cache(maxsize=256)
+def parse_chart_query(query: str):
+    """
+    Parse a chart query into a ChartQuery. The result is memoised by the query text, so the charts of a play are
+    parsed once whatever the number of alert rules pointing to them, and an edited chart is parsed again.
+    Returns None if the query has no label set.
+    """
+    first = _LABEL_SET_RE.search(query)
+    if first is None:
+        return None
+
+    parts = []
+    position = 0
+    for match in _LABEL_SET_RE.finditer(query):
+        _split_group_by(query[position:match.start()], parts)
+        parts.append(LABEL_SET)
+        position = match.end()
+    _split_group_by(query[position:], parts)
+
+    labels = tuple(label for label in (label.strip() for label in first.group(1).split(',')) if '$' not in label)
+    return ChartQuery(tuple(part for part in parts if part != ''), labels)
+
+
+def alert_filters(params: dict) -> str:
+    """
+    The label filters added by the alert rule options, each one preceded by a comma
+    """
+    return ''.join(f",{name}='{','.join(params[name])}'" for name in ALERT_FILTERS if params[name])
+
+
+def render_alert_expr(query: ChartQuery, params: dict) -> str:
+    """
+    The expression of a metric alert rule built on the chart query
+    """
+    return (query.render(params['group_by'], alert_filters(params))
+            + " " + params['operator'] + " " + str(params['warning_value']))
+
+
+@lru_cache(maxsize=256)
+def chart_metric(query: str) -> str:
+    """
+    The metric shown for a chart query: without the labels set from the dashboard variables and grouped by dc
+    """
+    # remove var similar to: dc=~'$dc',rack=~'$rack', host_id=~'$host_id'
+    metric = _TEMPLATE_LABEL_RE.sub('', query)
+    # remove eventual last comma
+    metric = _TRAILING_COMMA_RE.sub('}', metric)
+    # remove eventual multiple spaces
+    metric = _SPACES_RE.sub(' ', metric)
+    # change ($groupBy) to (dc)
+    return metric.replace('($groupBy)', '(dc)')
+
+
+def strip_threshold(expr: str) -> str:
+    """
+    The metric of an alert expression, without the trailing operator and value
+    """
+    return _THRESHOLD_RE.sub('', expr)
@@ -0,0 +1,394 @@
+import uuid
+
+from .axonops_alert_expr import alert_filters, chart_metric, parse_chart_query, render_alert_expr, strip_threshold
+from .axonops_dashboards import DashboardIndex
+from .axonops_utils import dicts_are_different, find_by_field, get_value_by_name, normalize_numbers
+
+
+def alert_rule_args() -> dict:
+    """
+    Arguments describing a single metric alert rule, shared by alert_rule and alert_rules
+    """
+    return {
+        'name': {'type': 'str', 'default': ''},
+        'description': {'type': 'str', 'default': ''},
+        'dashboard': {'type': 'str', 'required': True},
+        'chart': {'type': 'str', 'required': True},
+        'metric': {'type': 'str', 'default': ''},
+        'operator': {'type': 'str', 'choices': ['==', '>=', '>', '<=', '<', '!=']},
+        'warning_value': {'type': 'float'},
+        'critical_value': {'type': 'float'},
+        'duration': {'type': 'str'},
+        'url_filter': {'type': 'str', 'default': ''},
+        'scope': {'type': 'list', 'default': []},
+        'dc': {'type': 'list', 'default': []},
+        'rack': {'type': 'list', 'default': []},
+        'host_id': {'type': 'list', 'default': []},
+        'group_by': {'type': 'list', 'default': [], 'choices': ['dc', 'host_id', 'rack', 'scope', []]},
+        'routing': {'type': 'dict', 'default': {}},
+        'present': {'type': 'bool', 'default': True},
+        'percentile': {'type': 'list', 'default': [],
+                       'choices': ['', '75thPercentile', '95thPercentile', '98thPercentile', '99thPercentile',
+                                   '999thPercentile']},
+        'consistency': {'type': 'list', 'default': [],
+                        'choices': ['', 'ALL', 'ANY', 'ONE', 'TWO', 'THREE', 'SERIAL', 'QUORUM', 'EACH_QUORUM',
+                                    'LOCAL_ONE', 'LOCAL_QUORUM', 'LOCAL_SERIAL']},
+        'keyspace': {'type': 'list', 'default': []},
+        'chart_query_index': {'type': 'int', 'default': 0}
+    }
+
+
+# an alert rule that must be present needs the full threshold definition
+alert_rule_required_if = [
+    ('present', True, ('operator', 'warning_value', 'critical_value', 'duration'))
+]
+
+
+def alert_rules_url(org: str, cluster_type: str, cluster: str) -> str:
+    return f"/api/v1/alert-rules/{org}/{cluster_type}/{cluster}"
+
+
+def dashboard_templates_url(org: str, cluster_type: str, cluster: str) -> str:
+    return f"/api/v1/dashboardtemplate/{org}/{cluster_type}/{cluster}"
+
+
+def get_alert_rules(axonops, alerts_url: str, names) -> tuple:
+    """
+    The existing metric alert rules called one of names, the others are dropped as they are read.
+    Returns a tuple (alerts, error), alerts is shaped like the document of the alert rules API
+    """
+    names = set(names)
+    rules, error = axonops.get_items(alerts_url, ('metricrules',),
+                                     keep=lambda rule: rule if rule.get('alert') in names else None)
+    if error is not None:
+        return None, error
+    return {'metricrules': rules}, None
+
+
+def get_dashboard_index(axonops, dash_templates_url: str) -> tuple:
+    """
+    The dashboard templates of the cluster.
+    Returns a tuple (DashboardIndex, error)
+    """
+    dashboards, error = axonops.get_items(dash_templates_url, ('dashboards',))
+    if error is not None:
+        return None, error
+    return DashboardIndex({'dashboards': dashboards}), None
+
+
+def plan_alert_rule(axonops, cluster: str, params: dict, existing_alerts: dict, dashboards: DashboardIndex):
+    """
+    Compare the requested alert rule with the existing ones and work out the request needed to apply it.
+    Returns a tuple (result, request, error):
+    - result is the module result (changed, diff and the details of the computation)
+    - request is None if nothing has to be done, otherwise the kwargs for AxonOps.do_request
+    - error is a message if the rule can't be applied
+    """
+    result = {
+        'changed': False,
+    }
+
+    org = axonops.org_name
+    consistency = params["consistency"]
+    percentile = params["percentile"]
+    alert_name = params['name'] or params['chart']
+    url_filter = params['url_filter'] or 'time=30'
+    alerts_url = alert_rules_url(org, axonops.get_cluster_type(), cluster)
+
+    # Find the referenced dashboard by name
+    new_dash = dashboards.find_dashboard(params['dashboard'])
+    if not new_dash:
+        return result, None, f"Could not find dashboard '{params['dashboard']}' in AxonOps"
+
+    # Find the referenced chart in the dashboard
+    new_charts = dashboards.find_charts(new_dash, params['chart'])
+    new_chart = None
+    if new_charts is None:
+        return result, None, f"Could not find chart '{params['chart']}' in AxonOps"
+    # if new_charts is a list of elements, we have more than one charts and we need to choose the correct one
+    elif isinstance(new_charts, list):
+        result['response'] = new_charts
+
+        for chart in new_charts:
+            # if the chart has a query, use it
+            if chart['details']['queries']:
+                new_chart = chart
+                break
+            # if we find type == 'events_timeline', use it
+            if chart.get('type') == 'events_timeline':
+                new_chart = chart
+                break
+    else:
+        # if it is not a list, we have a single element, we can use it directly
+        new_chart = new_charts
+
+    # Validate chart_query_index once, here, while the chart is in hand.
+    # Both downstream uses (the metric-derivation branch below and the
+    # expression-build path further down) index into the same queries[] array,
+    # so checking once keeps the two paths consistent and the error message
+    # close to the YAML field that controls it.
+    chart_query_index = params['chart_query_index']
+    _chart_queries = (new_chart.get('details') or {}).get('queries') or []
+    if _chart_queries and not (0 <= chart_query_index < len(_chart_queries)):
+        return result, None, (f"chart_query_index {chart_query_index} out of range for chart "
+                               f"'{params['chart']}' (has {len(_chart_queries)} queries)")
+
+    raw_query = None
+    # check if it is an event base alert rather than metrics
+    new_chart_filters = None
+    if new_chart.get('type') == 'events_timeline':
+        metric = ''
+        new_chart_filters = new_chart['details']['filters']
+
+    # if it is not, get the chart query if not specified in the params
+    elif not params['metric']:
+        try:
+            raw_query = new_chart['details']['queries'][chart_query_index]['query']
+        except (TypeError, IndexError):
+            return result, None, 'Failed getting the metric query from the specified chart'
+
+        metric = chart_metric(raw_query)
+
+    else:
+        metric = params['metric']
+
+    # Find the existing alert (if present)
+    old_alert = find_by_field(existing_alerts.get('metricrules'), 'alert', alert_name)
+
+    # Bail out early if the alert doesn't exist, and we don't want it to
+    if not old_alert and not params['present']:
+        return result, None, None
+
+    old_alert_exp = None
+    if old_alert:
+        # Find the current dashboard and widget by parsing the widget url
+        widget_parts = old_alert['annotations']['widget_url'].split('/')
+        old_dash_uuid = None
+        old_widget_uuid = None
+        old_url_filter = None
+        old_dash_name = None
+        old_chart_name = None
+        if len(widget_parts) >= 6:
+            uuid_parts = widget_parts[5].split('?')
+            old_dash_uuid = uuid_parts[0]
+            if len(uuid_parts) > 1:
+                parts2 = uuid_parts[1].split('&')
+                if parts2[0].startswith("uuid="):
+                    old_widget_uuid = parts2[0][5:]
+                else:
+                    old_widget_uuid = parts2[0]
+                if len(parts2) > 1:
+                    old_url_filter = parts2[1]
+
+        if old_dash_uuid:
+            old_dash = dashboards.find_dashboard_by_uuid(old_dash_uuid)
+            if old_dash:
+                old_dash_name = old_dash.get('name')
+                if old_widget_uuid:
+                    old_chart = dashboards.find_chart_by_uuid(old_dash, old_widget_uuid)
+                    if old_chart:
+                        old_chart_name = old_chart['title']
+        if not old_chart_name:
+            old_chart_name = old_alert.get('alert')
+
+        # Trim the last 2 space-separated sections from the string because they will be the operator and value.
+        # This should leave just the metric
+        old_alert_exp = old_alert['expr']
+        metric = strip_threshold(old_alert_exp)
+
+        # set the routing and clean the old integration
+        old_integrations = old_alert.get('integrations', {})
+        if old_integrations:
+            old_integrations.pop('Type', None)
+            old_integrations.pop('OverrideError', None)
+            old_integrations.pop('OverrideInfo', None)
+            old_integrations.pop('OverrideWarning', None)
+            for route_item in old_integrations.get('Routing') or []:
+                route_item.pop('Params', None)
+
+        old_data = {
+            'name': old_alert.get('alert'),
+            'description': old_alert.get('annotations', {}).get('description', ''),
+            'dashboard': old_dash_name,
+            'chart': old_chart_name,
+            'metric': metric,
+            'operator': old_alert.get('operator', ''),
+            'warning_value': old_alert.get('warningValue', ''),
+            'critical_value': old_alert.get('criticalValue', ''),
+            'duration': old_alert.get('for', ''),
+            'url_filter': old_url_filter or '',
+            'scope': get_value_by_name(old_alert.get('filters', []), 'scope') or [],
+            'dc': get_value_by_name(old_alert.get('filters', []), 'dc') or [],
+            'rack': get_value_by_name(old_alert.get('filters', []), 'rack') or [],
+            'host_id': get_value_by_name(old_alert.get('filters', []), 'host_id') or [],
+            'group_by': get_value_by_name(old_alert.get('filters', []), 'groupBy') or [],
+            'percentile': get_value_by_name(old_alert.get('filters', []), 'percentile') or [],
+            'consistency': get_value_by_name(old_alert.get('filters', []), 'consistency') or [],
+            'keyspace': get_value_by_name(old_alert.get('filters', []), 'keyspace') or [],
+            'integrations': old_integrations,
+            'present': True
+        }
+        result['old_data'] = old_data
+
+    else:
+        old_data = {'present': False}
+
+    old_data_normalized = normalize_numbers(old_data)
+
+    if params['present']:
+        new_data = {
+            'name': alert_name,
+            'description': params['description'],
+            'dashboard': params['dashboard'],
+            'chart': params['chart'],
+            'metric': metric,
+            'operator': params['operator'],
+            'warning_value': params['warning_value'],
+            'critical_value': params['critical_value'],
+            'duration': params['duration'],
+            'url_filter': url_filter,
+            'dc': params['dc'],
+            'rack': params['rack'],
+            'host_id': params['host_id'],
+            'group_by': params['group_by'],
+            'percentile': percentile,
+            'consistency': consistency,
+            'keyspace': params['keyspace'],
+            'scope': params['scope'],
+            'present': True,
+            'integrations': {}
+        }
+    else:
+        new_data = {
+            'name': alert_name,
+            'dashboard': params['dashboard'],
+            'chart': params['chart'],
+            'integrations': {},
+            'present': False,
+        }
+
+    # create routing override list
+    routing = []  # format [{id: 'id33s', severity: 'error'},...]
+    for severity in params['routing']:
+        for override in params['routing'][severity]:
+            integration_id, error = axonops.find_integration_id_by_name(cluster, override)
+            if error is not None:
+                return result, None, error
+            routing.append({
+                'ID': integration_id if integration_id else "",
+                'Severity': severity,
+            })
+    if routing:
+        new_data['integrations']['Routing'] = routing
+    elif 'integrations' in new_data:
+        new_data['integrations']['Routing'] = []
+
+    new_data_normalized = normalize_numbers(new_data)
+
+    # Set up alert expression, only needed when the alert has to be there
+    new_expression = None
+    if not params['present']:
+        pass
+    elif new_chart['details']['queries']:
+        # chart_query_index was bounds-checked once near the top, when new_chart
+        # was first finalized; safe to index directly.
+        chart_query = parse_chart_query(new_chart['details']['queries'][chart_query_index]['query'])
+        if chart_query is None:
+            return result, None, f"The query of the chart '{params['chart']}' has no label filters"
+
+        result['existing_filters'] = chart_query.label_filters
+        result['to_apply_filters'] = chart_query.label_filters + alert_filters(params)
+        new_expression = render_alert_expr(chart_query, params)
+        result['new_expression'] = new_expression
+        result['new_data'] = new_data
+    elif new_chart.get('type') == 'events_timeline':
+        filters = []
+        if params['host_id']:
+            host_id_list = ",".join(params['host_id'])
+            filters.append(f"host_id='{host_id_list}'")
+        else:
+            filters.append("host_id=''")
+        if new_chart_filters.get('level'):
+            filters.append(f"level='{new_chart_filters['level']}'")
+        if new_chart_filters['type']:
+            filters.append(f"type='{new_chart_filters['type']}'")
+        expression = ','.join(filters)
+        new_expression = ("events{" + expression + "} "
+                          + params['operator'] + " "
+                          + str(params['warning_value']))
+    else:
+        return result, None, "The alert is not looking as metric or event either. Not implemented"
+
+    changed = dicts_are_different(new_data_normalized, old_data_normalized)
+
+    # if the 2 queries are present and different sign it as changed
+    if new_expression and old_alert_exp and new_expression != old_alert_exp:
+        changed = True
+
+    result['changed'] = changed
+    result['diff'] = {'before': old_data_normalized, 'after': new_data_normalized}
+
+    if not changed:
+        return result, None, None
+
+    # Delete the alert rule if present is False
+    if not params['present']:
+        return result, {'rel_url': alerts_url + '/' + old_alert["id"], 'method': 'DELETE'}, None
+
+    # Create or update the alert rule
+    payload = {
+        'alert': alert_name,
+        'for': params['duration'],
+        'operator': params['operator'],
+        'warningValue': params['warning_value'],
+        'criticalValue': params['critical_value'],
+        'annotations': {
+            'description': params['description'],
+            'summary': "%s is %s than %s (current value: {{$value}})" % (
+                alert_name, params['operator'], params['warning_value']),
+            'widget_url': "/%s/%s/%s/performance/%s?uuid=%s&%s" % (
+                org, axonops.get_cluster_type(), cluster, new_dash['uuid'], new_chart['uuid'], url_filter),
+        },
+        'integrations': new_data['integrations'],
+        'expr': new_expression,
+        'widgetTitle': params['chart'],
+        'id': old_alert["id"] if old_alert else str(uuid.uuid4()),
+        'correlationId': new_chart['uuid'],
+        'filters': [
+            {
+                "Name": "consistency",
+                "Value": consistency
+            },
+            {
+                "Name": "percentile",
+                "Value": percentile
+            },
+            {
+                "Name": "keyspace",
+                "Value": params['keyspace']
+            },
+            {
+                "Name": "scope",
+                "Value": params['scope']
+            },
+            {
+                "Name": "dc",
+                "Value": params["dc"]
+            },
+            {
+                "Name": "rack",
+                "Value": params["rack"]
+            },
+            {
+                "Name": "host_id",
+                "Value": params["host_id"]
+            },
+            {
+                "Name": "groupBy",
+                "Value": params["group_by"]
+            }
+        ]
+    }
+
+    result['payload'] = {'payload': payload}
+    return result, {'rel_url': alerts_url, 'method': 'POST', 'json_data': payload}, None
@@ -0,0 +1,391 @@
+import base64
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from .axonops_flight import url_family
+
+
+def default_cache_dir() -> str:
+    return os.path.join(os.path.expanduser('~'), '.cache', 'axonops')
+
+
+def jwt_expiry(token: str):
+    """
+    Return the expiry time (epoch seconds) written in the JWT 'exp' claim, or None if it can't be read
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+@contextmanager
+def locked(lock_path: str, shared: bool = False):
+    """
+    Hold an flock on lock_path for the duration of the block
+    """
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def write_private_file(path: str, content: bytes):
+    """
+    Atomically replace path with content, readable only by the owner
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        try:
+            os.write(fd, content)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class TokenCache:
+    """
+    Keep the JWTs returned by /api/login on disk, so that the following module invocations can reuse them
+    instead of logging in again. The tokens are stored in a single file (mode 0600) and every access is
+    serialised with a file lock. When cache_dir can't be written, e.g. read-only or full, the tokens aren't cached.
+    """
+    # consider the token expired a bit before the real expiry, so it doesn't expire in the middle of a task
+    expiry_margin = 60
+
+    def __init__(self, cache_dir: str = ''):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.path = os.path.join(self.cache_dir, 'tokens.json')
+        self.lock_path = os.path.join(self.cache_dir, 'tokens.lock')
+        # the tokens invalidated while the file couldn't be written, not to be returned again
+        self._rejected = set()
+
+    @staticmethod
+    def make_key(base_url: str, org: str, username: str) -> str:
+        return hashlib.sha256(f"{base_url}\n{org}\n{username}".encode('utf-8')).hexdigest()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str):
+        """
+        Return the cached token for key, or None if missing or expired
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with locked(self.lock_path, shared=True):
+                token = self._read().get(key)
+        except OSError:
+            return None
+        if not token or token in self._rejected:
+            return None
+        expiry = jwt_expiry(token)
+        if expiry is not None and expiry - self.expiry_margin <= time.time():
+            return None
+        return token
+
+    def put(self, key: str, token: str):
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            with locked(self.lock_path):
+                tokens = self._read()
+                tokens[key] = token
+                # drop the expired tokens while we are here
+                now = time.time()
+                tokens = {k: v for k, v in tokens.items() if (jwt_expiry(v) or now + 1) > now}
+                write_private_file(self.path, json.dumps(tokens).encode('utf-8'))
+        except OSError:
+            pass
+
+    def invalidate(self, key: str):
+        if not os.path.exists(self.path):
+            return
+        token = None
+        try:
+            with locked(self.lock_path):
+                tokens = self._read()
+                token = tokens.pop(key, None)
+                if token is not None:
+                    write_private_file(self.path, json.dumps(tokens).encode('utf-8'))
+        except OSError:
+            if token is not None:
+                self._rejected.add(token)
+
+
+class CachedResponse:
+    """
+    A GET response kept by the ResponseCache, with the validators needed to revalidate it
+    """
+
+    def __init__(self, url: str, body: bytes, etag: str = None, last_modified: str = None, stored: float = None):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored = time.time() if stored is None else stored
+
+    def meta(self) -> dict:
+        return {'url': self.url, 'etag': self.etag, 'last_modified': self.last_modified, 'stored': self.stored}
+
+
+class ResponseCache:
+    """
+    Read-through cache for the GET responses of the AxonOps API.
+
+    The responses are kept in memory, and optionally on disk under cache_dir so that the following module
+    invocations can use them too. A response younger than ttl seconds is returned without asking the server,
+    an older one is revalidated with If-None-Match / If-Modified-Since when the server sent an ETag or a
+    Last-Modified header. Both tiers are bounded to max_bytes, evicting the least recently used responses.
+    A PUT/POST/DELETE invalidates every cached response of the same API resource.
+    The disk tier is dropped for the rest of the run when cache_dir can't be written, e.g. read-only or full.
+    """
+
+    def __init__(self, ttl: float = 30, max_bytes: int = 64 * 1024 * 1024, disk: bool = False, cache_dir: str = '',
+                 scope: str = ''):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # responses depend on who is asking, the scope keeps apart the entries of different credentials on disk
+        self.scope = scope
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.disk_dir = os.path.join(cache_dir or default_cache_dir(), 'responses') if disk else None
+        self.lock_path = os.path.join(self.disk_dir, 'responses.lock') if disk else None
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(f"{self.scope}\n{url}".encode('utf-8')).hexdigest()
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.stored < self.ttl
+
+    def get(self, url: str):
+        """
+        Return the cached response for url, fresh or not, or None
+        """
+        key = self._key(url)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+
+        entry = self._disk_get(key)
+        if entry is not None:
+            self._memory_put(key, entry)
+        return entry
+
+    def put(self, url: str, body: bytes, etag: str = None, last_modified: str = None):
+        key = self._key(url)
+        entry = CachedResponse(url, body, etag, last_modified)
+        self._memory_put(key, entry)
+        self._disk_put(key, entry)
+
+    def revalidated(self, url: str, entry: CachedResponse):
+        """
+        The server confirmed the cached response is still valid
+        """
+        entry.stored = time.time()
+        self._disk_put(self._key(url), entry)
+
+    def invalidate(self, url: str):
+        """
+        Drop all the responses of the API resource url belongs to
+        """
+        family = url_family(url)
+        with self._lock:
+            for key in [k for k, v in self._memory.items() if url_family(v.url) == family]:
+                self._memory_bytes -= len(self._memory.pop(key).body)
+        self._disk_invalidate(family)
+
+    def _memory_put(self, key: str, entry: CachedResponse):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old.body)
+            self._memory[key] = entry
+            self._memory_bytes += len(entry.body)
+            while self._memory_bytes > self.max_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted.body)
+
+    # every disk entry is a file with the metadata on the first line, followed by the raw body
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.cache")
+
+    @staticmethod
+    def _disk_read(path: str):
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                return CachedResponse(meta['url'], f.read(), meta.get('etag'), meta.get('last_modified'),
+                                      meta.get('stored'))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _disk_get(self, key: str):
+        if self.disk_dir is None or not os.path.exists(self._disk_path(key)):
+            return None
+        path = self._disk_path(key)
+        try:
+            with locked(self.lock_path, shared=True):
+                entry = self._disk_read(path)
+        except OSError:
+            self.disk_dir = None
+            return None
+        if entry is not None:
+            try:
+                # the modification time is the last use, for the LRU eviction
+                os.utime(path)
+            except OSError:
+                pass
+        return entry
+
+    def _disk_put(self, key: str, entry: CachedResponse):
+        if self.disk_dir is None or len(entry.body) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.disk_dir, mode=0o700, exist_ok=True)
+            with locked(self.lock_path):
+                write_private_file(self._disk_path(key),
+                                   json.dumps(entry.meta()).encode('utf-8') + b'\n' + entry.body)
+                self._disk_evict()
+        except OSError:
+            self.disk_dir = None
+
+    def _disk_entries(self):
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.cache'):
+                yield os.path.join(self.disk_dir, name)
+
+    def _disk_evict(self):
+        files = []
+        for path in self._disk_entries():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _disk_invalidate(self, family: str):
+        if self.disk_dir is None or not os.path.isdir(self.disk_dir):
+            return
+        try:
+            with locked(self.lock_path):
+                for path in self._disk_entries():
+                    try:
+                        with open(path, 'rb') as f:
+                            url = json.loads(f.readline())['url']
+                    except (OSError, ValueError, KeyError):
+                        url = None
+                    if url is None or url_family(url) == family:
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+        except OSError:
+            # the responses left on disk are out of date, don't read them any more
+            self.disk_dir = None
+
+
+def fingerprint(data) -> str:
+    """
+    sha256 of the canonical JSON serialisation of data: the same content gives the same fingerprint
+    whatever the order of the keys
+    """
+    canonical = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Keep on disk the fingerprint of the desired state last applied to every resource, so that a module
+    can tell the configuration hasn't been edited since and skip downloading and comparing the remote objects.
+    The fingerprints are stored in a single file under cache_dir and every access is serialised with a file lock.
+    When a fingerprint can't be written, e.g. cache_dir is read-only or full, the store is no longer used for the
+    rest of the run and the previous fingerprint of the resource is dropped if possible, so it isn't matched later.
+    """
+
+    def __init__(self, cache_dir: str = ''):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.path = os.path.join(self.cache_dir, 'fingerprints.json')
+        self.lock_path = os.path.join(self.cache_dir, 'fingerprints.lock')
+        self.disabled = False
+
+    @staticmethod
+    def make_key(*resource) -> str:
+        return hashlib.sha256('\n'.join(str(part) for part in resource).encode('utf-8')).hexdigest()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key: str):
+        if self.disabled or not os.path.exists(self.path):
+            return None
+        try:
+            with locked(self.lock_path, shared=True):
+                return self._read().get(key)
+        except OSError:
+            return None
+
+    def put(self, key: str, value: str):
+        if self.disabled:
+            return
+        try:
+            os.makedirs(self.cache_dir, mode=0o700, exist_ok=True)
+            with locked(self.lock_path):
+                fingerprints = self._read()
+                if fingerprints.get(key) == value:
+                    return
+                fingerprints[key] = value
+                write_private_file(self.path, json.dumps(fingerprints).encode('utf-8'))
+        except OSError:
+            self.disabled = True
+            self.invalidate(key)
+
+    def invalidate(self, key: str):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with locked(self.lock_path):
+                fingerprints = self._read()
+                if fingerprints.pop(key, None) is not None:
+                    write_private_file(self.path, json.dumps(fingerprints).encode('utf-8'))
+        except OSError:
+            self.disabled = True
@@ -0,0 +1,149 @@
+from .axonops_utils import dicts_are_different
+
+
+def dashboard_args() -> dict:
+    """
+    Arguments describing a single dashboard template, shared by dashboard_template and dashboard_templates
+    """
+    return {
+        'present': {'type': 'bool', 'required': False, 'default': True},
+        'name': {'type': 'str', 'required': True},
+        'filters': {'type': 'list', 'required': False},
+        'panels': {'type': 'list', 'required': False},
+    }
+
+
+def dashboard_template_url(org: str, cluster_type: str, cluster: str) -> str:
+    # e.g  http://127.0.0.1:3000/api/v1/dashboardtemplate/demo/cassandra/demo-cluster
+    return f"/api/v1/dashboardtemplate/{org}/{cluster_type}/{cluster}?dashver=2.0"
+
+
+def desired_dashboard(params: dict) -> dict:
+    return {
+        'present': params['present'],
+        'name': params['name'],
+        'filters': params.get('filters'),
+        'panels': params.get('panels'),
+    }
+
+
+def dashboard_data(dashboard) -> dict:
+    """
+    The fields of an existing dashboard compared with the desired one
+    """
+    if dashboard is None:
+        return {
+            'present': False,
+            'name': None,
+            'filters': None,
+            'panels': None,
+        }
+    return {
+        'present': True,
+        'name': dashboard['name'],
+        'filters': dashboard.get('filters'),
+        'panels': dashboard.get('panels'),
+    }
+
+
+def merge_dashboards(existing: list, desired: list):
+    """
+    Apply the desired dashboards to the list of existing ones in a single pass.
+
+    A dashboard that already exists is replaced in place so the order of the list doesn't change, a new one is
+    appended at the end and one with present false is removed. When a dashboard is listed twice in desired the
+    last entry wins, like applying them one after the other.
+    Returns a tuple (dashboards, outcomes): the list to send and, in the order of desired, a dict per dashboard
+    with its name, changed, action (none, create, update or delete) and the before/after data for the diff.
+    """
+    wanted = {}
+    for dashboard in desired:
+        wanted.pop(dashboard['name'], None)
+        wanted[dashboard['name']] = dashboard
+
+    # the existing dashboards, with the name in place of the ones we manage until we know what to do with them
+    slots = []
+    found = {}
+    for dashboard in existing or []:
+        name = dashboard.get('name')
+        if name not in wanted:
+            slots.append((None, dashboard))
+        elif name not in found:
+            found[name] = dashboard
+            slots.append((name, dashboard))
+        # any other dashboard with the same name is a duplicate of the one we manage and is dropped
+
+    outcomes = {}
+    for name, new_data in wanted.items():
+        old_data = dashboard_data(found.get(name))
+        if not new_data['present']:
+            action = 'delete' if old_data['present'] else 'none'
+        elif not old_data['present']:
+            action = 'create'
+        elif dicts_are_different(new_data, old_data):
+            action = 'update'
+        else:
+            action = 'none'
+        outcomes[name] = {
+            'name': name,
+            'changed': action != 'none',
+            'action': action,
+            'before': old_data,
+            'after': new_data,
+        }
+
+    dashboards = []
+    for name, dashboard in slots:
+        if name is None or outcomes[name]['action'] == 'none':
+            dashboards.append(dashboard)
+        elif outcomes[name]['action'] == 'update':
+            dashboards.append(outcomes[name]['after'])
+    dashboards.extend(outcome['after'] for outcome in outcomes.values() if outcome['action'] == 'create')
+
+    return dashboards, list(outcomes.values())
+
+
+def _group_by_field(dicts, field) -> dict:
+    groups = {}
+    for d in dicts or []:
+        groups.setdefault(d.get(field), []).append(d)
+    return groups
+
+
+def _matches(groups: dict, value):
+    # the same result as find_by_field: None, the only match or the list of all the matches
+    matches = groups.get(value)
+    if not matches:
+        return None
+    return matches[0] if len(matches) == 1 else matches
+
+
+class DashboardIndex:
+    """
+    Hash indexes over the dashboards returned by the dashboard template API, built once per fetch so that
+    resolving the dashboards and charts of many alert rules doesn't scan all of them for every rule. Every
+    lookup returns what find_by_field would: None, the only match or the list of the matches.
+    """
+
+    def __init__(self, dash_templates: dict):
+        self.dashboards = (dash_templates or {}).get('dashboards') or []
+        self.by_name = _group_by_field(self.dashboards, 'name')
+        self.by_uuid = _group_by_field(self.dashboards, 'uuid')
+        # the charts indexes of every dashboard, keyed by the dashboard object as it is the one the lookups return
+        self.charts_by_title = {}
+        self.charts_by_uuid = {}
+        for dashboard in self.dashboards:
+            self.charts_by_title[id(dashboard)] = _group_by_field(dashboard.get('panels'), 'title')
+            self.charts_by_uuid[id(dashboard)] = _group_by_field(dashboard.get('panels'), 'uuid')
+
+    def find_dashboard(self, name):
+        return _matches(self.by_name, name)
+
+    def find_dashboard_by_uuid(self, dashboard_uuid):
+        return _matches(self.by_uuid, dashboard_uuid)
+
+    def find_charts(self, dashboard: dict, title):
+        return _matches(self.charts_by_title.get(id(dashboard), {}), title)
+
+    def find_chart_by_uuid(self, dashboard: dict, chart_uuid):
+        return _matches(self.charts_by_uuid.get(id(dashboard), {}), chart_uuid)
@@ -0,0 +1,79 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+
+def run_per_cluster(clusters: List[str], fn: Callable, parallelism: int = 4) -> dict:
+    """
+    Call fn(cluster) for every cluster, with at most parallelism calls running at the same time.
+
+    fn returns a (result, error) tuple like the AxonOps client methods. A cluster failing, even with an
+    exception, doesn't stop the others: its error is reported in its own entry.
+    Returns a dict of cluster -> (result, error), in the same order as clusters.
+    """
+    def call(cluster):
+        try:
+            return fn(cluster)
+        except Exception as e:
+            return None, f"{e}\n{traceback.format_exc()}"
+
+    # the same cluster listed twice would be reconciled twice at the same time
+    clusters = list(dict.fromkeys(clusters))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(clusters) or 1))) as executor:
+        futures = {cluster: executor.submit(call, cluster) for cluster in clusters}
+        return {cluster: future.result() for cluster, future in futures.items()}
+
+
+def add_item_outcomes(result: dict, item_key: str, outcomes: list, fields=('name', 'changed', 'action'),
+                      header: Callable = None):
+    """
+    Add the outcome of every item of a cluster to its result: the fields of the outcome go in result[item_key],
+    and the changed items set result['changed'] and add their before/after to result['diff'].
+    header(outcome) gives the diff header, the name of the item by default.
+    """
+    for outcome in outcomes:
+        result[item_key].append({field: outcome[field] for field in fields})
+        if outcome['changed']:
+            result['changed'] = True
+            name = header(outcome) if header else outcome['name']
+            result['diff'].append({
+                'before_header': name,
+                'after_header': name,
+                'before': outcome['before'],
+                'after': outcome['after'],
+            })
+
+
+def aggregate_cluster_outcomes(outcomes: dict, item_key: str, what: str):
+    """
+    Merge the results returned by run_per_cluster into the result of the module.
+
+    Every cluster gets its own entry in result['clusters'] with its changed flag and its items in item_key, and the
+    diff headers are prefixed with the cluster name. what is used in the error, e.g. "set the dashboards".
+    Returns the module result and an error message naming the clusters that failed, or None
+    """
+    result = {
+        'changed': False,
+        'clusters': {},
+        'diff': [],
+    }
+    failed = []
+    for name, (cluster_result, error) in outcomes.items():
+        cluster_result = cluster_result or {'changed': False, item_key: []}
+        result['clusters'][name] = {'changed': cluster_result['changed'], item_key: cluster_result[item_key]}
+        if cluster_result.get('fingerprint_matched'):
+            result['clusters'][name]['fingerprint_matched'] = True
+        if cluster_result['changed']:
+            result['changed'] = True
+        for diff in cluster_result.get('diff', []):
+            result['diff'].append({**diff,
+                                   'before_header': f"{name}: {diff['before_header']}",
+                                   'after_header': f"{name}: {diff['after_header']}"})
+        if error is not None:
+            result['clusters'][name].update({'failed': True, 'msg': error})
+            failed.append(name)
+
+    if failed:
+        return result, f"Failed to {what} on {len(failed)} of {len(outcomes)} clusters: " + ', '.join(failed)
+    return result, None
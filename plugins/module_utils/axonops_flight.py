@@ -0,0 +1,71 @@
+import re
+import threading
+
+
+def url_family(url: str) -> str:
+    """
+    The part of the path the invalidation works on, /api/v1/integrations-routing/org/... -> /api/v1/integrations.
+    The path before /api/vN/ is kept, it is the org (AxonOps Cloud) or /dashboard (SAML) in front of the API
+    """
+    path = '/' + url.split('://', 1)[-1].split('/', 1)[-1].split('?', 1)[0].lstrip('/')
+    parts = path.split('/')
+    for i in range(1, len(parts) - 2):
+        if parts[i] == 'api' and re.fullmatch(r'v[0-9]+', parts[i + 1]):
+            return '/'.join(parts[:i + 2] + [parts[i + 2].split('-')[0]])
+    return path
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses the concurrent calls made for the same key: the first caller runs the call and the ones arriving
+    while it is in flight wait for it and share its result, or its exception. Thread safe.
+
+    The keys are URLs, or tuples starting with the URL. forget detaches the calls in flight for a URL family, so
+    that the callers arriving after a change of the resource don't get what was read before it.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, call):
+        """
+        Returns a tuple (result of the call, True if it was shared with a call already in flight)
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = call()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    def forget(self, url: str):
+        family = url_family(url)
+        with self._lock:
+            for key in list(self._flights):
+                if url_family(key[0] if isinstance(key, tuple) else key) == family:
+                    del self._flights[key]
@@ -0,0 +1,314 @@
+import gzip
+import http.client
+import socket
+import ssl
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+from .axonops_retry import IDEMPOTENT_METHODS
+
+# errors raised when the server closed an idle keep-alive connection before we reused it
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, BrokenPipeError,
+                           ConnectionResetError, ConnectionAbortedError)
+
+# the compressions of the responses we can read, sent in Accept-Encoding with every request
+ACCEPT_ENCODING = 'gzip, deflate'
+
+# request bodies smaller than this are sent as they are, compressing them saves less than it costs
+COMPRESS_MIN_SIZE = 1024
+
+
+def decode_content(body: bytes, encoding: str) -> bytes:
+    """
+    The body of a response decompressed as its Content-Encoding says. A body that is not compressed, like one
+    already decompressed by open_url, is returned as it is. Raises ValueError when the body can't be decompressed
+    """
+    encoding = (encoding or '').strip().lower()
+    if not body or encoding not in ('gzip', 'x-gzip', 'deflate'):
+        return body
+    try:
+        if encoding != 'deflate':
+            return gzip.decompress(body) if body[:2] == b'\x1f\x8b' else body
+        try:
+            return zlib.decompress(body)
+        except zlib.error:
+            # some servers send the deflate stream without the zlib header
+            return zlib.decompress(body, -zlib.MAX_WBITS)
+    except (OSError, EOFError, zlib.error) as e:
+        raise ValueError(f"invalid {encoding} response body: {e}")
+
+
+class StreamDecoder:
+    """
+    Decompresses a body read in chunks as its Content-Encoding says, like decode_content does for a whole body
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = (encoding or '').strip().lower()
+        self._decompressor = None
+        self._passthrough = self.encoding not in ('gzip', 'x-gzip', 'deflate')
+
+    def decode(self, chunk: bytes) -> bytes:
+        if self._passthrough or not chunk:
+            return chunk
+        try:
+            if self._decompressor is None:
+                if self.encoding != 'deflate':
+                    if chunk[:2] != b'\x1f\x8b':
+                        self._passthrough = True
+                        return chunk
+                    self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                    return self._decompressor.decompress(chunk)
+                try:
+                    self._decompressor = zlib.decompressobj()
+                    return self._decompressor.decompress(chunk)
+                except zlib.error:
+                    # some servers send the deflate stream without the zlib header
+                    self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decompressor.decompress(chunk)
+        except zlib.error as e:
+            raise ValueError(f"invalid {self.encoding} response body: {e}")
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush() if self._decompressor is not None else b''
+
+
+def compress_body(data) -> bytes:
+    """
+    data gzipped, or None when compressing it wouldn't make it smaller
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if not data or len(data) < COMPRESS_MIN_SIZE:
+        return None
+    compressed = gzip.compress(data, compresslevel=6)
+    return compressed if len(compressed) < len(data) else None
+
+
+def accepts_gzip(headers) -> bool:
+    """
+    Whether the server said in the Accept-Encoding of a response that it takes gzipped request bodies (RFC 7694)
+    """
+    value = headers.get('Accept-Encoding') if headers is not None else None
+    for coding in (value or '').split(','):
+        name, _, params = coding.partition(';')
+        if name.strip().lower() in ('gzip', 'x-gzip'):
+            return params.replace(' ', '').lower() not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000')
+    return False
+
+
+class PooledResponse:
+    """
+    The parts of an HTTP response used by AxonOps.do_request, with the body already read, and how long it took in
+    milliseconds (see TimedConnectionMixin, ttfb and total are from the start of the request)
+    """
+
+    def __init__(self, status: int, reason: str, headers, body: bytes, timings: dict = None):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.timings = timings or {}
+
+
+class StreamedResponse:
+    """
+    A response of ConnectionPool.open, its body is read as it comes with read. close has to be called: the
+    connection goes back to the pool when the whole body was read, otherwise it is closed
+    """
+
+    def __init__(self, pool, key, connection, response, reused: bool, started: float):
+        self.status = response.status
+        self.reason = response.reason
+        self.headers = response.headers
+        self.timings = dict(connection.phases, reused=reused, ttfb=response.ttfb)
+        connection.phases = {}
+        self._pool = pool
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self._started = started
+
+    def read(self, size: int = None) -> bytes:
+        return self._response.read(size)
+
+    def close(self):
+        if self._connection is None:
+            return
+        self.timings['total'] = (time.perf_counter() - self._started) * 1000
+        # http.client closes the response once the whole body has been read
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool._checkin(self._key, self._connection)
+        else:
+            self._response.close()
+            self._connection.close()
+        self._connection = None
+
+
+class TimedConnectionMixin:
+    """
+    Connection recording in phases how long the DNS lookup, the TCP connect and the TLS handshake of its last
+    connect took, in milliseconds
+    """
+
+    def _timed_create_connection(self, address, timeout=None, source_address=None):
+        host, port = address
+        started = time.perf_counter()
+        addresses = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        resolved = time.perf_counter()
+        self.phases['dns'] = (resolved - started) * 1000
+
+        # same as socket.create_connection, trying the addresses in turn
+        error = None
+        for family, socktype, proto, _, sockaddr in addresses:
+            sock = None
+            try:
+                sock = socket.socket(family, socktype, proto)
+                if isinstance(timeout, (int, float)):
+                    sock.settimeout(timeout)
+                if source_address:
+                    sock.bind(source_address)
+                sock.connect(sockaddr)
+                self.phases['connect'] = (time.perf_counter() - resolved) * 1000
+                return sock
+            except OSError as e:
+                error = e
+                if sock is not None:
+                    sock.close()
+        raise error if error is not None else OSError(f"getaddrinfo returned no address for {host}")
+
+
+class TimedHTTPConnection(TimedConnectionMixin, http.client.HTTPConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.phases = {}
+        self._create_connection = self._timed_create_connection
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, http.client.HTTPSConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.phases = {}
+        self._create_connection = self._timed_create_connection
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.phases['tls'] = max(elapsed - self.phases.get('dns', 0) - self.phases.get('connect', 0), 0)
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP(S) connections to the AxonOps server, so that a module (or a loop of modules running on the
+    controller) does the TCP and TLS handshakes once instead of once per request.
+
+    Up to size idle connections are kept for every scheme/host/port. The pool is thread safe: a connection is
+    used by one request at a time and a request that finds no idle connection opens a new one.
+    """
+
+    def __init__(self, size: int = 4, timeout: float = 30, validate_certs: bool = True):
+        self.size = size
+        self.timeout = timeout
+        self.validate_certs = validate_certs
+        self._idle = {}
+        self._lock = threading.Lock()
+        self._ssl_context = None
+
+    def handles(self, url: str) -> bool:
+        """
+        Only direct connections are pooled, when a proxy applies the request is left to open_url
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https'):
+            return False
+        return parts.scheme not in getproxies() or bool(proxy_bypass(parts.hostname or ''))
+
+    def _get_ssl_context(self):
+        if self._ssl_context is None:
+            context = ssl.create_default_context()
+            if not self.validate_certs:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            self._ssl_context = context
+        return self._ssl_context
+
+    def _new_connection(self, key):
+        scheme, host, port = key
+        if scheme == 'https':
+            return TimedHTTPSConnection(host, port, timeout=self.timeout, context=self._get_ssl_context())
+        return TimedHTTPConnection(host, port, timeout=self.timeout)
+
+    def _checkout(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._new_connection(key), False
+
+    def _checkin(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.size:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def request(self, method: str, url: str, headers: dict, body: bytes = None) -> PooledResponse:
+        response = self.open(method, url, headers, body)
+        try:
+            # read the whole body, the connection can't be reused until then
+            data = response.read()
+        finally:
+            response.close()
+        return PooledResponse(response.status, response.reason, response.headers, data, response.timings)
+
+    def open(self, method: str, url: str, headers: dict, body: bytes = None) -> StreamedResponse:
+        """
+        Send the request and return the response once its headers are received, the body is left to the caller
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        started = time.perf_counter()
+        connection, reused = self._checkout(key)
+        try:
+            response = self._send(connection, method, path, headers, body, started)
+        except STALE_CONNECTION_ERRORS:
+            connection.close()
+            if not reused or method.upper() not in IDEMPOTENT_METHODS:
+                raise
+            # the server dropped the idle connection, an idempotent request can safely be sent again on a new one.
+            # The others may have been processed before the connection broke, the retry policy decides for them
+            connection = self._new_connection(key)
+            reused = False
+            try:
+                response = self._send(connection, method, path, headers, body, started)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                raise
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            raise
+
+        return StreamedResponse(self, key, connection, response, reused, started)
+
+    @staticmethod
+    def _send(connection, method, path, headers, body, started):
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.ttfb = (time.perf_counter() - started) * 1000
+        return response
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
@@ -0,0 +1,30 @@
+class IntegrationIndex:
+    """
+    Hash indexes over the Definitions returned by the integrations API, built once per fetch so that looking
+    up an integration doesn't scan all of them. When names are repeated the first definition wins, as the
+    linear scans did.
+    """
+
+    def __init__(self, integrations: dict):
+        self.id_by_name = {}
+        self.by_type_and_name = {}
+        self.name_by_id = {}
+
+        definitions = integrations['Definitions'] if integrations and 'Definitions' in integrations else []
+        for definition in definitions or []:
+            params = definition.get('Params') or {}
+            if 'name' in params:
+                self.id_by_name.setdefault(params['name'], definition.get('ID'))
+                if 'Type' in definition:
+                    self.by_type_and_name.setdefault((definition['Type'], params['name']), definition)
+            if 'ID' in definition:
+                self.name_by_id.setdefault(definition['ID'], params.get('name'))
+
+    def find_id_by_name(self, name):
+        return self.id_by_name.get(name)
+
+    def find_by_name_and_type(self, integration_type, name):
+        return self.by_type_and_name.get((integration_type, name))
+
+    def find_name_by_id(self, integration_id):
+        return self.name_by_id.get(integration_id)
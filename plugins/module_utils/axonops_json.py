@@ -0,0 +1,204 @@
+import codecs
+import json
+import re
+
+# how much of a response body is read at a time when it is streamed
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE_RE = re.compile(r'[ \t\n\r]*')
+# the characters changing the nesting while skipping over a value, the strings are skipped whole
+_STRUCTURE_RE = re.compile(r'["\[\]{}]')
+# the rest of a string after its opening quote
+_STRING_END_RE = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+# what may follow the part of a number at the end of a chunk
+_NUMBER_TAIL_RE = re.compile(r'[0-9eE.+-]*')
+
+_DECODER = json.JSONDecoder()
+
+
+class JsonStreamError(ValueError):
+    pass
+
+
+class _Reader:
+    """
+    The JSON text read from the chunks of a body, buffered from the start of the value being read
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.eof = False
+        self.buf = ''
+        self.pos = 0
+
+    def more(self) -> bool:
+        """
+        Add the next chunk to the buffer, False at the end of the body
+        """
+        while not self.eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self.eof = True
+                text = self._decoder.decode(b'', final=True)
+            else:
+                text = chunk if isinstance(chunk, str) else self._decoder.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+        return False
+
+    def drop(self, position: int = None):
+        """
+        Forget the text before position, by default what has been read
+        """
+        position = self.pos if position is None else position
+        self.buf = self.buf[position:]
+        self.pos -= min(position, self.pos)
+
+    def peek(self) -> str:
+        """
+        The next character that isn't whitespace, without reading it, '' at the end of the body
+        """
+        while True:
+            self.pos = _WHITESPACE_RE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            self.drop()
+            if not self.more():
+                return ''
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise JsonStreamError(f"expected '{char}' but found '{found or 'the end of the document'}'")
+        self.pos += 1
+
+    def decode(self):
+        """
+        Decode the value at the current position, reading more of the body while it is incomplete
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+            # a number at the end of the buffer, like 12 of 12.5e3, may go on in the next chunk
+            at_end = end == len(self.buf) or (isinstance(value, (int, float))
+                                              and _NUMBER_TAIL_RE.fullmatch(self.buf, end) is not None)
+            if not at_end or not self.more():
+                self.pos = end
+                return value
+
+    def skip(self):
+        """
+        Move past the value at the current position, forgetting it as it goes so that skipping a large value
+        doesn't hold it in memory
+        """
+        first = self.peek()
+        if first not in ('{', '['):
+            # a string, number, true, false or null is small enough to be decoded
+            self.decode()
+            return
+
+        depth = 0
+        scanned = self.pos
+        while True:
+            match = _STRUCTURE_RE.search(self.buf, scanned)
+            if match is None:
+                scanned = len(self.buf)
+            elif match.group() == '"':
+                string = _STRING_END_RE.match(self.buf, match.end())
+                if string is not None:
+                    scanned = string.end()
+                    continue
+                # the string goes on in the next chunk, scan it again from its quote
+                scanned = match.start()
+            else:
+                scanned = match.end()
+                depth += 1 if match.group() in '[{' else -1
+                if depth == 0:
+                    self.pos = scanned
+                    return
+                continue
+
+            self.drop(scanned)
+            scanned = 0
+            if not self.more():
+                raise JsonStreamError("unexpected end of the document")
+
+
+def _enter_key(reader: _Reader, key: str) -> bool:
+    """
+    Move to the value of key in the object at the current position, False when the object doesn't have it or
+    the value is null
+    """
+    if reader.peek() != '{':
+        if reader.peek() == 'n' and reader.decode() is None:
+            return False
+        raise JsonStreamError(f"expected an object holding '{key}'")
+    reader.pos += 1
+    if reader.peek() == '}':
+        return False
+    while True:
+        if reader.peek() != '"':
+            raise JsonStreamError("expected the name of a member")
+        name = reader.decode()
+        reader.expect(':')
+        if name == key:
+            return True
+        reader.skip()
+        reader.drop()
+        separator = reader.peek()
+        if separator == '}':
+            return False
+        if separator != ',':
+            raise JsonStreamError(f"expected ',' or '}}' but found '{separator or 'the end of the document'}'")
+        reader.pos += 1
+
+
+def iter_json_items(chunks, path: tuple = ()):
+    """
+    Yield the elements of the array found at path in the JSON document read from chunks (bytes or str), decoding
+    one element at a time so that only the current element is held in memory, not the whole document.
+
+    path is the keys of the objects leading to the array, e.g. ('dashboards',), or () when the document is the
+    array. Nothing is yielded when a key is missing or the value is null. The document after the array isn't read.
+    Raises JsonStreamError (a ValueError) when the document isn't valid JSON or the value at path isn't an array
+    """
+    reader = _Reader(chunks)
+    for key in path:
+        if not _enter_key(reader, key):
+            return
+
+    if reader.peek() != '[':
+        if reader.peek() == 'n' and reader.decode() is None:
+            return
+        raise JsonStreamError(f"expected an array at {'/'.join(path) or 'the top of the document'}")
+    reader.pos += 1
+    if reader.peek() == ']':
+        return
+    while True:
+        item = reader.decode()
+        reader.drop()
+        yield item
+        separator = reader.peek()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise JsonStreamError(f"expected ',' or ']' but found '{separator or 'the end of the document'}'")
+        reader.pos += 1
+
+
+def items_at(document, path: tuple = ()) -> list:
+    """
+    The array at path in a decoded document, like iter_json_items yields it, [] when it is missing or null
+    """
+    for key in path:
+        if not isinstance(document, dict):
+            return []
+        document = document.get(key)
+    return document or []
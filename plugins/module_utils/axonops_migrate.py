@@ -0,0 +1,384 @@
+import uuid
+
+from .axonops_alert_rules import alert_rules_url
+from .axonops_dashboards import dashboard_template_url
+from .axonops_integrations import IntegrationIndex
+from .axonops_service_checks import SERVICE_CHECK_TYPES, healthchecks_url
+
+MIGRATE_RESOURCES = ('dashboards', 'alert_rules', 'alert_routes', 'healthchecks')
+SEVERITIES = ('info', 'warning', 'error')
+
+
+def parse_widget_url(widget_url: str):
+    """
+    Split the widget_url of an alert rule, /org/type/cluster/performance/<dashboard uuid>?uuid=<chart uuid>&<filter>,
+    into (dashboard uuid, chart uuid, filter)
+    """
+    parts = (widget_url or '').split('/')
+    if len(parts) < 6:
+        return None, None, None
+    dash_uuid, _, query = parts[5].partition('?')
+    chart_uuid, separator, url_filter = query.partition('&')
+    if chart_uuid.startswith('uuid='):
+        chart_uuid = chart_uuid[5:]
+    return dash_uuid, chart_uuid or None, url_filter if separator else None
+
+
+def build_widget_url(org: str, cluster_type: str, cluster: str, dash_uuid: str, chart_uuid: str, url_filter) -> str:
+    url = f"/{org}/{cluster_type}/{cluster}/performance/{dash_uuid}?uuid={chart_uuid}"
+    if url_filter is not None:
+        url += f"&{url_filter}"
+    return url
+
+
+def index_charts(dashboards: list):
+    """
+    Return two dicts for the charts of the dashboards: (dashboard uuid, chart uuid) -> (dashboard name, chart title)
+    and (dashboard name, chart title) -> (dashboard uuid, chart uuid). The first chart with a title wins
+    """
+    by_uuid = {}
+    by_title = {}
+    for dashboard in dashboards or []:
+        for panel in dashboard.get('panels') or []:
+            key = (dashboard.get('name'), panel.get('title'))
+            value = (dashboard.get('uuid'), panel.get('uuid'))
+            by_uuid.setdefault(value, key)
+            by_title.setdefault(key, value)
+    return by_uuid, by_title
+
+
+class MigrationSource:
+    """
+    Everything read from the source cluster, once for all the target clusters
+    """
+
+    def __init__(self, cluster: str, dashboards: list, alert_rules: list, integrations: dict, healthchecks: dict):
+        self.cluster = cluster
+        self.dashboards = dashboards or []
+        self.alert_rules = alert_rules or []
+        self.integrations = integrations or {}
+        self.healthchecks = healthchecks or {}
+        self.charts_by_uuid, _ = index_charts(self.dashboards)
+        # the integrations are matched on the target by type and name
+        self.integration_by_id = {}
+        for definition in self.integrations.get('Definitions') or []:
+            name = (definition.get('Params') or {}).get('name')
+            if 'ID' in definition:
+                self.integration_by_id.setdefault(definition['ID'], (definition.get('Type'), name))
+
+    def summary(self) -> dict:
+        return {
+            'dashboards': len(self.dashboards),
+            'alert_rules': len(self.alert_rules),
+            'alert_routes': sum(len(routing.get('Routing') or []) for routing in self.integrations.get('Routings') or []),
+            'healthchecks': sum(len(self.healthchecks.get(details['key']) or [])
+                                for details in SERVICE_CHECK_TYPES.values()),
+        }
+
+
+def read_source(axonops, org: str, cluster: str, resources: list):
+    """
+    Read the resources to migrate from the source cluster. Returns (MigrationSource, error)
+    """
+    cluster_type = axonops.get_cluster_type()
+    dashboards, alert_rules, integrations, healthchecks = [], [], {}, {}
+
+    # the alert rules point to their chart, we need the dashboards to find it by name on the targets
+    if 'dashboards' in resources or 'alert_rules' in resources:
+        templates, error = axonops.do_request(dashboard_template_url(org, cluster_type, cluster))
+        if error is not None:
+            return None, error
+        dashboards = (templates or {}).get('dashboards') or []
+
+    if 'alert_rules' in resources:
+        alerts, error = axonops.do_request(alert_rules_url(org, cluster_type, cluster))
+        if error is not None:
+            return None, error
+        alert_rules = (alerts or {}).get('metricrules') or []
+
+    if set(resources) & {'alert_rules', 'alert_routes', 'healthchecks'}:
+        integrations, error = axonops.get_integration_output(cluster)
+        if error is not None:
+            return None, error
+
+    if 'healthchecks' in resources:
+        healthchecks, error = axonops.do_request(healthchecks_url(org, cluster_type, cluster))
+        if error is not None:
+            return None, error
+
+    return MigrationSource(cluster, dashboards, alert_rules, integrations, healthchecks), None
+
+
+def map_integration_id(source: MigrationSource, target_integrations: IntegrationIndex, integration_id):
+    """
+    The ID on the target of the integration with the same type and name as integration_id on the source
+    """
+    type_and_name = source.integration_by_id.get(integration_id)
+    if type_and_name is None:
+        return None
+    definition = target_integrations.find_by_name_and_type(*type_and_name)
+    return definition.get('ID') if definition else None
+
+
+def rewrite_integrations(integrations, source: MigrationSource, target_integrations: IntegrationIndex,
+                         problems: list, what: str):
+    """
+    Copy the integrations of an alert rule or a check, pointing the routing to the integrations of the target.
+    The routes to an integration that doesn't exist on the target are dropped and reported in problems
+    """
+    if not integrations:
+        return integrations
+    integrations = dict(integrations)
+    routing = []
+    for entry in integrations.get('Routing') or []:
+        target_id = map_integration_id(source, target_integrations, entry.get('ID'))
+        if target_id is None:
+            problems.append(f"{what}: integration {entry.get('ID')} not found on the target, route dropped")
+            continue
+        routing.append({**entry, 'ID': target_id})
+    if integrations.get('Routing') is not None:
+        integrations['Routing'] = routing
+    return integrations
+
+
+def rewrite_alert_rule(rule: dict, source: MigrationSource, target_charts: dict,
+                       target_integrations: IntegrationIndex, org: str, cluster_type: str, cluster: str,
+                       problems: list):
+    """
+    Copy an alert rule of the source, pointing its widget_url, correlationId and integrations to the target.
+    Returns None if its chart doesn't exist on the target
+    """
+    name = rule.get('alert')
+    rule = dict(rule)
+    annotations = dict(rule.get('annotations') or {})
+
+    dash_uuid, chart_uuid, url_filter = parse_widget_url(annotations.get('widget_url'))
+    if dash_uuid:
+        dash_and_chart = source.charts_by_uuid.get((dash_uuid, chart_uuid))
+        target_uuids = target_charts.get(dash_and_chart) if dash_and_chart else None
+        if target_uuids is None:
+            problems.append(f"alert rule {name}: its chart was not found on the target, rule skipped")
+            return None
+        annotations['widget_url'] = build_widget_url(org, cluster_type, cluster, target_uuids[0], target_uuids[1],
+                                                     url_filter)
+        if rule.get('correlationId') == chart_uuid:
+            rule['correlationId'] = target_uuids[1]
+    rule['annotations'] = annotations
+    rule['integrations'] = rewrite_integrations(rule.get('integrations'), source, target_integrations, problems,
+                                                f"alert rule {name}")
+    return rule
+
+
+def merge_by_name(existing: list, items: list, prepare):
+    """
+    Merge items into the existing list by name: the existing ones are replaced in place, the new ones appended.
+    prepare(item, existing_item) returns the version to store. Returns (merged, outcomes) where every outcome is
+    a dict with the name and the action (none, create or update)
+    """
+    positions = {}
+    for i, current in enumerate(existing or []):
+        positions.setdefault(current.get('name'), i)
+
+    merged = list(existing or [])
+    outcomes = []
+    for item in items:
+        position = positions.get(item.get('name'))
+        current = merged[position] if position is not None else None
+        new = prepare(item, current)
+        if current is None:
+            positions[item.get('name')] = len(merged)
+            merged.append(new)
+            action = 'create'
+        elif new != current:
+            merged[position] = new
+            action = 'update'
+        else:
+            action = 'none'
+        outcomes.append({'name': item.get('name'), 'action': action})
+    return merged, outcomes
+
+
+def keep_target_uuids(dashboard: dict, current) -> dict:
+    """
+    The source dashboard to store in place of current, keeping the uuids of current and of its charts with the
+    same title so that what points to them on the target, like its alert rules, still works
+    """
+    if current is None:
+        return dashboard
+    panel_uuids = {}
+    for panel in reversed(current.get('panels') or []):
+        panel_uuids[panel.get('title')] = panel.get('uuid')
+
+    panels = []
+    for panel in dashboard.get('panels') or []:
+        target_uuid = panel_uuids.pop(panel.get('title'), None)
+        panels.append({**panel, 'uuid': target_uuid} if target_uuid else panel)
+
+    dashboard = {**dashboard, 'panels': panels}
+    if current.get('uuid'):
+        dashboard['uuid'] = current['uuid']
+    return dashboard
+
+
+def migrate_cluster(axonops, org: str, source: MigrationSource, cluster: str, resources: list, check_mode: bool):
+    """
+    Copy the source resources to the target cluster. Returns the cluster result and an error message
+    """
+    cluster_type = axonops.get_cluster_type()
+    result = {
+        'changed': False,
+        'skipped': [],
+    }
+
+    target_integrations = IntegrationIndex({})
+    target_routings = []
+    if set(resources) & {'alert_rules', 'alert_routes', 'healthchecks'}:
+        integrations, error = axonops.get_integration_output(cluster)
+        if error is not None:
+            return result, error
+        target_integrations = IntegrationIndex(integrations)
+        target_routings = (integrations or {}).get('Routings') or []
+
+    # dashboards, their charts are also what the alert rules point to
+    target_dashboards = []
+    if 'dashboards' in resources or 'alert_rules' in resources:
+        url = dashboard_template_url(org, cluster_type, cluster)
+        templates, error = axonops.do_request(url)
+        if error is not None:
+            return result, error
+        target_dashboards = (templates or {}).get('dashboards') or []
+
+    if 'dashboards' in resources:
+        target_dashboards, outcomes = merge_by_name(target_dashboards, source.dashboards, keep_target_uuids)
+        result['dashboards'] = outcomes
+        if any(outcome['action'] != 'none' for outcome in outcomes):
+            result['changed'] = True
+            if not check_mode:
+                _, error = axonops.do_request(rel_url=url, method='PUT',
+                                              json_data={'type': cluster_type, 'dashboards': target_dashboards})
+                if error is not None:
+                    return result, "Failed to migrate the dashboards: " + str(error)
+
+    if 'alert_rules' in resources:
+        url = alert_rules_url(org, cluster_type, cluster)
+        alerts, error = axonops.do_request(url)
+        if error is not None:
+            return result, error
+        existing = {}
+        for rule in (alerts or {}).get('metricrules') or []:
+            existing.setdefault(rule.get('alert'), rule)
+
+        _, target_charts = index_charts(target_dashboards)
+        result['alert_rules'] = []
+        for rule in source.alert_rules:
+            new_rule = rewrite_alert_rule(rule, source, target_charts, target_integrations, org, cluster_type,
+                                          cluster, result['skipped'])
+            if new_rule is None:
+                continue
+            current = existing.get(rule.get('alert'))
+            new_rule['id'] = current['id'] if current else str(uuid.uuid4())
+            action = 'create' if current is None else ('update' if new_rule != current else 'none')
+            result['alert_rules'].append({'name': rule.get('alert'), 'action': action})
+            if action == 'none':
+                continue
+            result['changed'] = True
+            if not check_mode:
+                _, error = axonops.do_request(rel_url=url, method='POST', json_data=new_rule)
+                if error is not None:
+                    return result, f"Failed to migrate the alert rule {rule.get('alert')}: {error}"
+
+    if 'alert_routes' in resources:
+        error = _migrate_routes(axonops, org, cluster_type, cluster, source, target_integrations, target_routings,
+                                check_mode, result)
+        if error is not None:
+            return result, error
+
+    if 'healthchecks' in resources:
+        url = healthchecks_url(org, cluster_type, cluster)
+        target_checks, error = axonops.do_request(url)
+        if error is not None:
+            return result, error
+        target_checks = target_checks or {}
+
+        payload = {}
+        result['healthchecks'] = []
+        for check_type, details in SERVICE_CHECK_TYPES.items():
+            key = details['key']
+
+            def prepare(check, current):
+                what = f"{check_type} check {check.get('name')}"
+                return {
+                    **check,
+                    'id': current['id'] if current else str(uuid.uuid4()),
+                    'integrations': rewrite_integrations(check.get('integrations'), source, target_integrations,
+                                                         result['skipped'], what),
+                }
+
+            payload[key], outcomes = merge_by_name(target_checks.get(key), source.healthchecks.get(key) or [],
+                                                   prepare)
+            result['healthchecks'].extend({'type': check_type, **outcome} for outcome in outcomes)
+
+        if any(outcome['action'] != 'none' for outcome in result['healthchecks']):
+            result['changed'] = True
+            if not check_mode:
+                _, error = axonops.do_request(rel_url=url, method='PUT', json_data=payload)
+                if error is not None:
+                    return result, "Failed to migrate the health checks: " + str(error)
+
+    return result, None
+
+
+def _migrate_routes(axonops, org, cluster_type, cluster, source, target_integrations, target_routings, check_mode,
+                    result):
+    """
+    Add the alert routes and the override settings of the source that the target doesn't have. The routes
+    only on the target are kept
+    """
+    existing_routes = set()
+    existing_overrides = {}
+    for routing in target_routings:
+        for entry in routing.get('Routing') or []:
+            existing_routes.add((routing.get('Type'), entry.get('Severity'), entry.get('ID')))
+        for severity in SEVERITIES:
+            existing_overrides[(routing.get('Type'), severity)] = routing.get('Override' + severity.title())
+
+    result['alert_routes'] = []
+    for routing in source.integrations.get('Routings') or []:
+        axon_type = routing.get('Type')
+        for severity in SEVERITIES:
+            override = routing.get('Override' + severity.title())
+            if override is None or existing_overrides.get((axon_type, severity)) == override:
+                continue
+            result['alert_routes'].append({'type': axon_type, 'severity': severity, 'override': override,
+                                           'action': 'update'})
+            result['changed'] = True
+            if not check_mode:
+                _, error = axonops.do_request(
+                    rel_url=f"api/v1/integrations-override/{org}/{cluster_type}/{cluster}/{axon_type}/{severity}",
+                    method='PUT',
+                    json_data={'value': override},
+                )
+                if error is not None:
+                    return error
+
+        for entry in routing.get('Routing') or []:
+            target_id = map_integration_id(source, target_integrations, entry.get('ID'))
+            integration = source.integration_by_id.get(entry.get('ID'), (None, entry.get('ID')))[1]
+            if target_id is None:
+                result['skipped'].append(f"{axon_type} {entry.get('Severity')} route: integration {integration} "
+                                         f"not found on the target, route dropped")
+                continue
+            if (axon_type, entry.get('Severity'), target_id) in existing_routes:
+                continue
+            result['alert_routes'].append({'type': axon_type, 'severity': entry.get('Severity'),
+                                           'integration': integration, 'action': 'create'})
+            result['changed'] = True
+            if not check_mode:
+                _, error = axonops.do_request(
+                    rel_url=f"api/v1/integrations-routing/"
+                            f"{org}/{cluster_type}/{cluster}/{axon_type}/{entry.get('Severity')}/{target_id}",
+                    method='POST',
+                )
+                if error is not None:
+                    return error
+    return None
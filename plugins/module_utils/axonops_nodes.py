@@ -0,0 +1,66 @@
+def node_lookup_fields(node: dict) -> dict:
+    """
+    The fields of a node used by NodeDirectory, the details of the nodes of a large cluster are left out
+    """
+    fields = {key: node[key] for key in ('host_id', 'HostIP') if key in node}
+    details = node.get('Details') or {}
+    if 'human_readable_identifier' in details:
+        fields['Details'] = {'human_readable_identifier': details['human_readable_identifier']}
+    return fields
+
+
+class NodeDirectory:
+    """
+    Lookup of the nodes returned by the nodes API by hostname (human readable identifier), IP address and
+    host_id, built once so that resolving many names doesn't scan all the nodes for each of them.
+    """
+
+    def __init__(self, nodes: list):
+        self.nodes = nodes or []
+        # hostname and IP share the same namespace, the first node matching either wins like the linear search did
+        self.by_name = {}
+        self.by_host_id = {}
+
+        for node in self.nodes:
+            details = node.get('Details') or {}
+            if details.get('human_readable_identifier'):
+                self.by_name.setdefault(details['human_readable_identifier'], node)
+            if node.get('HostIP'):
+                self.by_name.setdefault(node['HostIP'], node)
+            if node.get('host_id'):
+                self.by_host_id.setdefault(node['host_id'], node)
+
+    def find(self, name: str):
+        """
+        Return the node with this hostname, IP address or host_id, or None
+        """
+        node = self.by_name.get(name)
+        if node is None:
+            node = self.by_host_id.get(name)
+        return node
+
+    def resolve_ids(self, names: list):
+        """
+        Return the host_ids of the nodes, and the list of names that don't match any node
+        """
+        host_ids = []
+        unresolved = []
+        for name in names or []:
+            node = self.find(name)
+            if node is None:
+                unresolved.append(name)
+            else:
+                host_ids.append(node['host_id'])
+        return host_ids, unresolved
+
+    def display_name(self, host_id: str) -> str:
+        """
+        The hostname of the node, its IP address if it has no hostname, or the host_id if it isn't known
+        """
+        node = self.by_host_id.get(host_id)
+        if node is None:
+            return host_id
+        details = node.get('Details') or {}
+        if 'human_readable_identifier' in details:
+            return details['human_readable_identifier']
+        return node.get('HostIP', host_id)
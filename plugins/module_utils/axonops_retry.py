@@ -0,0 +1,120 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+# answers worth trying again: the server is busy or a proxy in front of it couldn't reach it
+RETRY_STATUS = (429, 502, 503, 504)
+
+# sending these twice has the same effect as sending them once
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+
+def parse_retry_after(headers) -> float:
+    """
+    The seconds to wait from the Retry-After header, given in seconds or as an HTTP date.
+    Returns None if there is no usable header
+    """
+    value = headers.get('Retry-After') if headers is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class RetryPolicy:
+    """
+    When and after how long a failed request is sent again.
+
+    A request is retried up to retries times when it can't reach the server or the server answers with one of
+    RETRY_STATUS. Only the idempotent methods are retried unless retry_non_idempotent is set, a POST that timed
+    out may have been applied already. A 429 is always retried, the server refused the request without
+    processing it.
+
+    The wait doubles at every attempt from backoff seconds, up to max_backoff, and a random part of it is used
+    (full jitter) so that the workers failing together don't come back together. The Retry-After header of the
+    server is used instead when present, capped at max_backoff.
+    """
+
+    def __init__(self, retries: int = 3, backoff: float = 0.5, max_backoff: float = 30,
+                 retry_non_idempotent: bool = False):
+        self.retries = max(retries, 0)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_non_idempotent = retry_non_idempotent
+
+    def should_retry(self, method: str, status: int, attempt: int) -> bool:
+        """
+        Whether the attempt-th try (from 0) of method is sent again, status is None when the server wasn't reached
+        """
+        if attempt >= self.retries:
+            return False
+        if status == 429:
+            return True
+        if status is not None and status not in RETRY_STATUS:
+            return False
+        return self.retry_non_idempotent or method.upper() in IDEMPOTENT_METHODS
+
+    def delay(self, attempt: int, headers=None) -> float:
+        """
+        Seconds to wait before the next try after the attempt-th one failed
+        """
+        retry_after = parse_retry_after(headers)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket: allows rate requests per second on average, with bursts up to capacity.
+    A rate of 0 means no limit.
+
+    pause holds every caller for some seconds, used when the server asked to slow down.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, returns how many seconds the caller has to wait before using it
+        """
+        with self.lock:
+            now = time.monotonic()
+            paused = max(self.paused_until - now, 0.0)
+            if self.rate <= 0:
+                return paused
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return paused
+            return max(-self.tokens / self.rate, paused)
+
+    def acquire(self):
+        """
+        Block until a token is available
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """
+        Don't give tokens for the next seconds
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
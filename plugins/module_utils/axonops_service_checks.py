@@ -0,0 +1,155 @@
+import uuid
+
+from .axonops_utils import dicts_are_different
+
+# the key of every type of check in the healthchecks document, and the fields set by the modules
+SERVICE_CHECK_TYPES = {
+    'http': {'key': 'httpchecks', 'fields': ('interval', 'name', 'http', 'method', 'timeout', 'tls_skip_verify'),
+             'required': ('interval', 'timeout', 'http')},
+    'tcp': {'key': 'tcpchecks', 'fields': ('interval', 'name', 'tcp', 'timeout'),
+            'required': ('interval', 'timeout', 'tcp')},
+    'shell': {'key': 'shellchecks', 'fields': ('interval', 'name', 'script', 'shell', 'timeout'),
+              'required': ('interval', 'timeout', 'script')},
+}
+
+
+def service_check_args() -> dict:
+    """
+    Arguments describing a single check of any type, used by service_checks
+    """
+    return {
+        'type': {'type': 'str', 'required': True, 'choices': list(SERVICE_CHECK_TYPES)},
+        'present': {'type': 'bool', 'required': False, 'default': True},
+        'name': {'type': 'str', 'required': True},
+        'interval': {'type': 'str', 'required': False},
+        'timeout': {'type': 'str', 'required': False},
+        'http': {'type': 'str', 'required': False},
+        'method': {'type': 'str', 'required': False, 'default': 'GET', 'choices': ['GET', 'POST', 'PUT']},
+        'tls_skip_verify': {'type': 'bool', 'required': False, 'default': False},
+        'tcp': {'type': 'str', 'required': False},
+        'shell': {'type': 'str', 'required': False, 'default': '/bin/bash'},
+        'script': {'type': 'str', 'required': False},
+    }
+
+
+def healthchecks_url(org: str, cluster_type: str, cluster: str) -> str:
+    return f"/api/v1/healthchecks/{org}/{cluster_type}/{cluster}"
+
+
+def _plan_check(check_type: str, desired: dict, existing):
+    fields = SERVICE_CHECK_TYPES[check_type]['fields']
+
+    if existing is not None:
+        before = {'id': existing['id'], 'present': True, **{field: existing.get(field) for field in fields}}
+    else:
+        before = None
+
+    if not desired['present']:
+        return before, {'present': False}, 'delete' if existing is not None else 'none'
+
+    after = {
+        'id': existing['id'] if existing is not None else str(uuid.uuid4()),
+        'present': True,
+        **{field: desired[field] for field in fields},
+    }
+    if existing is None:
+        return before, after, 'create'
+    return before, after, 'update' if dicts_are_different(before, after) else 'none'
+
+
+def plan_service_checks(saas_settings: dict, desired: list):
+    """
+    Apply the desired checks to the healthchecks document in a single pass.
+
+    Every element of desired has the type of the check (http, tcp or shell) and its options. An existing check
+    with the same type and name is replaced in place, a new one is appended and one with present false is
+    removed. The checks that are not listed are kept as they are.
+    Returns a tuple (payload, outcomes, error): the document to send, a dict per check in the order of desired
+    with its type, name, changed, action (none, create, update or delete) and the before/after data for the diff,
+    and an error message if a check is missing a required option.
+    """
+    wanted = {}
+    for check in desired:
+        check_type = check['type']
+        if check['present']:
+            missing = [name for name in SERVICE_CHECK_TYPES[check_type]['required'] if check.get(name) is None]
+            if missing:
+                return None, [], f"The {check_type} check '{check['name']}' is missing {', '.join(missing)}"
+        wanted.pop((check_type, check['name']), None)
+        wanted[(check_type, check['name'])] = check
+
+    payload = {}
+    outcomes = {}
+    for check_type, check_type_details in SERVICE_CHECK_TYPES.items():
+        key = check_type_details['key']
+        existing_checks = saas_settings.get(key)
+        if not any(wanted_type == check_type for wanted_type, _ in wanted):
+            payload[key] = existing_checks
+            continue
+
+        # the existing checks, with the name in place of the ones we manage until we know what to do with them
+        slots = []
+        found = {}
+        for check in existing_checks or []:
+            name = check.get('name')
+            if (check_type, name) not in wanted:
+                slots.append((None, check))
+            elif name not in found:
+                found[name] = check
+                slots.append((name, check))
+            # any other check with the same name is a duplicate of the one we manage and is dropped
+
+        for (wanted_type, name), check in wanted.items():
+            if wanted_type != check_type:
+                continue
+            before, after, action = _plan_check(check_type, check, found.get(name))
+            outcomes[(check_type, name)] = {
+                'type': check_type,
+                'name': name,
+                'changed': action != 'none',
+                'action': action,
+                'before': before,
+                'after': after,
+            }
+
+        checks = []
+        for name, check in slots:
+            outcome = outcomes.get((check_type, name))
+            if outcome is None or outcome['action'] == 'none':
+                checks.append(check)
+            elif outcome['action'] == 'update':
+                checks.append(_check_to_send(outcome['after']))
+        checks.extend(_check_to_send(outcome['after']) for (outcome_type, _), outcome in outcomes.items()
+                      if outcome_type == check_type and outcome['action'] == 'create')
+        payload[key] = checks
+
+    return payload, [outcomes[key] for key in wanted], None
+
+
+def _check_to_send(check: dict) -> dict:
+    return {
+        **check,
+        'readonly': False,
+        'integrations': {
+            'OverrideError': False,
+            'OverrideInfo': False,
+            'OverrideWarning': False,
+            'Routing': None,
+            'Type': ''
+        },
+    }
+
+
+def service_checks_builder(desired: list):
+    """
+    The build function of AxonOps.update_document for the desired checks: they are planned again on the health
+    checks as they are on the server
+    """
+    def build(saas_settings):
+        payload, outcomes, error = plan_service_checks(saas_settings or {}, desired)
+        if error is not None:
+            return None, error
+        if not any(outcome['changed'] for outcome in outcomes):
+            return None, None
+        return payload, None
+    return build
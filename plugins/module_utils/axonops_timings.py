@@ -0,0 +1,134 @@
+import math
+import re
+import threading
+from urllib.parse import parse_qsl, urlsplit
+
+# path segments holding an ID rather than naming an endpoint
+_ID_SEGMENT_RE = re.compile(r'^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                            r'|[0-9a-fA-F]{16,}|\d+)$')
+
+# the phases of a request, in milliseconds: dns, connect and tls are the duration of each phase of opening a new
+# connection, ttfb and total are from the start of the request to the first byte and to the end of the response
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'total')
+
+
+def url_template(rel_url: str, org: str) -> str:
+    """
+    The endpoint of rel_url without the values that change from one call to another: the organisation, cluster type
+    and cluster following it are replaced by {org}, {cluster_type} and {cluster}, the IDs by {id} and the values of
+    the query string by the name of the parameter
+    """
+    parts = urlsplit(rel_url)
+    segments = parts.path.strip('/').split('/')
+    template = []
+    after_org = None
+    for segment in segments:
+        if after_org is None and org and segment == org:
+            after_org = 0
+            template.append('{org}')
+        elif after_org == 0:
+            after_org = 1
+            template.append('{cluster_type}')
+        elif after_org == 1:
+            after_org = 2
+            template.append('{cluster}')
+        elif _ID_SEGMENT_RE.match(segment):
+            template.append('{id}')
+        else:
+            template.append(segment)
+
+    endpoint = '/' + '/'.join(template)
+    if parts.query:
+        endpoint += '?' + '&'.join(f"{name}={{{name}}}" for name, _ in parse_qsl(parts.query, keep_blank_values=True))
+    return endpoint
+
+
+def url_cluster(rel_url: str, org: str) -> str:
+    """
+    The cluster of rel_url, the path segment two after the organisation, or None for the endpoints without one
+    """
+    segments = urlsplit(rel_url).path.strip('/').split('/')
+    if org and org in segments:
+        position = segments.index(org) + 2
+        if position < len(segments):
+            return segments[position]
+    return None
+
+
+def percentile(values: list, fraction: float) -> float:
+    """
+    The value under which fraction of the values fall, nearest rank on the sorted values
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(max(math.ceil(fraction * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[rank]
+
+
+def summarize(records: list, top: int = None) -> list:
+    """
+    The requests grouped by method and endpoint, the endpoints where the most time went first. Every entry has the
+    number of requests, the cumulative, median and 95th percentile total time in milliseconds and the bytes sent
+    and received, on the network and once decompressed
+    """
+    endpoints = {}
+    for record in records:
+        key = (record['method'], record['endpoint'])
+        endpoints.setdefault(key, []).append(record)
+
+    summary = []
+    for (method, endpoint), calls in endpoints.items():
+        totals = [call['total'] for call in calls]
+        summary.append({
+            'method': method,
+            'endpoint': endpoint,
+            'count': len(calls),
+            'cached': sum(1 for call in calls if call['cached']),
+            'total': round(sum(totals), 1),
+            'p50': round(percentile(totals, 0.5), 1),
+            'p95': round(percentile(totals, 0.95), 1),
+            'bytes_out': sum(call['bytes_out'] for call in calls),
+            'bytes_in': sum(call['bytes_in'] for call in calls),
+            'bytes_out_decoded': sum(call['bytes_out_decoded'] for call in calls),
+            'bytes_in_decoded': sum(call['bytes_in_decoded'] for call in calls),
+        })
+    summary.sort(key=lambda entry: entry['total'], reverse=True)
+    return summary[:top] if top else summary
+
+
+class RequestTimings:
+    """
+    The timings of the requests sent by an AxonOps client, recorded when profiling is enabled.
+
+    Every record has the method, the endpoint (see url_template), the cluster (see url_cluster), the HTTP status
+    (None when the server couldn't be reached), the bytes sent and received on the network and the size of the
+    bodies before compression (bytes_out_decoded, bytes_in_decoded), whether the response came from the
+    response cache without a request, the number of attempts, whether the connection was reused and the PHASES in
+    milliseconds. Thread safe, the clusters of a module may be reconciled concurrently.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    def add(self, record: dict):
+        with self._lock:
+            self.records.append(record)
+
+    def clear(self):
+        with self._lock:
+            self.records = []
+
+    def report(self, top: int = None) -> dict:
+        """
+        The records and their summary by endpoint, returned by the modules as timings
+        """
+        with self._lock:
+            records = list(self.records)
+        return {
+            'count': len(records),
+            'total': round(sum(record['total'] for record in records), 1),
+            'endpoints': summarize(records, top),
+            'requests': records,
+        }
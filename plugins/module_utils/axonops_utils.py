@@ -1,3 +1,5 @@
+import hashlib
+
 from ansible.module_utils.basic import env_fallback
 
 from .axonops import AxonOps
@@ -24,11 +26,65 @@ def base_module_args() -> dict:
                      'default': False},
         "validate_certs": {"type": 'bool', "required": False, "fallback": (env_fallback, ['AXONOPS_VALIDATE_CERTS']),
                           'default': True},
-
+        "token_cache": {"type": 'bool', "required": False, "fallback": (env_fallback, ['AXONOPS_TOKEN_CACHE']),
+                        'default': False},
+        "cache_dir": {"type": 'path', "required": False, "fallback": (env_fallback, ['AXONOPS_CACHE_DIR'])},
+        "pool_size": {"type": 'int', "required": False, "fallback": (env_fallback, ['AXONOPS_POOL_SIZE']),
+                      'default': 4},
+        "response_cache": {"type": 'str', "required": False, "fallback": (env_fallback, ['AXONOPS_RESPONSE_CACHE']),
+                           'default': 'none', 'choices': ['none', 'memory', 'disk']},
+        "cache_ttl": {"type": 'int', "required": False, "fallback": (env_fallback, ['AXONOPS_CACHE_TTL']),
+                      'default': 30},
+        "cache_max_size": {"type": 'int', "required": False, "fallback": (env_fallback, ['AXONOPS_CACHE_MAX_SIZE']),
+                           'default': 64},
+        "skip_unchanged": {"type": 'bool', "required": False, "fallback": (env_fallback, ['AXONOPS_SKIP_UNCHANGED']),
+                           'default': False},
+        "conflict_retries": {"type": 'int', "required": False,
+                             "fallback": (env_fallback, ['AXONOPS_CONFLICT_RETRIES']), 'default': 0},
+        "retries": {"type": 'int', "required": False, "fallback": (env_fallback, ['AXONOPS_RETRIES']), 'default': 3},
+        "retry_backoff": {"type": 'float', "required": False, "fallback": (env_fallback, ['AXONOPS_RETRY_BACKOFF']),
+                          'default': 0.5},
+        "retry_non_idempotent": {"type": 'bool', "required": False,
+                                 "fallback": (env_fallback, ['AXONOPS_RETRY_NON_IDEMPOTENT']), 'default': False},
+        "request_timeout": {"type": 'float', "required": False,
+                            "fallback": (env_fallback, ['AXONOPS_REQUEST_TIMEOUT']), 'default': 30},
+        "rate_limit": {"type": 'float', "required": False, "fallback": (env_fallback, ['AXONOPS_RATE_LIMIT']),
+                       'default': 0},
+        "profile": {"type": 'bool', "required": False, "fallback": (env_fallback, ['AXONOPS_PROFILE']),
+                    'default': False},
+        "compress_requests": {"type": 'bool', "required": False,
+                              "fallback": (env_fallback, ['AXONOPS_COMPRESS_REQUESTS']), 'default': False},
+        "stream_responses": {"type": 'bool', "required": False,
+                             "fallback": (env_fallback, ['AXONOPS_STREAM_RESPONSES']), 'default': False},
     }
 
+# clients already created by this process, keyed by a hash of their connection settings so the credentials aren't
+# kept in the keys. A module runs in its own process so this normally holds a single client, but when the modules
+# are executed on the controller by the collection action plugins the same client (with its login and cached
+# responses) serves all the loop items.
+_axonops_instances = {}
+
+_instance_params = ('org', 'auth_token', 'base_url', 'username', 'password', 'cluster_type', 'api_token',
+                    'override_saas', 'use_saml', 'validate_certs', 'token_cache', 'cache_dir', 'pool_size',
+                    'response_cache', 'cache_ttl', 'cache_max_size', 'skip_unchanged', 'conflict_retries', 'retries',
+                    'retry_backoff', 'retry_non_idempotent', 'request_timeout', 'rate_limit', 'profile',
+                    'compress_requests', 'stream_responses')
+
+
+def instance_key(params) -> str:
+    return hashlib.sha256('\n'.join(repr(params.get(name)) for name in _instance_params).encode('utf-8')).hexdigest()
+
+
 def get_axonops_instance(params):
-    return AxonOps(
+    key = instance_key(params)
+    axonops = _axonops_instances.get(key)
+    if axonops is not None and not axonops.errors:
+        # a new module run, its timings start from here
+        if axonops.timings is not None:
+            axonops.timings.clear()
+        return axonops
+
+    axonops = AxonOps(
         org_name=params['org'],
         auth_token=params.get('auth_token', ''),
         base_url=params.get('base_url', ''),
@@ -38,8 +94,45 @@ def get_axonops_instance(params):
         api_token=params.get('api_token', ''),
         override_saas=params.get('override_saas', False),
         use_saml=params.get('use_saml', False),
-        validate_certs=params.get('validate_certs', True)
+        validate_certs=params.get('validate_certs', True),
+        token_cache=params.get('token_cache', False),
+        cache_dir=params.get('cache_dir') or '',
+        pool_size=params.get('pool_size', 4),
+        response_cache=params.get('response_cache', 'none'),
+        cache_ttl=params.get('cache_ttl', 30),
+        cache_max_size=params.get('cache_max_size', 64),
+        skip_unchanged=params.get('skip_unchanged', False),
+        conflict_retries=params.get('conflict_retries', 0),
+        retries=params.get('retries', 3),
+        retry_backoff=params.get('retry_backoff', 0.5),
+        retry_non_idempotent=params.get('retry_non_idempotent', False),
+        request_timeout=params.get('request_timeout', 30),
+        rate_limit=params.get('rate_limit', 0),
+        profile=params.get('profile', False),
+        compress_requests=params.get('compress_requests', False),
+        stream_responses=params.get('stream_responses', False),
     )
+    if not axonops.errors:
+        _axonops_instances[key] = axonops
+    return axonops
+
+
+def report_timings(module, axonops):
+    """
+    With profile, add the timings of the requests sent by this module run to whatever the module returns,
+    successful or failed, as timings
+    """
+    if axonops.timings is None:
+        return
+
+    def with_timings(exit_method):
+        def wrapper(*args, **kwargs):
+            kwargs['timings'] = axonops.timings.report()
+            exit_method(*args, **kwargs)
+        return wrapper
+
+    module.exit_json = with_timings(module.exit_json)
+    module.fail_json = with_timings(module.fail_json)
 
 
 def dicts_are_different(a: dict, b: dict) -> bool:
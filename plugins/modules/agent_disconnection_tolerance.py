@@ -71,6 +71,17 @@ options:
             - Set the threshold limit for the error alert timeout.
         required: false
         type: str
+    conflict_retries:
+        description:
+            - When above C(0), the document is read again before writing while holding a lock shared by the tasks
+              running on the same machine, and if someone else changed it in the meantime the change is worked out
+              again on the new content. This is how many more times it is read while it keeps changing.
+            - The lock is a file under I(cache_dir), it doesn't cover the runs on other controllers.
+            - C(0) writes without reading it again, saving a request per write.
+            - It can be read from the environment variable AXONOPS_CONFLICT_RETRIES.
+        required: false
+        type: int
+        default: 0
 '''
 
 EXAMPLES = r'''
@@ -93,7 +104,7 @@ EXAMPLES = r'''
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import dicts_are_different, \
-    get_axonops_instance, make_module_args
+    get_axonops_instance, report_timings, make_module_args
 
 
 def run_module():
@@ -112,6 +123,7 @@ def run_module():
     }
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
@@ -145,11 +157,15 @@ def run_module():
         module.exit_json(**result)
         return
 
-    _, return_error = axonops.do_request(
-        rel_url=agent_disconnection_tolerance_url,
-        method='PUT',
-        json_data=payload,
-    )
+    # nothing to write if someone else already set the same timeouts in the meantime
+    def build(settings):
+        current = {
+            'warn_timeout': (settings or {}).get('warn_timeout'),
+            'error_timeout': (settings or {}).get('error_timeout'),
+        }
+        return (payload if dicts_are_different(current, requested_setting) else None), None
+
+    _, return_error = axonops.update_document(agent_disconnection_tolerance_url, saas_settings, build)
 
     if return_error:
         module.fail_json(msg=return_error, **result)
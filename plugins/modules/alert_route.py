@@ -106,7 +106,7 @@ TODO
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
-    dicts_are_different, get_axonops_instance
+    dicts_are_different, get_axonops_instance, report_timings
 
 # Type name mapping Ansible => AxonOps
 types_map = {
@@ -146,11 +146,12 @@ def run_module():
     cluster = module.params['cluster']
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
 
-    integrations, error = axonops.do_request(f"/api/v1/integrations/{org}/{axonops.get_cluster_type()}/{cluster}")
+    integrations, error = axonops.get_integration_output(cluster)
     if error is not None:
         module.fail_json(msg=error)
         return
@@ -0,0 +1,309 @@
+#!/usr/bin/python3
+
+DOCUMENTATION = r'''
+---
+module: axonops_alert_rules
+
+short_description: Configure a list of alerting rules for AxonOps in one go
+
+version_added: '0.7.0'
+
+description:
+    - Configure many metric alerting rules for a cluster with a single module invocation.
+    - The alert rules, the dashboard templates and the integrations are fetched only once,
+      every rule is compared in memory and only the rules that actually changed are written.
+    - Each rule accepts the same options as M(axonops.axonops.alert_rule).
+
+options:
+    base_url:
+        description:
+            - This represent the base url.
+            - Specify this parameter if you are running on-premise.
+            - Ignore if you are Running AxonOps SaaS.
+        required: false
+        type: str
+    org:
+        description:
+            - This is the organisation name in AxonOps Saas.
+            - It can be read from the environment variable AXONOPS_ORG.
+        required: true
+        type: str
+    cluster:
+        description:
+            - Cluster where to apply the alert rules.
+            - It can be read from the environment variable AXONOPS_CLUSTER.
+            - Required unless I(clusters) is set.
+        required: false
+        type: str
+    clusters:
+        description:
+            - Apply the same alert rules to all these clusters, reconciling them concurrently.
+            - When set, I(cluster) is ignored and the result is reported per cluster in C(clusters).
+            - A cluster failing doesn't stop the others, the module fails at the end listing the failed clusters.
+        required: false
+        type: list
+        elements: str
+    parallelism:
+        description:
+            - Maximum number of clusters reconciled at the same time when I(clusters) is set.
+        required: false
+        type: int
+        default: 4
+    auth_token:
+        description:
+            - api-token for authenticate to AxonOps SaaS.
+            - It can be read from the environment variable AXONOPS_TOKEN.
+        required: false
+        type: str
+    api_token:
+        description:
+            - api-token to authenticate with AxonOps Server
+        required: false
+        type: str
+    username:
+        description:
+            - Username for authenticate.
+            - It can be read from the environment variable AXONOPS_USERNAME.
+        required: false
+        type: str
+    password:
+        description:
+            - password for authenticate.
+            - It can be read from the environment variable AXONOPS_PASSWORD.
+        required: false
+        type: str
+    cluster_type:
+        description:
+            - The typo of cluster, cassandra, DSE, etc.
+            - Default is cassandra
+            - It can be read from the environment variable AXONOPS_CLUSTER_TYPE.
+        required: false
+        type: str
+    rules:
+        description:
+            - The list of alert rules to reconcile.
+            - Every element takes the options of M(axonops.axonops.alert_rule),
+              for example C(name), C(dashboard), C(chart), C(operator), C(warning_value),
+              C(critical_value), C(duration), C(routing) and C(present).
+        required: true
+        type: list
+        elements: dict
+    skip_unchanged:
+        description:
+            - Skip the rules of a cluster when the list of rules is the same as the last time it was applied
+              from this controller, without reading the alert rules from AxonOps. Changes made outside of Ansible
+              are not detected while enabled.
+            - It can be read from the environment variable AXONOPS_SKIP_UNCHANGED.
+        required: false
+        type: bool
+        default: false
+'''
+
+EXAMPLES = r'''
+  - name: Install all the metric alerts of a cluster
+    axonops.axonops.alert_rules:
+      auth_token: "{{ secret }}"
+      org: my_company
+      cluster: my_cluster
+      rules:
+        - name: DOWN count per node
+          dashboard: Overview
+          chart: Number of Endpoints Down Per Node Point Of View
+          operator: '>='
+          critical_value: 2
+          warning_value: 1
+          duration: 15m
+        - name: Disk % Usage $mountpoint
+          dashboard: System
+          chart: Disk % Usage $mountpoint
+          operator: '>='
+          critical_value: 90
+          warning_value: 75
+          duration: 12h
+
+  - name: Apply the same alert policy to every cluster of the organisation
+    axonops.axonops.alert_rules:
+      auth_token: "{{ secret }}"
+      org: my_company
+      clusters: "{{ my_clusters }}"
+      parallelism: 8
+      rules: "{{ org_alert_rules }}"
+'''
+
+RETURN = r'''
+rules:
+    description: The outcome for every rule, in the same order as the input.
+    type: list
+    returned: when I(cluster) is used
+    contains:
+        name:
+            description: The name of the alert rule.
+            type: str
+        changed:
+            description: Whether the rule has been (or would be, in check mode) created, updated or deleted.
+            type: bool
+        action:
+            description: One of C(none), C(create), C(update) or C(delete).
+            type: str
+fingerprint_matched:
+    description:
+        - The rules weren't edited since they were last applied, so they were not compared with AxonOps.
+        - Also set in the entry of every cluster in I(clusters).
+    type: bool
+    returned: when skip_unchanged is enabled and the rules weren't edited
+clusters:
+    description:
+        - The outcome for every cluster when I(clusters) is set, keyed by cluster name.
+        - Every entry has C(changed) and C(rules) as described above, plus C(failed) and C(msg) when the cluster failed.
+    type: dict
+    returned: when I(clusters) is set
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
+    get_axonops_instance, report_timings
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_alert_rules import alert_rule_args, \
+    alert_rule_required_if, alert_rules_url, dashboard_templates_url, get_alert_rules, get_dashboard_index, \
+    plan_alert_rule
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_fanout import \
+    aggregate_cluster_outcomes, run_per_cluster
+
+
+def reconcile_cluster(axonops, org, cluster, rules, check_mode):
+    """
+    Compare the rules with the ones configured on the cluster and apply the differences.
+    Returns the cluster result and an error message
+    """
+    result = {
+        'changed': False,
+        'rules': [],
+        'diff': [],
+    }
+
+    # nothing was edited since the last time these rules were applied, don't download and compare the alert rules
+    resource = ('alert_rules', cluster)
+    if axonops.desired_state_unchanged(resource, rules):
+        result['fingerprint_matched'] = True
+        return result, None
+
+    alerts_url = alert_rules_url(org, axonops.get_cluster_type(), cluster)
+
+    # Get existing alerts and dashboard templates, only once for all the rules
+    existing_alerts, error = get_alert_rules(axonops, alerts_url, [rule['name'] or rule['chart'] for rule in rules])
+    if error is not None:
+        return result, "Error occurred accessing alert URL: " + alerts_url + str(error)
+
+    dash_templates_url = dashboard_templates_url(org, axonops.get_cluster_type(), cluster)
+    dashboards, error = get_dashboard_index(axonops, dash_templates_url)
+    if error is not None:
+        return result, "Error occurred fetching AxonOps dashboard template: " + dash_templates_url + str(error)
+
+    # work out all the changes before sending anything, so a broken rule doesn't leave the cluster half done
+    requests = []
+    errors = []
+    for rule in rules:
+        name = rule['name'] or rule['chart']
+        rule_result, request, error = plan_alert_rule(axonops, cluster, rule, existing_alerts, dashboards)
+        if error is not None:
+            errors.append(f"{name}: {error}")
+            continue
+
+        if request is None:
+            action = 'none'
+        elif request['method'] == 'DELETE':
+            action = 'delete'
+        elif 'old_data' in rule_result:
+            action = 'update'
+        else:
+            action = 'create'
+
+        result['rules'].append({'name': name, 'changed': rule_result['changed'], 'action': action})
+        if rule_result['changed']:
+            result['changed'] = True
+            result['diff'].append({
+                'before_header': name,
+                'after_header': name,
+                'before': rule_result['diff']['before'],
+                'after': rule_result['diff']['after'],
+            })
+        if request is not None:
+            requests.append((name, request))
+
+    if errors:
+        return result, "Failed to prepare the alert rules: " + '; '.join(errors)
+
+    # Exit if in check mode or no changes
+    if check_mode:
+        return result, None
+
+    for name, request in requests:
+        _, error = axonops.do_request(**request)
+        if error is not None:
+            errors.append(f"{name}: {error}")
+
+    if errors:
+        return result, "Failed to apply the alert rules: " + '; '.join(errors)
+
+    axonops.remember_desired_state(resource, rules)
+    return result, None
+
+
+def run_module():
+    module_args = make_module_args({
+        'rules': {'type': 'list', 'elements': 'dict', 'required': True,
+                  'options': alert_rule_args(), 'required_if': alert_rule_required_if},
+        'clusters': {'type': 'list', 'elements': 'str', 'required': False},
+        'parallelism': {'type': 'int', 'required': False, 'default': 4},
+    })
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+    )
+    result = {
+        'changed': False,
+        'rules': [],
+        'diff': [],
+    }
+
+    org = module.params['org']
+    cluster = module.params['cluster']
+    clusters = module.params['clusters']
+
+    if not cluster and not clusters:
+        module.fail_json(msg="One of cluster or clusters is required", **result)
+
+    axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
+
+    if axonops.errors:
+        module.fail_json(msg=' '.join(axonops.errors), **result)
+
+    if not clusters:
+        result, error = reconcile_cluster(axonops, org, cluster, module.params['rules'], module.check_mode)
+        if error is not None:
+            module.fail_json(msg=error, **result)
+        module.exit_json(**result)
+        return
+
+    # reconcile all the clusters at the same time, a cluster failing doesn't stop the others
+    outcomes = run_per_cluster(
+        clusters,
+        lambda name: reconcile_cluster(axonops, org, name, module.params['rules'], module.check_mode),
+        module.params['parallelism'],
+    )
+
+    result, error = aggregate_cluster_outcomes(outcomes, 'rules', "reconcile the alert rules")
+    if error is not None:
+        module.fail_json(msg=error, **result)
+        return
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -106,6 +106,11 @@ url:
     description: The endpoint url.
     type: str
     returned: always
+unresolved_nodes:
+    description: The nodes that don't match the hostname, IP address or host_id of any node of the cluster.
+    type: list
+    elements: str
+    returned: when some nodes were not found
 
 '''
 
@@ -114,7 +119,7 @@ import uuid
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import bool_to_string, dicts_are_different, \
-    get_axonops_instance, make_module_args, string_or_none, string_to_bool
+    get_axonops_instance, report_timings, make_module_args, string_or_none, string_to_bool
 
 
 def run_module():
@@ -190,6 +195,7 @@ def run_module():
     }
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
@@ -344,10 +350,17 @@ def run_module():
         split = table.split('.')
         requested_tables.append({'Name': split[1]})
 
-    requested_nodes, return_error = axonops.find_nodes_ids(module.params['nodes'], module.params['org'],
-                                                           module.params['cluster'])
-    if return_error:
-        module.fail_json(msg=return_error, **result)
+    # an empty list of nodes means all the nodes, there's nothing to look up
+    requested_nodes = []
+    if module.params['nodes']:
+        node_directory, return_error = axonops.get_node_directory(module.params['org'], module.params['cluster'])
+        if return_error:
+            module.fail_json(msg=return_error, **result)
+
+        requested_nodes, unresolved_nodes = node_directory.resolve_ids(module.params['nodes'])
+        if unresolved_nodes:
+            result['unresolved_nodes'] = unresolved_nodes
+            module.warn(f"These nodes were not found in the cluster and are ignored: {', '.join(unresolved_nodes)}")
 
     # if remote backup
     if module.params['remote']:
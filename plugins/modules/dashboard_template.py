@@ -61,21 +61,45 @@ options:
             - It can be read from the environment variable AXONOPS_CLUSTER_TYPE.
         required: false
         type: str
+    skip_unchanged:
+        description:
+            - Skip the dashboard when its configuration is the same as the last time it was applied from this
+              controller, without reading the dashboards from AxonOps. Changes made outside of Ansible are not
+              detected while enabled.
+            - It can be read from the environment variable AXONOPS_SKIP_UNCHANGED.
+        required: false
+        type: bool
+        default: false
+    conflict_retries:
+        description:
+            - When above C(0), the document is read again before writing while holding a lock shared by the tasks
+              running on the same machine, and if someone else changed it in the meantime the change is worked out
+              again on the new content. This is how many more times it is read while it keeps changing.
+            - The lock is a file under I(cache_dir), it doesn't cover the runs on other controllers.
+            - C(0) writes without reading it again, saving a request per write.
+            - It can be read from the environment variable AXONOPS_CONFLICT_RETRIES.
+        required: false
+        type: int
+        default: 0
+'''
+
+RETURN = r'''
+fingerprint_matched:
+    description: The configuration wasn't edited since it was last applied, so it was not compared with AxonOps.
+    type: bool
+    returned: when skip_unchanged is enabled and the configuration wasn't edited
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 
-from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import dicts_are_different, \
-    make_module_args, get_axonops_instance
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
+    get_axonops_instance, report_timings
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_dashboards import dashboard_args, \
+    dashboard_template_url, desired_dashboard, merge_dashboards
 
 
 def run_module():
-    module_args = make_module_args({
-        'present': {'type': 'bool', 'required': False, 'default': True},
-        'name': {'type': 'str', 'required': True},
-        'filters': {'type': 'list', 'required': False},
-        'panels': {'type': 'list', 'required': False},
-    })
+    module_args = make_module_args(dashboard_args())
 
     module = AnsibleModule(
         argument_spec=module_args,
@@ -87,78 +111,55 @@ def run_module():
     }
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
 
-    # e.g  http://127.0.0.1:3000/api/v1/dashboardtemplate/demo/cassandra/demo-cluster
-    dashboardtemplate_url = (f"/api/v1/dashboardtemplate/"
-                             f"{module.params['org']}/{axonops.get_cluster_type()}/{module.params['cluster']}?dashver=2.0")
+    new_data = desired_dashboard(module.params)
+
+    # nothing was edited since the last time this dashboard was applied, don't download and compare all the dashboards
+    resource = ('dashboard_template', module.params['cluster'], module.params['name'])
+    if axonops.desired_state_unchanged(resource, new_data):
+        result['fingerprint_matched'] = True
+        module.exit_json(**result)
+        return
+
+    dashboardtemplate_url = dashboard_template_url(module.params['org'], axonops.get_cluster_type(),
+                                                   module.params['cluster'])
 
     old_templates, return_error = axonops.do_request(dashboardtemplate_url)
     if return_error:
         module.fail_json(msg=return_error, **result)
 
-    # the old template if exists
-    old_template_found = None
-    # the position where we found the old template
-    old_template_position = None
-    dashboards_to_send = []
-    if 'dashboards' in old_templates:
-        for i, old_template in enumerate(old_templates['dashboards']):
-            if 'name' in old_template and old_template['name'] == module.params['name']:
-                old_template_found = old_template
-                old_template_position = i
-            else:
-                dashboards_to_send.append(old_template)
-
-    if old_template_found:
-        old_data = {
-            'present': True,
-            'name': old_template_found['name'],
-            'filters': old_template_found.get('filters'),
-            'panels': old_template_found.get('panels'),
-        }
-    else:
-        old_data = {
-            'present': False,
-            'name': None,
-            'filters': None,
-            'panels': None,
-        }
-
-    new_data = {
-        'present': module.params['present'],
-        'name': module.params['name'],
-        'filters': module.params['filters'],
-        'panels': module.params['panels'],
-    }
+    _, outcomes = merge_dashboards(old_templates.get('dashboards'), [new_data])
+    outcome = outcomes[0]
 
-    changed = dicts_are_different(new_data, old_data)
-    result['changed'] = changed
-    result['diff'] = {'before': old_data, 'after': new_data}
+    result['changed'] = outcome['changed']
+    result['diff'] = {'before': outcome['before'], 'after': outcome['after']}
 
-    if module.check_mode or not changed:
+    if module.check_mode:
         module.exit_json(**result)
         return
 
-    result['test'] = len(old_templates['dashboards'])
-    # if we have the position of the old index, we use it to keep the order
-    if old_template_position:
-        dashboards_to_send.insert(old_template_position, new_data)
-    else:
-        dashboards_to_send.append(new_data)
-    payload = {
-        'type': module.params['cluster_type'],
-        'dashboards': dashboards_to_send
-    }
+    if not outcome['changed']:
+        axonops.remember_desired_state(resource, new_data)
+        module.exit_json(**result)
+        return
+
+    # merge again if someone else changed the dashboards in the meantime
+    def build(templates):
+        dashboards, outcomes = merge_dashboards((templates or {}).get('dashboards'), [new_data])
+        if not outcomes[0]['changed']:
+            return None, None
+        return {'type': module.params['cluster_type'], 'dashboards': dashboards}, None
 
-    # result['payload'] = {'payload': payload}
-    _, error = axonops.do_request(rel_url=dashboardtemplate_url, method='PUT', json_data=payload)
+    _, error = axonops.update_document(dashboardtemplate_url, old_templates, build)
     if error is not None:
         module.fail_json(msg="Failed to create dashboard: " + str(error), **result)
         return
 
+    axonops.remember_desired_state(resource, new_data)
     module.exit_json(**result)
 
 
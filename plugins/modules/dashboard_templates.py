@@ -0,0 +1,276 @@
+#!/usr/bin/python3
+
+DOCUMENTATION = r'''
+---
+module: axonops_dashboard_templates
+
+short_description: Set a list of dashboard templates in one go
+
+version_added: '0.7.0'
+
+description:
+    - Set many dashboard templates of a cluster with a single module invocation.
+    - The dashboard templates are downloaded once, all the dashboards are merged in memory keeping the position
+      of the existing ones, and the whole list is written back with at most one PUT per cluster.
+    - Each dashboard accepts the same options as M(axonops.axonops.dashboard_template).
+
+options:
+    base_url:
+        description:
+            - This represent the base url.
+            - Specify this parameter if you are running on-premise.
+            - Ignore if you are Running AxonOps SaaS.
+        required: false
+        type: str
+    org:
+        description:
+            - This is the organisation name in AxonOps Saas.
+            - It can be read from the environment variable AXONOPS_ORG.
+        required: true
+        type: str
+    cluster:
+        description:
+            - Cluster where to apply.
+            - It can be read from the environment variable AXONOPS_CLUSTER.
+            - One of I(cluster) or I(clusters) is required.
+        required: false
+        type: str
+    clusters:
+        description:
+            - Apply the same dashboards to all these clusters, reconciling them concurrently.
+            - When set, I(cluster) is ignored and the result is reported per cluster in C(clusters).
+            - A cluster failing doesn't stop the others, the module fails at the end listing the failed clusters.
+        required: false
+        type: list
+        elements: str
+    parallelism:
+        description:
+            - Maximum number of clusters reconciled at the same time when I(clusters) is set.
+        required: false
+        type: int
+        default: 4
+    auth_token:
+        description:
+            - api-token for authenticate to AxonOps SaaS.
+            - It can be read from the environment variable AXONOPS_TOKEN.
+        required: false
+        type: str
+    api_token:
+        description:
+            - api-token to authenticate with AxonOps Server
+        required: false
+        type: str
+    username:
+        description:
+            - Username for authenticate.
+            - It can be read from the environment variable AXONOPS_USERNAME.
+        required: false
+        type: str
+    password:
+        description:
+            - password for authenticate.
+            - It can be read from the environment variable AXONOPS_PASSWORD.
+        required: false
+        type: str
+    cluster_type:
+        description:
+            - The typo of cluster, cassandra, DSE, etc.
+            - Default is cassandra
+            - It can be read from the environment variable AXONOPS_CLUSTER_TYPE.
+        required: false
+        type: str
+    dashboards:
+        description:
+            - The list of dashboard templates to set.
+            - Every element takes the options of M(axonops.axonops.dashboard_template),
+              C(name), C(filters), C(panels) and C(present).
+            - A dashboard with C(present=false) is removed.
+        required: true
+        type: list
+        elements: dict
+    skip_unchanged:
+        description:
+            - Skip the dashboards of a cluster when the list of dashboards is the same as the last time it was
+              applied from this controller, without reading the dashboard templates from AxonOps. Changes made
+              outside of Ansible are not detected while enabled.
+            - It can be read from the environment variable AXONOPS_SKIP_UNCHANGED.
+        required: false
+        type: bool
+        default: false
+    conflict_retries:
+        description:
+            - When above C(0), the document is read again before writing while holding a lock shared by the tasks
+              running on the same machine, and if someone else changed it in the meantime the change is worked out
+              again on the new content. This is how many more times it is read while it keeps changing.
+            - The lock is a file under I(cache_dir), it doesn't cover the runs on other controllers.
+            - C(0) writes without reading it again, saving a request per write.
+            - It can be read from the environment variable AXONOPS_CONFLICT_RETRIES.
+        required: false
+        type: int
+        default: 0
+'''
+
+EXAMPLES = r'''
+  - name: Set all the dashboards of a cluster
+    axonops.axonops.dashboard_templates:
+      auth_token: "{{ secret }}"
+      org: my_company
+      cluster: my_cluster
+      dashboards: "{{ lookup('file', 'dashboards.yml') | from_yaml }}"
+
+  - name: Remove a dashboard
+    axonops.axonops.dashboard_templates:
+      auth_token: "{{ secret }}"
+      org: my_company
+      cluster: my_cluster
+      dashboards:
+        - name: Old dashboard
+          present: false
+'''
+
+RETURN = r'''
+dashboards:
+    description: The outcome for every dashboard, in the same order as the input.
+    type: list
+    returned: when I(cluster) is used
+    contains:
+        name:
+            description: The name of the dashboard.
+            type: str
+        changed:
+            description: Whether the dashboard has been (or would be, in check mode) created, updated or removed.
+            type: bool
+        action:
+            description: One of C(none), C(create), C(update) or C(delete).
+            type: str
+clusters:
+    description:
+        - The outcome for every cluster when I(clusters) is set, keyed by cluster name.
+        - Every entry has C(changed) and C(dashboards) as described above, plus C(failed) and C(msg) when the
+          cluster failed.
+    type: dict
+    returned: when I(clusters) is set
+fingerprint_matched:
+    description:
+        - The dashboards weren't edited since they were last applied, so they were not compared with AxonOps.
+        - Also set in the entry of every cluster in I(clusters).
+    type: bool
+    returned: when skip_unchanged is enabled and the dashboards weren't edited
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
+    get_axonops_instance, report_timings
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_dashboards import dashboard_args, \
+    dashboard_template_url, desired_dashboard, merge_dashboards
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_fanout import \
+    add_item_outcomes, aggregate_cluster_outcomes, run_per_cluster
+
+
+def reconcile_cluster(axonops, org, cluster, cluster_type, dashboards, check_mode):
+    """
+    Merge the dashboards into the ones of the cluster and write the result back with a single PUT.
+    Returns the cluster result and an error message
+    """
+    result = {
+        'changed': False,
+        'dashboards': [],
+        'diff': [],
+    }
+
+    desired = [desired_dashboard(dashboard) for dashboard in dashboards]
+
+    # nothing was edited since the last time these dashboards were applied, don't download and compare them
+    resource = ('dashboard_templates', cluster)
+    if axonops.desired_state_unchanged(resource, desired):
+        result['fingerprint_matched'] = True
+        return result, None
+
+    dashboardtemplate_url = dashboard_template_url(org, axonops.get_cluster_type(), cluster)
+    old_templates, error = axonops.do_request(dashboardtemplate_url)
+    if error is not None:
+        return result, "Error occurred fetching AxonOps dashboard template: " + dashboardtemplate_url + str(error)
+
+    _, outcomes = merge_dashboards(old_templates.get('dashboards'), desired)
+
+    add_item_outcomes(result, 'dashboards', outcomes)
+
+    if check_mode:
+        return result, None
+
+    if result['changed']:
+        # merge again if someone else changed the dashboards in the meantime
+        def build(templates):
+            dashboards_to_send, outcomes = merge_dashboards((templates or {}).get('dashboards'), desired)
+            if not any(outcome['changed'] for outcome in outcomes):
+                return None, None
+            return {'type': cluster_type, 'dashboards': dashboards_to_send}, None
+
+        _, error = axonops.update_document(dashboardtemplate_url, old_templates, build)
+        if error is not None:
+            return result, "Failed to set the dashboards: " + str(error)
+
+    axonops.remember_desired_state(resource, desired)
+    return result, None
+
+
+def run_module():
+    module_args = make_module_args({
+        'dashboards': {'type': 'list', 'elements': 'dict', 'required': True, 'options': dashboard_args()},
+        'clusters': {'type': 'list', 'elements': 'str', 'required': False},
+        'parallelism': {'type': 'int', 'required': False, 'default': 4},
+    })
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+    )
+    result = {
+        'changed': False,
+        'dashboards': [],
+        'diff': [],
+    }
+
+    org = module.params['org']
+    cluster = module.params['cluster']
+    clusters = module.params['clusters']
+    cluster_type = module.params['cluster_type']
+    dashboards = module.params['dashboards']
+
+    if not cluster and not clusters:
+        module.fail_json(msg="One of cluster or clusters is required", **result)
+
+    axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
+
+    if axonops.errors:
+        module.fail_json(msg=' '.join(axonops.errors), **result)
+
+    if not clusters:
+        result, error = reconcile_cluster(axonops, org, cluster, cluster_type, dashboards, module.check_mode)
+        if error is not None:
+            module.fail_json(msg=error, **result)
+        module.exit_json(**result)
+        return
+
+    # reconcile all the clusters at the same time, a cluster failing doesn't stop the others
+    outcomes = run_per_cluster(
+        clusters,
+        lambda name: reconcile_cluster(axonops, org, name, cluster_type, dashboards, module.check_mode),
+        module.params['parallelism'],
+    )
+
+    result, error = aggregate_cluster_outcomes(outcomes, 'dashboards', "set the dashboards")
+    if error is not None:
+        module.fail_json(msg=error, **result)
+        return
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
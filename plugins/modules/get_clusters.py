@@ -61,7 +61,8 @@ EXAMPLES = r'''
 '''
 
 from ansible.module_utils.basic import AnsibleModule
-from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, get_axonops_instance
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, get_axonops_instance, \
+    report_timings
 
 
 def run_module():
@@ -78,6 +79,7 @@ def run_module():
     }
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
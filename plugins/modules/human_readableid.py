@@ -83,7 +83,7 @@ url:
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
-    dicts_are_different, get_axonops_instance
+    dicts_are_different, get_axonops_instance, report_timings
 
 
 def run_module():
@@ -103,6 +103,7 @@ def run_module():
     )
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
@@ -181,7 +181,8 @@ import uuid
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, find_by_field, \
-    dicts_are_different, get_value_by_name, normalize_numbers, get_integration_id_by_name, get_axonops_instance
+    dicts_are_different, get_value_by_name, normalize_numbers, get_integration_id_by_name, get_axonops_instance, \
+    report_timings
 
 
 
@@ -223,24 +224,25 @@ def run_module():
     cluster = module.params['cluster']
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
 
     alerts_url = f"/api/v1/alert-rules/{org}/{axonops.get_cluster_type()}/{cluster}"
 
-    # Get existing alerts
-    existing_alerts, error = axonops.do_request(alerts_url)
+    # Get existing alerts, only the ones with the name of this rule are kept
+    existing_alerts, error = axonops.get_items(
+        alerts_url, ('metricrules',), keep=lambda alert: alert if alert.get('alert') == module.params['name'] else None)
     if error is not None:
         module.fail_json(msg=error)
         return
 
     # check if it is an old alert or a new one
     old_alert = None
-    if existing_alerts:
-        for alert in existing_alerts['metricrules']:
-            if 'events' in alert['expr'] and alert['alert'] == module.params['name']:
-                old_alert = alert
+    for alert in existing_alerts:
+        if 'events' in alert['expr']:
+            old_alert = alert
 
     # Bail out early if the alert doesn't exist and we don't want it to
     if not old_alert and not module.params['present']:
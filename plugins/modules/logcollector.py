@@ -66,8 +66,17 @@ options:
             - Set the name to identify the collector in the AxonOps dash.
         required: true
         type: str
-
-
+    conflict_retries:
+        description:
+            - When above C(0), the document is read again before writing while holding a lock shared by the tasks
+              running on the same machine, and if someone else changed it in the meantime the change is worked out
+              again on the new content. This is how many more times it is read while it keeps changing.
+            - The lock is a file under I(cache_dir), it doesn't cover the runs on other controllers.
+            - C(0) writes without reading it again, saving a request per write.
+            - It can be read from the environment variable AXONOPS_CONFLICT_RETRIES.
+        required: false
+        type: int
+        default: 0
 '''
 
 EXAMPLES = r'''
@@ -89,45 +98,14 @@ from copy import copy
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
-    dicts_are_different, get_axonops_instance
-
+    dicts_are_different, get_axonops_instance, report_timings
 
-def run_module():
-    module_args = make_module_args({
-        'present': {'type': 'bool', 'required': False, 'default': True},
-        'name': {'type': 'str', 'required': True},
-        'interval': {'type': 'str', 'required': False, 'default': '5s'},
-        'timeout': {'type': 'str', 'required': False, 'default': '1m'},
-        'filename': {'type': 'str', 'required': True},
-        'dateFormat': {'type': 'str', 'required': False, 'default': 'yyyy-MM-dd HH:mm:ss,SSS'},
-        'infoRegex': {'type': 'str', 'required': False, 'default': ''},
-        'warningRegex': {'type': 'str', 'required': False, 'default': ''},
-        'errorRegex': {'type': 'str', 'required': False, 'default': ''},
-        'debugRegex': {'type': 'str', 'required': False, 'default': ''},
-        'readonly': {'type': 'bool', 'required': False, 'default': False}
-    })
-
-    module = AnsibleModule(
-        argument_spec=module_args,
-        supports_check_mode=True
-    )
-
-    result = {
-        'changed': False,
-    }
-
-    axonops = get_axonops_instance(module.params)
-
-    if axonops.errors:
-        module.fail_json(msg=' '.join(axonops.errors), **result)
-
-    logcollectors_url = \
-        f"/api/v1/logcollectors/{module.params['org']}/{axonops.get_cluster_type()}/{module.params['cluster']}"
-
-    logcollectors_api_output, return_error = axonops.do_request(logcollectors_url)
-    if return_error:
-        module.fail_json(msg=return_error, **result)
 
+def plan_logcollectors(logcollectors_api_output: list, params: dict):
+    """
+    Replace the logcollector of the file params['filename'] in the list returned by the API.
+    Returns the list to send, the current logcollector and the requested one, both in the format of the diff
+    """
     # all the logcollectors
     logcollectors = []
 
@@ -136,7 +114,7 @@ def run_module():
 
     for logcollector_api_output in logcollectors_api_output:
         # the file is used to identify the collector
-        if logcollector_api_output['filename'] == module.params['filename']:
+        if logcollector_api_output['filename'] == params['filename']:
 
             current_logcollector = {
                 'uuid': logcollector_api_output['uuid'],
@@ -159,22 +137,20 @@ def run_module():
     # create the basic requested logcollector for the diff
     requested_logcollector = {
         'uuid': current_logcollector['uuid'] if current_logcollector else str(uuid.uuid4()),
-        'present': module.params['present'],
-        'name': module.params['name'],
-        'interval': module.params['interval'],
-        'timeout': module.params['timeout'],
-        'filename': module.params['filename'],
-        'dateFormat': module.params['dateFormat'],
-        'infoRegex': module.params['infoRegex'],
-        'warningRegex': module.params['warningRegex'],
-        'errorRegex': module.params['errorRegex'],
-        'debugRegex': module.params['debugRegex'],
-        'readonly': module.params['readonly'],
+        'present': params['present'],
+        'name': params['name'],
+        'interval': params['interval'],
+        'timeout': params['timeout'],
+        'filename': params['filename'],
+        'dateFormat': params['dateFormat'],
+        'infoRegex': params['infoRegex'],
+        'warningRegex': params['warningRegex'],
+        'errorRegex': params['errorRegex'],
+        'debugRegex': params['debugRegex'],
+        'readonly': params['readonly'],
     }
 
-    changed = dicts_are_different(current_logcollector, requested_logcollector)
-    result['diff'] = {'before': current_logcollector, 'after': copy(requested_logcollector)}
-    result['changed'] = changed
+    diff_logcollector = copy(requested_logcollector)
 
     # add the mandatory fields to the requested logcollector
     requested_logcollector['id'] = ''
@@ -191,16 +167,63 @@ def run_module():
         del requested_logcollector['present']
         logcollectors.append(requested_logcollector)
 
+    return logcollectors, current_logcollector, diff_logcollector
+
+
+def run_module():
+    module_args = make_module_args({
+        'present': {'type': 'bool', 'required': False, 'default': True},
+        'name': {'type': 'str', 'required': True},
+        'interval': {'type': 'str', 'required': False, 'default': '5s'},
+        'timeout': {'type': 'str', 'required': False, 'default': '1m'},
+        'filename': {'type': 'str', 'required': True},
+        'dateFormat': {'type': 'str', 'required': False, 'default': 'yyyy-MM-dd HH:mm:ss,SSS'},
+        'infoRegex': {'type': 'str', 'required': False, 'default': ''},
+        'warningRegex': {'type': 'str', 'required': False, 'default': ''},
+        'errorRegex': {'type': 'str', 'required': False, 'default': ''},
+        'debugRegex': {'type': 'str', 'required': False, 'default': ''},
+        'readonly': {'type': 'bool', 'required': False, 'default': False}
+    })
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    result = {
+        'changed': False,
+    }
+
+    axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
+
+    if axonops.errors:
+        module.fail_json(msg=' '.join(axonops.errors), **result)
+
+    logcollectors_url = \
+        f"/api/v1/logcollectors/{module.params['org']}/{axonops.get_cluster_type()}/{module.params['cluster']}"
+
+    logcollectors_api_output, return_error = axonops.do_request(logcollectors_url)
+    if return_error:
+        module.fail_json(msg=return_error, **result)
+
+    _, current_logcollector, requested_logcollector = plan_logcollectors(logcollectors_api_output, module.params)
+
+    changed = dicts_are_different(current_logcollector, requested_logcollector)
+    result['diff'] = {'before': current_logcollector, 'after': requested_logcollector}
+    result['changed'] = changed
+
     if module.check_mode or not changed:
         module.exit_json(**result)
         return
 
-    _, return_error = axonops.do_request(
-        rel_url=logcollectors_url,
-        method='PUT',
-        json_data=logcollectors,
-        form_field="addlogs"
-    )
+    # plan again if someone else changed the logcollectors in the meantime
+    def build(api_output):
+        logcollectors, current, requested = plan_logcollectors(api_output or [], module.params)
+        return (logcollectors if dicts_are_different(current, requested) else None), None
+
+    _, return_error = axonops.update_document(logcollectors_url, logcollectors_api_output, build,
+                                              form_field="addlogs")
 
     if return_error:
         module.fail_json(msg=return_error, **result)
@@ -0,0 +1,207 @@
+#!/usr/bin/python3
+
+DOCUMENTATION = r'''
+---
+module: axonops_migrate
+short_description: Copy the dashboards, alerts and health checks of a cluster to other clusters
+version_added: '0.7.0'
+description:
+    - Copy the dashboard templates, alert rules, alert routes and health checks of a source cluster to one or
+      more target clusters.
+    - The source cluster is read once, the target clusters are written concurrently.
+    - The alert rules are pointed to the charts with the same dashboard name and title on the target, the alert
+      rules, routes and checks are pointed to the integrations with the same type and name on the target.
+    - The migration only adds and updates, whatever exists only on a target is left as it is. Dashboards, alert
+      rules and checks are matched by name.
+    - References that can't be resolved on a target, an alert rule whose chart or a route whose integration
+      doesn't exist there, are skipped and reported in C(skipped) without failing the cluster.
+options:
+    base_url:
+        description:
+            - This represent the base url.
+            - Specify this parameter if you are running on-premise.
+            - Ignore if you are Running AxonOps SaaS.
+        required: false
+        type: str
+    org:
+        description:
+            - This is the organisation name in AxonOps Saas.
+            - It can be read from the environment variable AXONOPS_ORG.
+        required: true
+        type: str
+    cluster:
+        description:
+            - Source cluster when I(source_cluster) is not set.
+            - It can be read from the environment variable AXONOPS_CLUSTER.
+        required: false
+        type: str
+    source_cluster:
+        description:
+            - The cluster to copy from.
+        required: false
+        type: str
+    clusters:
+        description:
+            - The clusters to copy to.
+            - A cluster failing doesn't stop the others, the module fails at the end listing the failed clusters.
+        required: true
+        type: list
+        elements: str
+    resources:
+        description:
+            - What to copy.
+        required: false
+        type: list
+        elements: str
+        choices: ['dashboards', 'alert_rules', 'alert_routes', 'healthchecks']
+        default: ['dashboards', 'alert_rules', 'alert_routes', 'healthchecks']
+    parallelism:
+        description:
+            - Maximum number of target clusters written at the same time.
+        required: false
+        type: int
+        default: 4
+    auth_token:
+        description:
+            - api-token for authenticate to AxonOps SaaS.
+            - It can be read from the environment variable AXONOPS_TOKEN.
+        required: false
+        type: str
+    api_token:
+        description:
+            - api-token to authenticate with AxonOps Server
+        required: false
+        type: str
+    username:
+        description:
+            - Username for authenticate.
+            - It can be read from the environment variable AXONOPS_USERNAME.
+        required: false
+        type: str
+    password:
+        description:
+            - password for authenticate.
+            - It can be read from the environment variable AXONOPS_PASSWORD.
+        required: false
+        type: str
+    cluster_type:
+        description:
+            - The typo of cluster, cassandra, DSE, etc.
+            - Default is cassandra
+            - It can be read from the environment variable AXONOPS_CLUSTER_TYPE.
+        required: false
+        type: str
+'''
+
+EXAMPLES = r'''
+  - name: Copy the monitoring of the staging cluster to the production clusters
+    axonops.axonops.migrate:
+      auth_token: "{{ secret }}"
+      org: my_company
+      source_cluster: staging
+      clusters:
+        - prod-eu
+        - prod-us
+
+  - name: Copy only the dashboards
+    axonops.axonops.migrate:
+      auth_token: "{{ secret }}"
+      org: my_company
+      source_cluster: staging
+      clusters: [prod-eu]
+      resources: [dashboards]
+'''
+
+RETURN = r'''
+source:
+    description: The number of dashboards, alert rules, alert routes and checks read from the source cluster.
+    type: dict
+    returned: always
+clusters:
+    description:
+        - The outcome for every target cluster, keyed by cluster name.
+        - Every entry has C(changed), C(skipped), the list of the references that couldn't be resolved on the
+          cluster, and for every resource copied a list with the C(name) and the C(action) (C(none), C(create)
+          or C(update)) of every item, plus C(failed) and C(msg) when the cluster failed.
+    type: dict
+    returned: always
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
+    get_axonops_instance, report_timings
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_migrate import MIGRATE_RESOURCES, \
+    migrate_cluster, read_source
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_fanout import run_per_cluster
+
+
+def run_module():
+    module_args = make_module_args({
+        'source_cluster': {'type': 'str', 'required': False},
+        'clusters': {'type': 'list', 'elements': 'str', 'required': True},
+        'resources': {'type': 'list', 'elements': 'str', 'required': False, 'choices': list(MIGRATE_RESOURCES),
+                      'default': list(MIGRATE_RESOURCES)},
+        'parallelism': {'type': 'int', 'required': False, 'default': 4},
+    })
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+    )
+
+    result = {
+        'changed': False,
+        'source': {},
+        'clusters': {},
+    }
+
+    org = module.params['org']
+    source_cluster = module.params['source_cluster'] or module.params['cluster']
+    resources = module.params['resources']
+
+    if not source_cluster:
+        module.fail_json(msg="One of source_cluster or cluster is required", **result)
+
+    axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
+
+    if axonops.errors:
+        module.fail_json(msg=' '.join(axonops.errors), **result)
+
+    # read the source once for all the targets
+    source, error = read_source(axonops, org, source_cluster, resources)
+    if error is not None:
+        module.fail_json(msg=f"Failed to read the cluster {source_cluster}: {error}", **result)
+    result['source'] = source.summary()
+
+    outcomes = run_per_cluster(
+        module.params['clusters'],
+        lambda name: migrate_cluster(axonops, org, source, name, resources, module.check_mode),
+        module.params['parallelism'],
+    )
+
+    failed = []
+    for name, (cluster_result, error) in outcomes.items():
+        cluster_result = cluster_result or {'changed': False, 'skipped': []}
+        result['clusters'][name] = cluster_result
+        if cluster_result['changed']:
+            result['changed'] = True
+        if error is not None:
+            cluster_result.update({'failed': True, 'msg': error})
+            failed.append(name)
+
+    if failed:
+        module.fail_json(msg=f"Failed to migrate {source_cluster} to {len(failed)} of {len(outcomes)} clusters: "
+                             + ', '.join(failed), **result)
+        return
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/python3
+
+DOCUMENTATION = r'''
+---
+module: axonops_service_checks
+
+short_description: Set a list of HTTP, TCP and shell checks in one go
+
+version_added: '0.7.0'
+
+description:
+    - Set many service checks of a cluster with a single module invocation.
+    - The health checks are downloaded once, the HTTP, TCP and shell checks are all compared in memory and the
+      health checks are written back with a single PUT, only when something changed.
+    - Each check accepts the options of M(axonops.axonops.http_check), M(axonops.axonops.tcp_check) or
+      M(axonops.axonops.shell_check) according to its C(type).
+
+options:
+    base_url:
+        description:
+            - This represent the base url.
+            - Specify this parameter if you are running on-premise.
+            - Ignore if you are Running AxonOps SaaS.
+        required: false
+        type: str
+    org:
+        description:
+            - This is the organisation name in AxonOps Saas.
+            - It can be read from the environment variable AXONOPS_ORG.
+        required: true
+        type: str
+    cluster:
+        description:
+            - Cluster where to apply.
+            - It can be read from the environment variable AXONOPS_CLUSTER.
+            - One of I(cluster) or I(clusters) is required.
+        required: false
+        type: str
+    clusters:
+        description:
+            - Apply the same checks to all these clusters, reconciling them concurrently.
+            - When set, I(cluster) is ignored and the result is reported per cluster in C(clusters).
+            - A cluster failing doesn't stop the others, the module fails at the end listing the failed clusters.
+        required: false
+        type: list
+        elements: str
+    parallelism:
+        description:
+            - Maximum number of clusters reconciled at the same time when I(clusters) is set.
+        required: false
+        type: int
+        default: 4
+    auth_token:
+        description:
+            - api-token for authenticate to AxonOps SaaS.
+            - It can be read from the environment variable AXONOPS_TOKEN.
+        required: false
+        type: str
+    api_token:
+        description:
+            - api-token to authenticate with AxonOps Server
+        required: false
+        type: str
+    username:
+        description:
+            - Username for authenticate.
+            - It can be read from the environment variable AXONOPS_USERNAME.
+        required: false
+        type: str
+    password:
+        description:
+            - password for authenticate.
+            - It can be read from the environment variable AXONOPS_PASSWORD.
+        required: false
+        type: str
+    cluster_type:
+        description:
+            - The typo of cluster, cassandra, DSE, etc.
+            - Default is cassandra
+            - It can be read from the environment variable AXONOPS_CLUSTER_TYPE.
+        required: false
+        type: str
+    checks:
+        description:
+            - The list of checks to set.
+            - Every element has a C(type), one of C(http), C(tcp) or C(shell), a C(name) and C(present), plus
+              C(interval), C(timeout) and the options of its type, C(http), C(method) and C(tls_skip_verify) for
+              the HTTP checks, C(tcp) for the TCP checks, C(script) and C(shell) for the shell checks.
+            - A check with C(present=false) is removed, only its C(type) and C(name) are needed.
+        required: true
+        type: list
+        elements: dict
+    skip_unchanged:
+        description:
+            - Skip the checks of a cluster when the list of checks is the same as the last time it was applied
+              from this controller, without reading the health checks from AxonOps. Changes made outside of
+              Ansible are not detected while enabled.
+            - It can be read from the environment variable AXONOPS_SKIP_UNCHANGED.
+        required: false
+        type: bool
+        default: false
+    conflict_retries:
+        description:
+            - When above C(0), the document is read again before writing while holding a lock shared by the tasks
+              running on the same machine, and if someone else changed it in the meantime the change is worked out
+              again on the new content. This is how many more times it is read while it keeps changing.
+            - The lock is a file under I(cache_dir), it doesn't cover the runs on other controllers.
+            - C(0) writes without reading it again, saving a request per write.
+            - It can be read from the environment variable AXONOPS_CONFLICT_RETRIES.
+        required: false
+        type: int
+        default: 0
+'''
+
+EXAMPLES = r'''
+  - name: Set all the service checks of a cluster
+    axonops.axonops.service_checks:
+      auth_token: "{{ secret }}"
+      org: my_company
+      cluster: my_cluster
+      checks:
+        - type: http
+          name: AxonOps dashboard
+          interval: 1m
+          timeout: 10s
+          http: https://dash.example.com
+        - type: tcp
+          name: CQL port
+          interval: 1m
+          timeout: 10s
+          tcp: localhost:9042
+        - type: shell
+          name: Reboot required
+          interval: 1h
+          timeout: 1m
+          script: test ! -f /var/run/reboot-required
+        - type: shell
+          name: Old check
+          present: false
+'''
+
+RETURN = r'''
+checks:
+    description: The outcome for every check, in the same order as the input.
+    type: list
+    returned: when I(cluster) is used
+    contains:
+        type:
+            description: The type of the check.
+            type: str
+        name:
+            description: The name of the check.
+            type: str
+        changed:
+            description: Whether the check has been (or would be, in check mode) created, updated or removed.
+            type: bool
+        action:
+            description: One of C(none), C(create), C(update) or C(delete).
+            type: str
+clusters:
+    description:
+        - The outcome for every cluster when I(clusters) is set, keyed by cluster name.
+        - Every entry has C(changed) and C(checks) as described above, plus C(failed) and C(msg) when the
+          cluster failed.
+    type: dict
+    returned: when I(clusters) is set
+fingerprint_matched:
+    description:
+        - The checks weren't edited since they were last applied, so they were not compared with AxonOps.
+        - Also set in the entry of every cluster in I(clusters).
+    type: bool
+    returned: when skip_unchanged is enabled and the checks weren't edited
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
+    get_axonops_instance, report_timings
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_service_checks import healthchecks_url, \
+    plan_service_checks, service_check_args, service_checks_builder
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_fanout import \
+    add_item_outcomes, aggregate_cluster_outcomes, run_per_cluster
+
+
+def reconcile_cluster(axonops, org, cluster, checks, check_mode):
+    """
+    Compare the checks with the ones configured on the cluster and write the health checks back with a single PUT.
+    Returns the cluster result and an error message
+    """
+    result = {
+        'changed': False,
+        'checks': [],
+        'diff': [],
+    }
+
+    # nothing was edited since the last time these checks were applied, don't download and compare them
+    resource = ('service_checks', cluster)
+    if axonops.desired_state_unchanged(resource, checks):
+        result['fingerprint_matched'] = True
+        return result, None
+
+    url = healthchecks_url(org, axonops.get_cluster_type(), cluster)
+    saas_settings, error = axonops.do_request(url)
+    if error is not None:
+        return result, "Error occurred fetching AxonOps health checks: " + url + str(error)
+
+    _, outcomes, error = plan_service_checks(saas_settings, checks)
+    if error is not None:
+        return result, error
+
+    add_item_outcomes(result, 'checks', outcomes, ('type', 'name', 'changed', 'action'),
+                      lambda outcome: f"{outcome['type']} check {outcome['name']}")
+
+    if check_mode:
+        return result, None
+
+    if result['changed']:
+        _, error = axonops.update_document(url, saas_settings, service_checks_builder(checks))
+        if error is not None:
+            return result, "Failed to set the service checks: " + str(error)
+
+    axonops.remember_desired_state(resource, checks)
+    return result, None
+
+
+def run_module():
+    module_args = make_module_args({
+        'checks': {'type': 'list', 'elements': 'dict', 'required': True, 'options': service_check_args()},
+        'clusters': {'type': 'list', 'elements': 'str', 'required': False},
+        'parallelism': {'type': 'int', 'required': False, 'default': 4},
+    })
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True,
+    )
+    result = {
+        'changed': False,
+        'checks': [],
+        'diff': [],
+    }
+
+    org = module.params['org']
+    cluster = module.params['cluster']
+    clusters = module.params['clusters']
+    checks = module.params['checks']
+
+    if not cluster and not clusters:
+        module.fail_json(msg="One of cluster or clusters is required", **result)
+
+    axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
+
+    if axonops.errors:
+        module.fail_json(msg=' '.join(axonops.errors), **result)
+
+    if not clusters:
+        result, error = reconcile_cluster(axonops, org, cluster, checks, module.check_mode)
+        if error is not None:
+            module.fail_json(msg=error, **result)
+        module.exit_json(**result)
+        return
+
+    # reconcile all the clusters at the same time, a cluster failing doesn't stop the others
+    outcomes = run_per_cluster(
+        clusters,
+        lambda name: reconcile_cluster(axonops, org, name, checks, module.check_mode),
+        module.params['parallelism'],
+    )
+
+    result, error = aggregate_cluster_outcomes(outcomes, 'checks', "set the service checks")
+    if error is not None:
+        module.fail_json(msg=error, **result)
+        return
+
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
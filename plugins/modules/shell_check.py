@@ -61,6 +61,17 @@ options:
             - It can be read from the environment variable AXONOPS_CLUSTER_TYPE.
         required: false
         type: str
+    conflict_retries:
+        description:
+            - When above C(0), the document is read again before writing while holding a lock shared by the tasks
+              running on the same machine, and if someone else changed it in the meantime the change is worked out
+              again on the new content. This is how many more times it is read while it keeps changing.
+            - The lock is a file under I(cache_dir), it doesn't cover the runs on other controllers.
+            - C(0) writes without reading it again, saving a request per write.
+            - It can be read from the environment variable AXONOPS_CONFLICT_RETRIES.
+        required: false
+        type: int
+        default: 0
 '''
 
 EXAMPLES = r'''
@@ -89,12 +100,12 @@ url:
 
 '''
 
-import uuid
-from copy import copy
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import make_module_args, \
-    dicts_are_different, get_axonops_instance
+    get_axonops_instance, report_timings
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_service_checks import healthchecks_url, \
+    plan_service_checks, service_checks_builder
 
 
 def run_module():
@@ -117,90 +128,30 @@ def run_module():
     }
 
     axonops = get_axonops_instance(module.params)
+    report_timings(module, axonops)
 
     if axonops.errors:
         module.fail_json(msg=' '.join(axonops.errors), **result)
 
-    healthchecks_url = (f"/api/v1/healthchecks/"
-                        f"{module.params['org']}/{axonops.get_cluster_type()}/{module.params['cluster']}")
+    url = healthchecks_url(module.params['org'], axonops.get_cluster_type(), module.params['cluster'])
 
-    saas_settings, return_error = axonops.do_request(healthchecks_url)
+    saas_settings, return_error = axonops.do_request(url)
     if return_error:
         module.fail_json(msg=return_error, **result)
 
-    # all the shell checks for that environment
-    current_checks_in_saas = saas_settings['shellchecks']
-    shell_checks_to_send_to_saas = []
-    existing_check = None
-    if current_checks_in_saas:
-        for check in current_checks_in_saas:
-            if check['name'] == module.params['name']:
-                existing_check = check
-            else:
-                shell_checks_to_send_to_saas.append(check)
-
-    if module.params['present']:
-        new_check = {
-            'id': existing_check['id'] if existing_check else str(uuid.uuid4()),
-            'present': module.params['present'],
-            'interval': module.params['interval'],
-            'name': module.params['name'],
-            'script': module.params['script'],
-            'shell': module.params['shell'],
-            'timeout': module.params['timeout'],
-        }
-    else:
-        new_check = {
-            'present': False
-        }
-
-    if existing_check:
-        existing_check_filtered = {
-            'id': existing_check['id'],
-            'present': True,
-            'interval': existing_check['interval'],
-            'name': existing_check['name'],
-            'script': existing_check['script'],
-            'shell': existing_check['shell'],
-            'timeout': existing_check['timeout'],
-        }
-    else:
-        existing_check_filtered = {
-            'present': False
-        }
-
-    changed = dicts_are_different(existing_check_filtered, new_check)
-    result['changed'] = changed
-    result['diff'] = {'before': existing_check_filtered, 'after': copy(new_check)}
-
-    if module.check_mode or not changed:
-        module.exit_json(**result)
-        return
-
-    new_check['readonly'] = False
-
-    new_check['integrations'] = {
-        'OverrideError': False,
-        'OverrideInfo': False,
-        'OverrideWarning': False,
-        'Routing': None,
-        'Type': ''
-    }
+    desired = {'type': 'shell', **module.params}
+    _, outcomes, return_error = plan_service_checks(saas_settings, [desired])
+    if return_error:
+        module.fail_json(msg=return_error, **result)
 
-    if new_check['present']:
-        shell_checks_to_send_to_saas.append(new_check)
+    result['changed'] = outcomes[0]['changed']
+    result['diff'] = {'before': outcomes[0]['before'], 'after': outcomes[0]['after']}
 
-    payload = {
-        'httpchecks': saas_settings['httpchecks'],
-        'tcpchecks': saas_settings['tcpchecks'],
-        'shellchecks': shell_checks_to_send_to_saas,
-    }
+    if module.check_mode or not result['changed']:
+        module.exit_json(**result)
+        return
 
-    _, return_error = axonops.do_request(
-        rel_url=healthchecks_url,
-        method='PUT',
-        json_data=payload,
-    )
+    _, return_error = axonops.update_document(url, saas_settings, service_checks_builder([desired]))
 
     if return_error:
         module.fail_json(msg=return_error, **result)
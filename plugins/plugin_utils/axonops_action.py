@@ -0,0 +1,135 @@
+import importlib
+import io
+import json
+import os
+import traceback
+from contextlib import redirect_stdout
+
+from ansible import __version__ as ansible_version
+from ansible.module_utils import basic
+from ansible.module_utils.common import warnings as module_warnings
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+
+try:
+    from ansible.module_utils.common.json import Direction, get_module_decoder, get_module_encoder
+except ImportError:
+    # ansible-core < 2.19 has no serialization profiles, plain json is what the modules speak
+    Direction = get_module_decoder = get_module_encoder = None
+
+display = Display()
+
+MODULES_PACKAGE = 'ansible_collections.axonops.axonops.plugins.modules'
+SERIALIZATION_PROFILE = 'legacy'
+
+
+def controller_execution_enabled(task_vars: dict) -> bool:
+    """
+    The modules run on the controller when the axonops_controller_execution variable
+    (or the AXONOPS_CONTROLLER_EXECUTION environment variable) is true
+    """
+    value = task_vars.get('axonops_controller_execution', os.environ.get('AXONOPS_CONTROLLER_EXECUTION', False))
+    return boolean(value, strict=False)
+
+
+def _reset_module_state():
+    """
+    AnsibleModule keeps the arguments, warnings and deprecations of the current run in module globals,
+    clear them so they don't leak into the next module executed by this process
+    """
+    basic._ANSIBLE_ARGS = None
+    for name in ('_global_warnings', '_global_deprecations'):
+        collected = getattr(module_warnings, name, None)
+        if collected is not None:
+            collected.clear()
+
+
+def run_module_in_process(module_name: str, module_args: dict) -> dict:
+    """
+    Import the collection module and run it in this process, returning the result it would have printed
+    """
+    if get_module_encoder is not None:
+        encoder = get_module_encoder(SERIALIZATION_PROFILE, Direction.CONTROLLER_TO_MODULE)
+        decoder = get_module_decoder(SERIALIZATION_PROFILE, Direction.MODULE_TO_CONTROLLER)
+    else:
+        encoder = decoder = None
+
+    _reset_module_state()
+    basic._ANSIBLE_ARGS = json.dumps({'ANSIBLE_MODULE_ARGS': module_args}, cls=encoder).encode('utf-8')
+    if hasattr(basic, '_ANSIBLE_PROFILE'):
+        basic._ANSIBLE_PROFILE = SERIALIZATION_PROFILE
+
+    stdout = io.StringIO()
+    try:
+        module = importlib.import_module(f"{MODULES_PACKAGE}.{module_name}")
+        with redirect_stdout(stdout):
+            module.main()
+    except SystemExit:
+        # exit_json and fail_json always end with sys.exit
+        pass
+    except Exception as e:
+        return {
+            'failed': True,
+            'msg': f"Error running {module_name} on the controller: {e}",
+            'exception': traceback.format_exc(),
+        }
+    finally:
+        _reset_module_state()
+
+    output = stdout.getvalue().strip()
+    try:
+        # the module prints its result as the last line
+        return json.loads(output.splitlines()[-1], cls=decoder)
+    except (IndexError, ValueError):
+        return {
+            'failed': True,
+            'msg': f"{module_name} did not return a valid result when running on the controller",
+            'module_stdout': output,
+        }
+
+
+class AxonOpsActionModule(ActionBase):
+    """
+    Base for the action plugins of the API-only modules.
+
+    These modules only talk to the AxonOps API, so there's no need to ship them to the target. When
+    axonops_controller_execution is enabled they are imported and run directly in the controller process,
+    skipping the AnsiballZ packaging and a new python interpreter for every task, and sharing the AxonOps
+    client (login and cached responses) between the items of a loop. Otherwise the module is executed as usual.
+    """
+    # name of the module in plugins/modules, set by every action plugin
+    module_name = None
+
+    _supports_async = True
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = {}
+
+        result = super(AxonOpsActionModule, self).run(tmp, task_vars)
+        del tmp  # tmp no longer has any effect
+
+        # an async task runs the module in the background like the normal action does, it can't run in process
+        if self._task.async_val or not controller_execution_enabled(task_vars):
+            wrap_async = self._task.async_val and not self._connection.has_native_async
+            result.update(self._execute_module(module_name=self._task.action, module_args=self._task.args,
+                                               task_vars=task_vars, wrap_async=wrap_async))
+            if not wrap_async:
+                # the async wrapper removes the tmp path itself once the module is done
+                self._remove_tmp_path(self._connection._shell.tmpdir)
+            return result
+
+        module_args = dict(self._task.args)
+        module_args.update({
+            '_ansible_check_mode': bool(self._task.check_mode),
+            '_ansible_diff': bool(self._task.diff),
+            '_ansible_no_log': bool(self._task.no_log),
+            '_ansible_debug': False,
+            '_ansible_verbosity': display.verbosity,
+            '_ansible_version': ansible_version,
+            '_ansible_module_name': self._task.action,
+        })
+
+        result.update(run_module_in_process(self.module_name, module_args))
+        return result
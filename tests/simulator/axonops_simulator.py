@@ -0,0 +1,795 @@
+#!/usr/bin/env python3
+"""
+A stand-in for the AxonOps server, implementing the API endpoints used by the modules and the CLI with the data
+kept in memory, to run the test playbooks, the CLI and the benchmarks without an axon-server.
+
+Only needs the Python standard library:
+
+    python3 tests/simulator/axonops_simulator.py --port 3000 --alert-rules 2000 --dashboards 50 --nodes 1000
+
+The clusters are created on their first request, for any organisation, cluster type and cluster name, filled with
+the synthetic volumes given on the command line. Every request can be slowed down (--latency, --jitter) and a part
+of them answered with an error (--error-rate, --error-status) to exercise the retries. With --gzip the responses are
+gzipped for the clients asking for it and the gzipped request bodies are accepted.
+
+The simulator is driven with its own endpoints under /_simulator:
+    GET  /_simulator/stats   requests, bytes and status codes per endpoint since the start or the last reset
+    POST /_simulator/reset   clear the stats, and the data as well with ?data=true
+    GET  /_simulator/config  the options in use
+    PUT  /_simulator/config  change the latency, jitter and error options of a running simulator
+"""
+import argparse
+import copy
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# the routes of the alerts, as in the integrations-routing URLs of the alert_route module
+ROUTING_TYPES = ('Global', 'Metrics', 'Backups', 'Service%20Checks', 'Nodes', 'Commands', 'Repairs',
+                 'Rolling%20Restart')
+SEVERITIES = ('info', 'warning', 'error')
+INTEGRATION_TYPES = ('slack', 'pagerduty', 'opsgenie', 'microsoft_teams', 'servicenow')
+
+# the time the API answers for a silence that has not run
+NEVER = '0001-01-01T00:00:00Z'
+
+# the options that can be changed on a running simulator with PUT /_simulator/config
+RUNTIME_OPTIONS = ('latency', 'jitter', 'error_rate', 'error_status', 'error_match', 'retry_after', 'gzip')
+
+# the responses smaller than this are not gzipped
+GZIP_MIN_SIZE = 1024
+
+# a path segment holding an ID, replaced by {id} in the endpoints of the stats
+_ID_SEGMENT_RE = re.compile(r'^([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}'
+                            r'|[0-9a-fA-F]{16,}|\d+)$')
+
+
+class ApiError(Exception):
+    """
+    An error answered to the client with its HTTP status
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def synthetic_dashboards(rng: random.Random, count: int, panels: int) -> list:
+    dashboards = []
+    for i in range(count):
+        dashboards.append({
+            'name': f"Dashboard {i}",
+            'uuid': _uuid(rng),
+            'filters': [{'name': name, 'values': []} for name in ('dc', 'rack', 'host_id')],
+            'panels': [{
+                'title': f"Chart {i}.{j}",
+                'uuid': _uuid(rng),
+                'type': 'line-chart',
+                'layout': {'x': (j % 3) * 4, 'y': (j // 3) * 4, 'w': 4, 'h': 4},
+                'details': {'queries': [{
+                    'query': f"avg(metric_{i}_{j}{{scope='Read',dc=~'$dc',rack=~'$rack',host_id=~'$host_id'}}) "
+                             f"by ($groupBy)",
+                    'legend': '{{dc}} {{host_id}}',
+                }]},
+            } for j in range(panels)],
+        })
+    return dashboards
+
+
+def synthetic_alert_rules(rng: random.Random, count: int, dashboards: list, org: str, cluster_type: str,
+                          cluster: str) -> list:
+    charts = [(dashboard, panel) for dashboard in dashboards for panel in dashboard['panels']]
+    rules = []
+    for i in range(count):
+        dashboard, panel = charts[i % len(charts)] if charts else ({'uuid': _uuid(rng)}, {'uuid': _uuid(rng)})
+        name = f"alert-rule-{i}"
+        warning = 50 + i % 40
+        rules.append({
+            'id': _uuid(rng),
+            'alert': name,
+            'for': '15m',
+            'operator': '>=',
+            'warningValue': warning,
+            'criticalValue': warning + 10,
+            'expr': f"avg(metric_{i}{{dc=~'.*'}}) by (dc) >= {warning}",
+            'widgetTitle': panel.get('title', name),
+            'correlationId': panel['uuid'],
+            'annotations': {
+                'description': f"Synthetic alert rule {i}",
+                'summary': f"{name} is >= than {warning} (current value: {{{{$value}}}})",
+                'widget_url': f"/{org}/{cluster_type}/{cluster}/performance/{dashboard['uuid']}?uuid={panel['uuid']}&",
+            },
+            'integrations': {'Type': '', 'OverrideError': False, 'OverrideInfo': False, 'OverrideWarning': False,
+                             'Routing': []},
+            'filters': [{'Name': field, 'Value': []} for field in ('consistency', 'percentile', 'keyspace', 'scope',
+                                                                    'dc', 'rack', 'host_id', 'groupBy')],
+        })
+    return rules
+
+
+def synthetic_nodes(rng: random.Random, count: int, datacenters: int) -> list:
+    return [{
+        'host_id': _uuid(rng),
+        'HostIP': f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+        'DC': f"dc{i % max(datacenters, 1) + 1}",
+        'Rack': f"rack{i // max(datacenters, 1) % 3 + 1}",
+        'Details': {'human_readable_identifier': f"node-{i}"},
+    } for i in range(count)]
+
+
+def synthetic_integrations(rng: random.Random, count: int) -> dict:
+    definitions = [{
+        'ID': _uuid(rng),
+        'Type': INTEGRATION_TYPES[i % len(INTEGRATION_TYPES)],
+        'Params': {'name': f"integration-{i}", 'url': f"https://hooks.example.com/{i}"},
+    } for i in range(count)]
+    routings = [{
+        'Type': routing_type,
+        'Routing': [{'ID': definitions[(i + j) % count]['ID'], 'Severity': severity}
+                    for j, severity in enumerate(SEVERITIES)] if count else [],
+        'OverrideInfo': False,
+        'OverrideWarning': False,
+        'OverrideError': False,
+    } for i, routing_type in enumerate(ROUTING_TYPES)]
+    return {'Definitions': definitions, 'Routings': routings}
+
+
+def synthetic_healthchecks(rng: random.Random, count: int) -> dict:
+    integrations = {'OverrideError': False, 'OverrideInfo': False, 'OverrideWarning': False, 'Routing': None,
+                    'Type': ''}
+    return {
+        'httpchecks': [{'id': _uuid(rng), 'name': f"http-check-{i}", 'http': f"http://localhost:{8000 + i}/health",
+                        'method': 'GET', 'interval': '1m', 'timeout': '10s', 'tls_skip_verify': False,
+                        'readonly': False, 'integrations': dict(integrations)} for i in range(count)],
+        'tcpchecks': [{'id': _uuid(rng), 'name': f"tcp-check-{i}", 'tcp': f"localhost:{9000 + i}",
+                       'interval': '1m', 'timeout': '10s', 'readonly': False, 'integrations': dict(integrations)}
+                      for i in range(count)],
+        'shellchecks': [{'id': _uuid(rng), 'name': f"shell-check-{i}", 'script': f"exit {i % 2}",
+                         'shell': '/bin/bash', 'interval': '5m', 'timeout': '1m', 'readonly': False,
+                         'integrations': dict(integrations)} for i in range(count)],
+    }
+
+
+class ClusterData:
+    """
+    The documents of one cluster, as returned by the API
+    """
+
+    def __init__(self, org: str, cluster_type: str, cluster: str, options, rng: random.Random):
+        # the clusters out of --data-clusters start without dashboards, alert rules and checks
+        filled = not options.data_clusters or cluster in options.data_clusters
+        dashboards = synthetic_dashboards(rng, options.dashboards if filled else 0, options.panels)
+        self.dashboards = {'type': cluster_type, 'dashboards': dashboards}
+        self.alert_rules = {'metricrules': synthetic_alert_rules(rng, options.alert_rules if filled else 0,
+                                                                 dashboards, org, cluster_type, cluster)}
+        self.integrations = synthetic_integrations(rng, options.integrations)
+        self.healthchecks = synthetic_healthchecks(rng, options.healthchecks if filled else 0)
+        self.nodes = synthetic_nodes(rng, options.nodes, options.datacenters)
+        self.silences = []
+        self.scheduled_snapshots = []
+        self.commitlog_settings = []
+        self.scheduled_repairs = []
+        self.logcollectors = []
+        self.adaptive_repair = {
+            'Active': True, 'Ready': True, 'NotReadyReason': '', 'BlacklistedTables': [], 'FilterTWCSTables': True,
+            'GcGraceThreshold': 86400, 'MaxSegmentsPerTable': 0, 'SegmentRetries': 3, 'SegmentTargetSizeMB': 0,
+            'SegmentTimeout': '2h', 'TableParallelism': 10,
+        }
+        self.agent_disconnection_tolerance = {'warn_timeout': '1m', 'error_timeout': '3m'}
+        self.human_readable_id = 'hostname'
+
+
+class Simulator:
+    """
+    The state of the simulated server and the handling of the API requests, independent of the HTTP server
+    """
+
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.RLock()
+        self.clusters = {}
+        self.tokens = set()
+        self.rng = random.Random(options.seed)
+        self.reset_stats()
+        for cluster in options.clusters:
+            self.cluster(options.org, options.cluster_type, cluster)
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'started': time.time(), 'requests': 0, 'errors_injected': 0, 'bytes_in': 0,
+                          'bytes_out': 0, 'not_modified': 0, 'endpoints': {}}
+
+    def reset_data(self):
+        with self.lock:
+            self.clusters = {}
+            self.tokens = set()
+            self.rng = random.Random(self.options.seed)
+            for cluster in self.options.clusters:
+                self.cluster(self.options.org, self.options.cluster_type, cluster)
+
+    def cluster(self, org: str, cluster_type: str, cluster: str) -> ClusterData:
+        """
+        The data of the cluster, generated on its first use
+        """
+        key = (org, cluster_type, cluster)
+        with self.lock:
+            if key not in self.clusters:
+                self.clusters[key] = ClusterData(org, cluster_type, cluster, self.options,
+                                                 random.Random(f"{self.options.seed}/{org}/{cluster_type}/{cluster}"))
+            return self.clusters[key]
+
+    def record(self, method: str, path: str, status: int, bytes_in: int, bytes_out: int, elapsed: float,
+               injected: bool = False):
+        endpoint = f"{method} " + '/'.join('{id}' if _ID_SEGMENT_RE.match(segment) else segment
+                                           for segment in endpoint_path(path).split('/'))
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_in'] += bytes_in
+            self.stats['bytes_out'] += bytes_out
+            self.stats['errors_injected'] += int(injected)
+            self.stats['not_modified'] += int(status == 304)
+            entry = self.stats['endpoints'].setdefault(endpoint, {'requests': 0, 'bytes_in': 0, 'bytes_out': 0,
+                                                                   'seconds': 0.0, 'status': {}})
+            entry['requests'] += 1
+            entry['bytes_in'] += bytes_in
+            entry['bytes_out'] += bytes_out
+            entry['seconds'] = round(entry['seconds'] + elapsed, 6)
+            entry['status'][str(status)] = entry['status'].get(str(status), 0) + 1
+
+    def delay(self):
+        """
+        Seconds to wait before answering, --latency plus a random part of --jitter
+        """
+        return max(self.options.latency + random.uniform(0, self.options.jitter), 0) / 1000
+
+    def injected_error(self, method: str, path: str):
+        """
+        The error status to answer instead of processing the request, or None
+        """
+        options = self.options
+        if options.error_rate <= 0 or not options.error_status:
+            return None
+        if options.error_match and not re.search(options.error_match, f"{method} {path}"):
+            return None
+        if random.random() >= options.error_rate:
+            return None
+        return random.choice(options.error_status)
+
+    def handle(self, method: str, path: str, query: dict, headers, body):
+        """
+        Process an API request, returns the status and the document to answer
+        """
+        if path == '/api/login':
+            if method != 'POST':
+                raise ApiError(405, 'method not allowed')
+            credentials = body if isinstance(body, dict) else {}
+            if self.options.username and (credentials.get('username') != self.options.username
+                                          or credentials.get('password') != self.options.password):
+                raise ApiError(401, 'invalid username or password')
+            token = f"sim-{uuid.uuid4().hex}"
+            with self.lock:
+                self.tokens.add(token)
+            return 200, {'token': token}
+
+        if self.options.require_auth:
+            authorization = (headers.get('Authorization') or '').split(' ')
+            if len(authorization) != 2 or (authorization[0] == 'Bearer' and authorization[1] not in self.tokens):
+                raise ApiError(401, 'unauthorized')
+
+        if path == '/api/v1/orgs':
+            return 200, self.orgs()
+
+        segments = path.strip('/').split('/')
+        if len(segments) < 3 or segments[:2] != ['api', 'v1']:
+            raise ApiError(404, f"unknown endpoint {path}")
+        # the agent disconnection tolerance is the only resource in two segments
+        size = 2 if segments[2] == 'configs' else 1
+        resource = '/'.join(segments[2:2 + size])
+        scope = segments[2 + size:5 + size]
+        rest = segments[5 + size:]
+        if len(scope) < 3:
+            raise ApiError(404, f"unknown endpoint {path}")
+        handler = getattr(self, 'api_' + re.sub(r'\W', '_', resource), None)
+        if handler is None:
+            raise ApiError(404, f"unknown endpoint {path}")
+
+        with self.lock:
+            return handler(method, self.cluster(*scope), rest, query, body)
+
+    def orgs(self) -> dict:
+        tree = {}
+        with self.lock:
+            for org, cluster_type, cluster in sorted(self.clusters):
+                tree.setdefault(org, {}).setdefault(cluster_type, []).append(cluster)
+        return {'children': [{
+            'name': org,
+            'type': 'org',
+            'children': [{
+                'name': cluster_type,
+                'type': 'type',
+                'children': [{'name': cluster, 'type': cluster_type, 'status': 0} for cluster in clusters],
+            } for cluster_type, clusters in types.items()],
+        } for org, types in tree.items()]}
+
+    # --- the API endpoints, called with the lock held ---
+
+    @staticmethod
+    def api_alert_rules(method, data: ClusterData, rest, query, body):
+        rules = data.alert_rules['metricrules']
+        if method == 'GET':
+            return 200, data.alert_rules
+        if method == 'POST':
+            rule = copy.deepcopy(body)
+            if not isinstance(rule, dict) or not rule.get('id'):
+                raise ApiError(400, 'the alert rule has no id')
+            integrations = rule.get('integrations')
+            if isinstance(integrations, dict):
+                integrations.setdefault('Type', '')
+                for override in ('OverrideError', 'OverrideInfo', 'OverrideWarning'):
+                    integrations.setdefault(override, False)
+                integrations.setdefault('Routing', [])
+                for entry in integrations['Routing'] or []:
+                    entry.setdefault('Params', {})
+            data.alert_rules['metricrules'] = [existing for existing in rules if existing['id'] != rule['id']]
+            data.alert_rules['metricrules'].append(rule)
+            return 200, {}
+        if method == 'DELETE' and rest:
+            data.alert_rules['metricrules'] = [existing for existing in rules if existing['id'] != rest[0]]
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_dashboardtemplate(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, data.dashboards
+        if method in ('PUT', 'POST'):
+            if not isinstance(body, dict) or not isinstance(body.get('dashboards'), list):
+                raise ApiError(400, 'the dashboards are missing')
+            data.dashboards = {'type': body.get('type', data.dashboards['type']), 'dashboards': body['dashboards']}
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_integrations(method, data: ClusterData, rest, query, body):
+        definitions = data.integrations['Definitions']
+        if method == 'GET':
+            return 200, data.integrations
+        if method == 'POST':
+            if not isinstance(body, dict) or 'type' not in body:
+                raise ApiError(400, 'the integration type is missing')
+            definition = {'ID': body.get('id') or str(uuid.uuid4()), 'Type': body['type'],
+                          'Params': body.get('params') or {}}
+            replaced = [i for i, existing in enumerate(definitions) if existing['ID'] == definition['ID']]
+            if replaced:
+                definitions[replaced[0]] = definition
+            else:
+                definitions.append(definition)
+            return 200, {'id': definition['ID']}
+        if method == 'DELETE' and rest:
+            data.integrations['Definitions'] = [existing for existing in definitions if existing['ID'] != rest[0]]
+            for routing in data.integrations['Routings']:
+                routing['Routing'] = [entry for entry in routing['Routing'] or [] if entry['ID'] != rest[0]]
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def _routing(data: ClusterData, routing_type: str) -> dict:
+        for routing in data.integrations['Routings']:
+            if routing['Type'] == routing_type:
+                return routing
+        routing = {'Type': routing_type, 'Routing': [], 'OverrideInfo': False, 'OverrideWarning': False,
+                   'OverrideError': False}
+        data.integrations['Routings'].append(routing)
+        return routing
+
+    def api_integrations_routing(self, method, data: ClusterData, rest, query, body):
+        if len(rest) != 3 or rest[1] not in SEVERITIES:
+            raise ApiError(404, 'expected /{type}/{severity}/{integration id}')
+        routing = self._routing(data, rest[0])
+        entries = [entry for entry in routing['Routing'] or []
+                   if not (entry['ID'] == rest[2] and entry['Severity'] == rest[1])]
+        if method == 'POST':
+            entries.append({'ID': rest[2], 'Severity': rest[1]})
+        elif method != 'DELETE':
+            raise ApiError(405, 'method not allowed')
+        routing['Routing'] = entries
+        return 200, {}
+
+    def api_integrations_override(self, method, data: ClusterData, rest, query, body):
+        if len(rest) != 2 or rest[1] not in SEVERITIES:
+            raise ApiError(404, 'expected /{type}/{severity}')
+        if method != 'PUT':
+            raise ApiError(405, 'method not allowed')
+        self._routing(data, rest[0])['Override' + rest[1].title()] = bool((body or {}).get('value'))
+        return 200, {}
+
+    @staticmethod
+    def api_healthchecks(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, data.healthchecks
+        if method in ('PUT', 'POST'):
+            if not isinstance(body, dict):
+                raise ApiError(400, 'the health checks are missing')
+            data.healthchecks = {key: body.get(key) or [] for key in ('httpchecks', 'tcpchecks', 'shellchecks')}
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_nodes(method, data: ClusterData, rest, query, body):
+        if method != 'GET':
+            raise ApiError(405, 'method not allowed')
+        return 200, data.nodes
+
+    @staticmethod
+    def api_silenceWindow(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, data.silences
+        if method == 'POST':
+            silence = dict(body or {}, ID=(body or {}).get('ID') or str(uuid.uuid4()))
+            for name, default in (('Active', True), ('IsRecurring', False), ('SilenceAll', True), ('Duration', ''),
+                                  ('CronExpr', ''), ('LastRun', NEVER), ('NextRun', NEVER)):
+                silence.setdefault(name, default)
+            data.silences = [existing for existing in data.silences if existing['ID'] != silence['ID']]
+            data.silences.append(silence)
+            return 200, {'id': silence['ID']}
+        if method == 'DELETE':
+            ids = set(rest[:1]) | set(body if isinstance(body, list) else [])
+            data.silences = [existing for existing in data.silences if existing['ID'] not in ids]
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_cassandraScheduleSnapshot(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, {'ScheduledSnapshots': data.scheduled_snapshots}
+        if method == 'DELETE':
+            ids = set(body if isinstance(body, list) else []) | set(rest[:1])
+            data.scheduled_snapshots = [existing for existing in data.scheduled_snapshots if existing['ID'] not in ids]
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_cassandraSnapshot(method, data: ClusterData, rest, query, body):
+        if method != 'POST':
+            raise ApiError(405, 'method not allowed')
+        details = dict(body or {})
+        # the API answers the remote configuration as RemoteConfig
+        details['RemoteConfig'] = details.pop('remoteConfig', '') or ''
+        details.setdefault('remoteType', '')
+        snapshot_id = details.get('ID') or str(uuid.uuid4())
+        data.scheduled_snapshots = [existing for existing in data.scheduled_snapshots if existing['ID'] != snapshot_id]
+        data.scheduled_snapshots.append({'ID': snapshot_id, 'Schedule': details.get('scheduleExpr', ''),
+                                         'Params': [{'BackupDetails': json.dumps(details)}]})
+        return 200, {'id': snapshot_id}
+
+    @staticmethod
+    def api_cassandraCommitLogsSettings(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, data.commitlog_settings
+        if method == 'POST':
+            settings = dict(body or {})
+            # the API answers some of the fields capitalised, and with the defaults of the ones not sent
+            for name in ('remoteConfig', 'remoteRetentionDuration', 'localRetentionDuration'):
+                settings[name[0].upper() + name[1:]] = settings.pop(name, '') or ''
+            settings.setdefault('transfers', 0)
+            data.commitlog_settings = [existing for existing in data.commitlog_settings
+                                       if existing.get('remoteType') != settings.get('remoteType')]
+            data.commitlog_settings.append(settings)
+            return 200, {}
+        if method == 'DELETE':
+            datacenters = set(body if isinstance(body, list) else [])
+            data.commitlog_settings = [existing for existing in data.commitlog_settings
+                                       if not datacenters & set(existing.get('datacenters') or [])]
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_adaptiveRepair(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, data.adaptive_repair
+        if method == 'POST':
+            data.adaptive_repair.update(body or {})
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_addrepair(method, data: ClusterData, rest, query, body):
+        if method != 'POST':
+            raise ApiError(405, 'method not allowed')
+        repair = {'ID': str(uuid.uuid4()), 'Params': [dict(body or {})]}
+        data.scheduled_repairs.append(repair)
+        return 200, {'id': repair['ID']}
+
+    @staticmethod
+    def api_repair(method, data: ClusterData, rest, query, body):
+        if method != 'GET':
+            raise ApiError(405, 'method not allowed')
+        return 200, {'ScheduledRepairs': data.scheduled_repairs}
+
+    @staticmethod
+    def api_cassandrascheduledrepair(method, data: ClusterData, rest, query, body):
+        if method != 'DELETE':
+            raise ApiError(405, 'method not allowed')
+        repair_id = (query.get('id') or rest or [None])[0]
+        if not any(existing['ID'] == repair_id for existing in data.scheduled_repairs):
+            raise ApiError(404, f"no scheduled repair {repair_id}")
+        data.scheduled_repairs = [existing for existing in data.scheduled_repairs if existing['ID'] != repair_id]
+        return 200, {}
+
+    @staticmethod
+    def api_logcollectors(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, data.logcollectors
+        if method in ('PUT', 'POST'):
+            if not isinstance(body, list):
+                raise ApiError(400, 'the logcollectors are missing')
+            data.logcollectors = body
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_configs_agentDisconnectionTolerance(method, data: ClusterData, rest, query, body):
+        if method == 'GET':
+            return 200, data.agent_disconnection_tolerance
+        if method in ('PUT', 'POST'):
+            data.agent_disconnection_tolerance.update(body or {})
+            return 200, {}
+        raise ApiError(405, 'method not allowed')
+
+    @staticmethod
+    def api_clusterSettings(method, data: ClusterData, rest, query, body):
+        if method != 'GET':
+            raise ApiError(405, 'method not allowed')
+        return 200, {'HumanReadableID': data.human_readable_id}
+
+    @staticmethod
+    def api_humanReadableId(method, data: ClusterData, rest, query, body):
+        if method != 'PUT':
+            raise ApiError(405, 'method not allowed')
+        data.human_readable_id = (body or {}).get('HumanReadableID', data.human_readable_id)
+        return 200, {}
+
+
+def endpoint_path(path: str) -> str:
+    """
+    The path without the organisation, cluster type and cluster, /api/v1/nodes/org/cassandra/prod -> /api/v1/nodes
+    """
+    segments = path.split('/')
+    if len(segments) > 3 and segments[1:3] == ['api', 'v1']:
+        size = 2 if segments[3] == 'configs' else 1
+        return '/'.join(segments[:3 + size] + segments[6 + size:])
+    return path
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """
+    The HTTP side of the simulator: latency, error injection, ETags and the /_simulator endpoints
+    """
+    protocol_version = 'HTTP/1.1'
+    server_version = 'AxonOpsSimulator/1.0'
+    # the headers and the body are written separately, without TCP_NODELAY every response would wait for the
+    # delayed ACK of the client
+    disable_nagle_algorithm = True
+    simulator: Simulator = None
+
+    def log_message(self, format, *args):
+        if self.simulator.options.verbose:
+            super().log_message(format, *args)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def _uncompress_body(self, raw: bytes) -> bytes:
+        encoding = (self.headers.get('Content-Encoding') or 'identity').lower()
+        if encoding == 'identity':
+            return raw
+        if encoding != 'gzip' or not self.simulator.options.gzip:
+            raise ApiError(415, f"unsupported Content-Encoding {encoding}")
+        try:
+            return gzip.decompress(raw)
+        except (OSError, EOFError):
+            raise ApiError(400, 'the body is not valid gzip')
+
+    def _decode_body(self, raw: bytes):
+        if not raw:
+            return None
+        text = raw.decode()
+        # the logcollector module sends the document as a form field
+        if 'x-www-form-urlencoded' in (self.headers.get('Content-Type') or ''):
+            values = [value for values in parse_qs(text).values() for value in values]
+            if values:
+                text = values[0]
+        try:
+            return json.loads(text)
+        except ValueError:
+            raise ApiError(400, 'the body is not valid JSON')
+
+    def _answer(self, status: int, document, headers: dict = None) -> int:
+        body = b'' if document is None or status == 304 else json.dumps(document).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if self.simulator.options.gzip:
+            # RFC 7694, the gzipped request bodies are accepted
+            self.send_header('Accept-Encoding', 'gzip')
+            if len(body) >= GZIP_MIN_SIZE and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                body = gzip.compress(body, compresslevel=6)
+                self.send_header('Content-Encoding', 'gzip')
+        if body or status != 304:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        return len(body)
+
+    def _control(self, method: str, path: str, query: dict, body):
+        simulator = self.simulator
+        if path == '/_simulator/stats' and method == 'GET':
+            with simulator.lock:
+                return 200, copy.deepcopy(simulator.stats)
+        if path == '/_simulator/reset' and method == 'POST':
+            simulator.reset_stats()
+            if (query.get('data') or ['false'])[0].lower() in ('1', 'true', 'yes'):
+                simulator.reset_data()
+            return 200, {}
+        if path == '/_simulator/config':
+            if method == 'PUT':
+                for name, value in (body or {}).items():
+                    if name not in RUNTIME_OPTIONS:
+                        raise ApiError(400, f"{name} can't be changed, only {', '.join(RUNTIME_OPTIONS)}")
+                    setattr(simulator.options, name, value)
+            return 200, {name: value for name, value in vars(simulator.options).items()}
+        raise ApiError(404, f"unknown endpoint {path}")
+
+    def _process(self, method: str):
+        started = time.perf_counter()
+        parts = urlsplit(self.path)
+        path, query = parts.path, parse_qs(parts.query)
+        simulator = self.simulator
+        raw, bytes_out, injected, status = b'', 0, False, 500
+        try:
+            raw = self._read_body()
+            body = self._decode_body(self._uncompress_body(raw))
+            if path.startswith('/_simulator/'):
+                status, document = self._control(method, path, query, body)
+                self._answer(status, document)
+                return
+
+            delay = simulator.delay()
+            if delay:
+                time.sleep(delay)
+
+            error_status = simulator.injected_error(method, path)
+            if error_status is not None:
+                injected = True
+                status = error_status
+                headers = {}
+                if status == 429 and simulator.options.retry_after is not None:
+                    headers['Retry-After'] = str(simulator.options.retry_after)
+                bytes_out = self._answer(status, {'error': 'injected by the simulator'}, headers)
+                return
+
+            status, document = simulator.handle(method, path, query, self.headers, body)
+            headers = {}
+            if method == 'GET' and status == 200 and simulator.options.etags:
+                encoded = json.dumps(document).encode()
+                headers['ETag'] = '"' + hashlib.sha1(encoded).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == headers['ETag']:
+                    status = 304
+            bytes_out = self._answer(status, document, headers)
+        except ApiError as e:
+            status = e.status
+            bytes_out = self._answer(status, {'error': e.message})
+        except Exception as e:
+            status = 500
+            bytes_out = self._answer(status, {'error': f"{type(e).__name__}: {e}"})
+        finally:
+            if not path.startswith('/_simulator/'):
+                simulator.record(method, path, status, len(raw), bytes_out, time.perf_counter() - started,
+                                 injected)
+
+    def do_GET(self):
+        self._process('GET')
+
+    def do_POST(self):
+        self._process('POST')
+
+    def do_PUT(self):
+        self._process('PUT')
+
+    def do_DELETE(self):
+        self._process('DELETE')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulated AxonOps server for the tests and the benchmarks")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on, default 127.0.0.1")
+    parser.add_argument('--port', type=int, default=3000,
+                        help="Port to listen on, default 3000 like the test scripts, 0 for any free port")
+    parser.add_argument('--seed', default='axonops', help="Seed of the synthetic data, the same seed gives the "
+                                                          "same data")
+    parser.add_argument('--org', default='testorg', help="Organisation of the clusters created at the start")
+    parser.add_argument('--cluster-type', default='cassandra', help="Type of the clusters created at the start")
+    parser.add_argument('--clusters', nargs='*', default=[],
+                        help="Clusters created at the start and listed by /api/v1/orgs, the other clusters are "
+                             "created on their first request")
+    volumes = parser.add_argument_group('synthetic data, generated for every cluster')
+    volumes.add_argument('--data-clusters', nargs='*', default=[],
+                         help="Only fill these clusters with dashboards, alert rules and service checks, the others "
+                              "start without, e.g. the targets of a migration. All the clusters by default")
+    volumes.add_argument('--alert-rules', type=int, default=0, help="Number of metric alert rules")
+    volumes.add_argument('--dashboards', type=int, default=2, help="Number of dashboard templates")
+    volumes.add_argument('--panels', type=int, default=6, help="Number of charts in every dashboard")
+    volumes.add_argument('--nodes', type=int, default=3, help="Number of nodes")
+    volumes.add_argument('--datacenters', type=int, default=1, help="Number of datacenters the nodes are spread on")
+    volumes.add_argument('--integrations', type=int, default=2, help="Number of integrations")
+    volumes.add_argument('--healthchecks', type=int, default=0, help="Number of service checks of every type")
+    behaviour = parser.add_argument_group('behaviour')
+    behaviour.add_argument('--latency', type=float, default=0, help="Milliseconds added to every API request")
+    behaviour.add_argument('--jitter', type=float, default=0,
+                           help="Random milliseconds, up to this value, added to the latency")
+    behaviour.add_argument('--error-rate', type=float, default=0,
+                           help="Fraction of the API requests answered with an error, 0 to 1")
+    behaviour.add_argument('--error-status', type=int, nargs='+', default=[503],
+                           help="Statuses of the injected errors, picked at random, default 503")
+    behaviour.add_argument('--error-match', default='',
+                           help="Only inject errors in the requests matching this regular expression on "
+                                "'METHOD /path', e.g. '^GET .*/alert-rules/'")
+    behaviour.add_argument('--retry-after', type=float, default=1,
+                           help="Retry-After header of the injected 429, in seconds")
+    behaviour.add_argument('--etags', action='store_true',
+                           help="Send an ETag with the GET responses and answer 304 when it matches If-None-Match")
+    behaviour.add_argument('--gzip', action='store_true',
+                           help="Gzip the responses over 1 KB to the clients sending Accept-Encoding: gzip, accept the "
+                                "gzipped request bodies and say so in the Accept-Encoding of the responses. Without "
+                                "it a gzipped body is answered with 415")
+    behaviour.add_argument('--require-auth', action='store_true',
+                           help="Answer 401 to the requests without an Authorization header or with an unknown "
+                                "JWT")
+    behaviour.add_argument('--username', help="Only accept this username at /api/login, any by default")
+    behaviour.add_argument('--password', help="Password of --username")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Log every request")
+    return parser.parse_args(argv)
+
+
+def make_server(options) -> ThreadingHTTPServer:
+    """
+    The HTTP server of a new simulator, not started yet. server.simulator is the simulator, to check its state
+    """
+    simulator = Simulator(options)
+    handler = type('Handler', (SimulatorHandler,), {'simulator': simulator})
+    server = ThreadingHTTPServer((options.host, options.port), handler)
+    server.daemon_threads = True
+    server.simulator = simulator
+    return server
+
+
+def main(argv=None):
+    options = parse_args(argv)
+    server = make_server(options)
+    host, port = server.server_address[:2]
+    print(f"AxonOps simulator listening on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import unittest
+
+from ansible_collections.axonops.axonops.plugins.filter.bulk import bulk_split, merge_bulk
+
+SHARED = {'name': 'shared'}
+SHARED_OWN_CREDS = {'name': 'shared-own-creds', 'username': 'u', 'password': 'p'}
+SPECIFIC = {'name': 'specific'}
+SPECIFIC_OWN_TYPE = {'name': 'specific-own-type', 'cluster_type': 'kafka'}
+ITEMS = [SHARED, SHARED_OWN_CREDS, SPECIFIC, SPECIFIC_OWN_TYPE]
+
+
+class TestBulkSplit(unittest.TestCase):
+    def test_not_in_bulk_mode(self):
+        self.assertEqual(bulk_split(ITEMS, 2, 'c1'), {'per_item': [['c1', item] for item in ITEMS], 'bulk': []})
+
+    def test_bulk_mode_on_cluster(self):
+        split = bulk_split(ITEMS, '2', 'c1', bulk_mode=True, key='rules')
+
+        self.assertEqual(split['per_item'], [['c1', SHARED_OWN_CREDS], ['c1', SPECIFIC_OWN_TYPE]])
+        self.assertEqual(split['bulk'], [{'cluster': 'c1', 'rules': [SHARED, SPECIFIC]}])
+
+    def test_bulk_mode_on_clusters(self):
+        split = bulk_split(ITEMS, 2, 'c1', clusters=['c1', 'c2'], bulk_mode=True, key='rules')
+
+        self.assertEqual(split['per_item'], [['c1', SHARED_OWN_CREDS], ['c2', SHARED_OWN_CREDS],
+                                             ['c1', SPECIFIC_OWN_TYPE]])
+        self.assertEqual(split['bulk'], [{'clusters': ['c1', 'c2'], 'rules': [SHARED]},
+                                         {'cluster': 'c1', 'rules': [SPECIFIC]}])
+
+    def test_item_type(self):
+        split = bulk_split([SHARED], 1, 'c1', bulk_mode=True, key='checks', item_type='tcp')
+
+        self.assertEqual(split['bulk'], [{'cluster': 'c1', 'checks': [{'name': 'shared', 'type': 'tcp'}]}])
+        self.assertEqual(SHARED, {'name': 'shared'})
+
+
+class TestMergeBulk(unittest.TestCase):
+    def test_merge(self):
+        tcp = bulk_split([{'name': 'cql'}, {'name': 'jmx'}], 1, 'c1', ['c1', 'c2'], True, 'checks', 'tcp')
+        shell = bulk_split([{'name': 'disk'}], 1, 'c1', ['c1', 'c2'], True, 'checks', 'shell')
+
+        self.assertEqual(merge_bulk(tcp['bulk'], shell['bulk'], 'checks'), [
+            {'clusters': ['c1', 'c2'], 'checks': [{'name': 'cql', 'type': 'tcp'}, {'name': 'disk', 'type': 'shell'}]},
+            {'cluster': 'c1', 'checks': [{'name': 'jmx', 'type': 'tcp'}]},
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import copy
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ansible_collections.axonops.axonops.plugins.module_utils import axonops
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops import AxonOps
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_service_checks import healthchecks_url, \
+    service_checks_builder
+
+URL = 'https://axonops.example.com/api/v1/alert-rules/o/cassandra/c'
+
+
+class TestRedirects(unittest.TestCase):
+    def send(self, method):
+        """
+        Send a request the pooled connection gets a redirect for, returns the response and the open_url mock
+        """
+        client = AxonOps('o', auth_token='token', base_url='https://axonops.example.com')
+        redirect = MagicMock(status=307, reason='Temporary Redirect', headers={'Location': URL + '/'}, body=b'',
+                             timings={})
+        followed = MagicMock(status=200, reason='OK', headers={})
+        followed.read.return_value = b'{}'
+        with patch.object(client.http_pool, 'request', return_value=redirect), \
+                patch.object(axonops, 'open_url', return_value=followed) as open_url:
+            response = client._send(method, URL, {}, b'{}')
+        return response, open_url
+
+    def test_idempotent_request_follows_the_redirect(self):
+        for method in ('GET', 'PUT', 'DELETE'):
+            response, open_url = self.send(method)
+
+            open_url.assert_called_once()
+            self.assertEqual(response[0], 200)
+
+    def test_other_requests_are_not_sent_again(self):
+        for method in ('POST', 'PATCH'):
+            response, open_url = self.send(method)
+
+            open_url.assert_not_called()
+            self.assertEqual(response[0], 307)
+
+
+class FakeApi:
+    """
+    Stands for the server behind AxonOps._do_request: a GET returns the document at the URL, a write replaces it.
+    changes is called on the document before every GET, as someone else writing it
+    """
+
+    def __init__(self, documents: dict, changes=None):
+        self.documents = documents
+        self.changes = changes
+        self.requests = []
+
+    def __call__(self, rel_url, method, ok_codes, data, json_data, form_field, fresh=False):
+        self.requests.append((method, rel_url))
+        if method == 'GET':
+            if self.changes is not None:
+                self.changes(self.documents[rel_url])
+            return copy.deepcopy(self.documents[rel_url]), None, 200
+        self.documents[rel_url] = json_data
+        return None, None, 200
+
+
+def tcp_check(check_id, name, port):
+    return {'id': check_id, 'name': name, 'interval': '1m', 'timeout': '10s', 'tcp': f"localhost:{port}"}
+
+
+class TestUpdateDocument(unittest.TestCase):
+    URL = healthchecks_url('o', 'cassandra', 'c')
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+        sleep = patch.object(axonops.time, 'sleep')
+        sleep.start()
+        self.addCleanup(sleep.stop)
+        # the checks as the module read them, the gossip check is to be removed
+        self.base = {'tcpchecks': [tcp_check('t1', 'cql', 9042), tcp_check('t2', 'gossip', 7000)]}
+        self.build = service_checks_builder([{'type': 'tcp', 'name': 'gossip', 'present': False}])
+
+    def client(self, conflict_retries):
+        return AxonOps('o', auth_token='token', base_url='https://axonops.example.com', cache_dir=self.cache_dir,
+                       conflict_retries=conflict_retries)
+
+    def test_plan_rebuilt_on_the_changed_document(self):
+        # someone else added a check after the module read them
+        api = FakeApi({self.URL: {'tcpchecks': self.base['tcpchecks'] + [tcp_check('t3', 'jmx', 7199)]}})
+        client = self.client(1)
+
+        with patch.object(client, '_do_request', side_effect=api):
+            _, error = client.update_document(self.URL, self.base, self.build)
+
+        self.assertIsNone(error)
+        self.assertEqual(api.requests, [('GET', self.URL), ('GET', self.URL), ('PUT', self.URL)])
+        self.assertEqual([check['name'] for check in api.documents[self.URL]['tcpchecks']], ['cql', 'jmx'])
+
+    def test_unchanged_document_is_read_once(self):
+        api = FakeApi({self.URL: copy.deepcopy(self.base)})
+        client = self.client(1)
+
+        with patch.object(client, '_do_request', side_effect=api):
+            _, error = client.update_document(self.URL, self.base, self.build)
+
+        self.assertIsNone(error)
+        self.assertEqual(api.requests, [('GET', self.URL), ('PUT', self.URL)])
+        self.assertEqual([check['name'] for check in api.documents[self.URL]['tcpchecks']], ['cql'])
+
+    def test_gives_up_when_it_keeps_changing(self):
+        def changes(document):
+            document['tcpchecks'].append(tcp_check(f"t{len(document['tcpchecks']) + 1}", 'other', 1))
+
+        api = FakeApi({self.URL: copy.deepcopy(self.base)}, changes)
+        client = self.client(2)
+
+        with patch.object(client, '_do_request', side_effect=api):
+            _, error = client.update_document(self.URL, self.base, self.build)
+
+        self.assertEqual(error, f"{self.URL} was changed by someone else 3 times while updating it, giving up")
+        self.assertEqual(api.requests, [('GET', self.URL)] * 3)
+
+    def test_without_conflict_retries_the_plan_on_base_is_written(self):
+        api = FakeApi({self.URL: {'tcpchecks': self.base['tcpchecks'] + [tcp_check('t3', 'jmx', 7199)]}})
+        client = self.client(0)
+
+        with patch.object(client, '_do_request', side_effect=api):
+            _, error = client.update_document(self.URL, self.base, self.build)
+
+        self.assertIsNone(error)
+        self.assertEqual(api.requests, [('PUT', self.URL)])
+        self.assertEqual([check['name'] for check in api.documents[self.URL]['tcpchecks']], ['cql'])
@@ -0,0 +1,129 @@
+import copy
+import unittest
+from types import SimpleNamespace
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_alert_rules import alert_rule_args, \
+    plan_alert_rule
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_dashboards import DashboardIndex
+
+RULES_URL = '/api/v1/alert-rules/o/cassandra/c'
+
+DASHBOARDS = DashboardIndex({'dashboards': [{'name': 'System', 'uuid': 'd1', 'panels': [
+    {'title': 'CPU usage', 'uuid': 'c1', 'type': 'line-chart', 'details': {'queries': [
+        {'query': "host_CPU_Percent_Merge{axonfunction='rate',dc=~'$dc',rack=~'$rack',host_id=~'$host_id'} "
+                  "by ($groupBy)"}]}},
+]}]})
+
+
+def axonops():
+    return SimpleNamespace(org_name='o', get_cluster_type=lambda: 'cassandra',
+                           find_integration_id_by_name=lambda cluster, name: (f"id-{name}", None))
+
+
+def params(**overrides):
+    rule = {name: spec.get('default') for name, spec in alert_rule_args().items()}
+    rule.update(name='CPU high', dashboard='System', chart='CPU usage', operator='>=', warning_value=80,
+                critical_value=90, duration='15m')
+    rule.update(overrides)
+    return rule
+
+
+def created_rule(**overrides):
+    """
+    The rule the server holds after the creation of params(**overrides)
+    """
+    _, request, _ = plan_alert_rule(axonops(), 'c', params(**overrides), {'metricrules': []}, DASHBOARDS)
+    return copy.deepcopy(request['json_data'])
+
+
+class TestPlanAlertRule(unittest.TestCase):
+    def test_create(self):
+        result, request, error = plan_alert_rule(axonops(), 'c', params(), {'metricrules': []}, DASHBOARDS)
+
+        self.assertIsNone(error)
+        self.assertTrue(result['changed'])
+        self.assertEqual(request['rel_url'], RULES_URL)
+        self.assertEqual(request['method'], 'POST')
+        rule = request['json_data']
+        self.assertEqual(rule['alert'], 'CPU high')
+        self.assertEqual(rule['expr'], "host_CPU_Percent_Merge{axonfunction='rate'} by () >= 80")
+        self.assertEqual(rule['annotations']['widget_url'], '/o/cassandra/c/performance/d1?uuid=c1&time=30')
+        self.assertEqual(rule['correlationId'], 'c1')
+
+    def test_no_op(self):
+        existing = {'metricrules': [created_rule()]}
+
+        result, request, error = plan_alert_rule(axonops(), 'c', params(), existing, DASHBOARDS)
+
+        self.assertIsNone(error)
+        self.assertFalse(result['changed'])
+        self.assertIsNone(request)
+
+    def test_update_keeps_the_id(self):
+        existing = {'metricrules': [created_rule()]}
+
+        result, request, error = plan_alert_rule(axonops(), 'c', params(warning_value=85, dc=['eu']), existing,
+                                                 DASHBOARDS)
+
+        self.assertIsNone(error)
+        self.assertTrue(result['changed'])
+        self.assertEqual(request['method'], 'POST')
+        self.assertEqual(request['json_data']['id'], existing['metricrules'][0]['id'])
+        self.assertEqual(request['json_data']['expr'],
+                         "host_CPU_Percent_Merge{axonfunction='rate',dc='eu'} by () >= 85")
+        self.assertEqual(result['diff']['before']['warning_value'], 80)
+        self.assertEqual(result['diff']['after']['warning_value'], 85)
+
+    def test_routing_change_is_an_update(self):
+        existing = {'metricrules': [created_rule()]}
+
+        result, request, error = plan_alert_rule(axonops(), 'c', params(routing={'error': ['pagerduty']}),
+                                                 existing, DASHBOARDS)
+
+        self.assertIsNone(error)
+        self.assertTrue(result['changed'])
+        self.assertEqual(request['json_data']['integrations']['Routing'],
+                         [{'ID': 'id-pagerduty', 'Severity': 'error'}])
+
+    def test_delete(self):
+        existing = {'metricrules': [created_rule()]}
+
+        result, request, error = plan_alert_rule(axonops(), 'c', params(present=False), existing, DASHBOARDS)
+
+        self.assertIsNone(error)
+        self.assertTrue(result['changed'])
+        self.assertEqual(request, {'rel_url': f"{RULES_URL}/{existing['metricrules'][0]['id']}",
+                                   'method': 'DELETE'})
+
+    def test_delete_of_a_missing_rule(self):
+        result, request, error = plan_alert_rule(axonops(), 'c', params(present=False), {'metricrules': []},
+                                                 DASHBOARDS)
+
+        self.assertIsNone(error)
+        self.assertFalse(result['changed'])
+        self.assertIsNone(request)
+
+    def test_missing_dashboard(self):
+        _, request, error = plan_alert_rule(axonops(), 'c', params(dashboard='Kafka'), {'metricrules': []},
+                                            DASHBOARDS)
+
+        self.assertIsNone(request)
+        self.assertEqual(error, "Could not find dashboard 'Kafka' in AxonOps")
+
+    def test_missing_chart(self):
+        _, request, error = plan_alert_rule(axonops(), 'c', params(chart='Disk usage'), {'metricrules': []},
+                                            DASHBOARDS)
+
+        self.assertIsNone(request)
+        self.assertEqual(error, "Could not find chart 'Disk usage' in AxonOps")
+
+    def test_chart_query_index_out_of_range(self):
+        _, request, error = plan_alert_rule(axonops(), 'c', params(chart_query_index=1), {'metricrules': []},
+                                            DASHBOARDS)
+
+        self.assertIsNone(request)
+        self.assertEqual(error, "chart_query_index 1 out of range for chart 'CPU usage' (has 1 queries)")
+
+
+if __name__ == "__main__":
+    unittest.main()
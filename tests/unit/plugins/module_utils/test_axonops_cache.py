@@ -0,0 +1,143 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ansible_collections.axonops.axonops.plugins.module_utils import axonops_cache
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_cache import FingerprintStore, ResponseCache, \
+    TokenCache, fingerprint
+
+ON_PREM = 'https://axonops.example.com'
+SAAS = 'https://dash.axonops.cloud/myorg'
+SAML = 'https://dash.axonops.cloud/dashboard'
+
+
+class TestResponseCacheInvalidation(unittest.TestCase):
+    def test_item_write_drops_the_list(self):
+        for base in (ON_PREM, SAAS, SAML):
+            cache = ResponseCache()
+            rules = f"{base}/api/v1/alert-rules/o/cassandra/c"
+            dashboards = f"{base}/api/v1/dashboardtemplate/o/cassandra/c"
+            cache.put(rules, b'{"metricrules": []}')
+            cache.put(dashboards, b'{"dashboards": []}')
+
+            cache.invalidate(f"{rules}/123")
+
+            self.assertIsNone(cache.get(rules), base)
+            self.assertIsNotNone(cache.get(dashboards), base)
+
+
+class TestResponseCacheDisk(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_unwritable_cache_dir(self):
+        not_a_dir = os.path.join(self.tmp.name, 'cache')
+        open(not_a_dir, 'w').close()
+        cache = ResponseCache(disk=True, cache_dir=not_a_dir)
+        rules = f"{ON_PREM}/api/v1/alert-rules/o/cassandra/c"
+
+        cache.put(rules, b'{"metricrules": []}')
+
+        self.assertIsNone(cache.disk_dir)
+        self.assertEqual(cache.get(rules).body, b'{"metricrules": []}')
+
+    def test_disk_tier_dropped_when_an_invalidation_fails(self):
+        rules = f"{ON_PREM}/api/v1/alert-rules/o/cassandra/c"
+        ResponseCache(disk=True, cache_dir=self.tmp.name).put(rules, b'{"metricrules": []}')
+        cache = ResponseCache(disk=True, cache_dir=self.tmp.name)
+
+        with patch.object(axonops_cache.os, 'remove', side_effect=PermissionError('read-only')):
+            cache.invalidate(f"{rules}/123")
+
+        self.assertIsNone(cache.get(rules))
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_unwritable_cache_dir(self):
+        # a file where the directory should be
+        not_a_dir = os.path.join(self.tmp.name, 'cache')
+        open(not_a_dir, 'w').close()
+        cache = TokenCache(not_a_dir)
+
+        cache.put('key', 'token')
+
+        self.assertIsNone(cache.get('key'))
+        cache.invalidate('key')
+
+    def test_token_invalidated_without_writing_the_file(self):
+        cache = TokenCache(self.tmp.name)
+        cache.put('key', 'token')
+        cache.put('other', 'other-token')
+
+        with patch.object(axonops_cache, 'write_private_file', side_effect=OSError('read-only')):
+            cache.invalidate('key')
+
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.get('other'), 'other-token')
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        cache = TokenCache(self.tmp.name)
+
+        with patch.object(axonops_cache.os, 'replace', side_effect=OSError('disk full')):
+            cache.put('key', 'token')
+
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual([name for name in os.listdir(self.tmp.name) if name.endswith('.tmp')], [])
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_key_order_doesnt_matter(self):
+        self.assertEqual(fingerprint({'name': 'CPU', 'filters': [{'Name': 'dc', 'Value': ['eu']}], 'warning': 80}),
+                         fingerprint({'warning': 80, 'filters': [{'Value': ['eu'], 'Name': 'dc'}], 'name': 'CPU'}))
+
+    def test_content_and_list_order_do(self):
+        base = fingerprint({'name': 'CPU', 'dc': ['eu', 'us']})
+
+        self.assertNotEqual(fingerprint({'name': 'CPU', 'dc': ['us', 'eu']}), base)
+        self.assertNotEqual(fingerprint({'name': 'CPU', 'dc': ['eu']}), base)
+        self.assertNotEqual(fingerprint({'name': 'CPU', 'dc': ['eu', 'us'], 'rack': []}), base)
+
+
+class TestFingerprintStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_unwritable_cache_dir(self):
+        not_a_dir = os.path.join(self.tmp.name, 'cache')
+        open(not_a_dir, 'w').close()
+        store = FingerprintStore(not_a_dir)
+
+        store.put('key', 'abc')
+
+        self.assertIsNone(store.get('key'))
+
+    def test_failed_write_drops_the_previous_fingerprint(self):
+        store = FingerprintStore(self.tmp.name)
+        store.put('key', 'old')
+        store.put('other', 'other')
+        write_private_file = axonops_cache.write_private_file
+        failed = []
+
+        def full_once(path, content):
+            if not failed:
+                failed.append(path)
+                raise OSError('disk full')
+            write_private_file(path, content)
+
+        with patch.object(axonops_cache, 'write_private_file', side_effect=full_once):
+            store.put('key', 'new')
+
+        self.assertIsNone(store.get('key'))
+        self.assertIsNone(FingerprintStore(self.tmp.name).get('key'))
+        self.assertEqual(FingerprintStore(self.tmp.name).get('other'), 'other')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_dashboards import DashboardIndex, \
+    merge_dashboards
+
+
+def dashboard(name, panels=None, present=True):
+    return {'present': present, 'name': name, 'filters': [], 'panels': panels or []}
+
+
+def existing(name, panels=None, **fields):
+    return dict({'name': name, 'filters': [], 'panels': panels or []}, **fields)
+
+
+class TestMergeDashboards(unittest.TestCase):
+    def test_update_is_in_place(self):
+        dashboards, outcomes = merge_dashboards(
+            [existing('Overview'), existing('System', uuid='s1'), existing('Tables')],
+            [dashboard('System', [{'title': 'CPU'}])])
+
+        self.assertEqual([d['name'] for d in dashboards], ['Overview', 'System', 'Tables'])
+        self.assertEqual(dashboards[1]['panels'], [{'title': 'CPU'}])
+        self.assertEqual(outcomes, [{'name': 'System', 'changed': True, 'action': 'update',
+                                     'before': {'present': True, 'name': 'System', 'filters': [], 'panels': []},
+                                     'after': dashboard('System', [{'title': 'CPU'}])}])
+
+    def test_unchanged_dashboard_is_sent_as_it_is(self):
+        system = existing('System', uuid='s1')
+
+        dashboards, outcomes = merge_dashboards([system], [dashboard('System')])
+
+        self.assertIs(dashboards[0], system)
+        self.assertEqual([(o['changed'], o['action']) for o in outcomes], [(False, 'none')])
+
+    def test_delete(self):
+        dashboards, outcomes = merge_dashboards([existing('Overview'), existing('System'), existing('Tables')],
+                                                [dashboard('System', present=False),
+                                                 dashboard('Kafka', present=False)])
+
+        self.assertEqual([d['name'] for d in dashboards], ['Overview', 'Tables'])
+        self.assertEqual([(o['name'], o['changed'], o['action']) for o in outcomes],
+                         [('System', True, 'delete'), ('Kafka', False, 'none')])
+
+    def test_new_dashboards_are_appended_in_order(self):
+        dashboards, outcomes = merge_dashboards([existing('Overview')],
+                                                [dashboard('Tables'), dashboard('Overview'), dashboard('Kafka')])
+
+        self.assertEqual([d['name'] for d in dashboards], ['Overview', 'Tables', 'Kafka'])
+        self.assertEqual([(o['name'], o['action']) for o in outcomes],
+                         [('Tables', 'create'), ('Overview', 'none'), ('Kafka', 'create')])
+
+    def test_last_entry_wins(self):
+        dashboards, outcomes = merge_dashboards([existing('System')],
+                                                [dashboard('System', [{'title': 'CPU'}]),
+                                                 dashboard('System', present=False)])
+
+        self.assertEqual(dashboards, [])
+        self.assertEqual([(o['name'], o['action']) for o in outcomes], [('System', 'delete')])
+
+    def test_duplicates_of_a_managed_dashboard_are_dropped(self):
+        dashboards, _ = merge_dashboards([existing('System'), existing('Overview'), existing('System')],
+                                         [dashboard('System', [{'title': 'CPU'}])])
+
+        self.assertEqual([(d['name'], d['panels']) for d in dashboards],
+                         [('System', [{'title': 'CPU'}]), ('Overview', [])])
+
+
+class TestDashboardIndex(unittest.TestCase):
+    def setUp(self):
+        self.system = existing('System', [{'title': 'CPU', 'uuid': 'c1'}, {'title': 'Disk', 'uuid': 'c2'},
+                                          {'title': 'Disk', 'uuid': 'c3'}], uuid='s1')
+        self.copies = [existing('Copy', uuid='k1'), existing('Copy', uuid='k2')]
+        self.index = DashboardIndex({'dashboards': [self.system] + self.copies})
+
+    def test_dashboards(self):
+        self.assertIs(self.index.find_dashboard('System'), self.system)
+        self.assertIs(self.index.find_dashboard_by_uuid('s1'), self.system)
+        self.assertEqual(self.index.find_dashboard('Copy'), self.copies)
+        self.assertIsNone(self.index.find_dashboard('Kafka'))
+
+    def test_charts(self):
+        self.assertEqual(self.index.find_charts(self.system, 'CPU'), {'title': 'CPU', 'uuid': 'c1'})
+        self.assertEqual([chart['uuid'] for chart in self.index.find_charts(self.system, 'Disk')], ['c2', 'c3'])
+        self.assertEqual(self.index.find_chart_by_uuid(self.system, 'c3'), {'title': 'Disk', 'uuid': 'c3'})
+        self.assertIsNone(self.index.find_charts(self.copies[0], 'CPU'))
+
+    def test_empty(self):
+        index = DashboardIndex(None)
+
+        self.assertIsNone(index.find_dashboard('System'))
+        self.assertIsNone(index.find_charts({}, 'CPU'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_fanout import add_item_outcomes, \
+    aggregate_cluster_outcomes, run_per_cluster
+
+
+def cluster_result(changed):
+    result = {'changed': False, 'dashboards': [], 'diff': []}
+    add_item_outcomes(result, 'dashboards', [
+        {'name': 'Overview', 'changed': False, 'action': 'none', 'before': '', 'after': ''},
+        {'name': 'System', 'changed': changed, 'action': 'update' if changed else 'none', 'before': 'a',
+         'after': 'b'},
+    ])
+    return result
+
+
+class TestAddItemOutcomes(unittest.TestCase):
+    def test_changed_items_are_in_the_diff(self):
+        result = cluster_result(True)
+
+        self.assertTrue(result['changed'])
+        self.assertEqual(result['dashboards'], [{'name': 'Overview', 'changed': False, 'action': 'none'},
+                                                {'name': 'System', 'changed': True, 'action': 'update'}])
+        self.assertEqual(result['diff'], [{'before_header': 'System', 'after_header': 'System', 'before': 'a',
+                                           'after': 'b'}])
+
+    def test_header(self):
+        result = {'changed': False, 'checks': [], 'diff': []}
+        add_item_outcomes(result, 'checks',
+                          [{'type': 'tcp', 'name': 'cql', 'changed': True, 'action': 'create', 'before': '',
+                            'after': 'x'}],
+                          ('type', 'name', 'changed', 'action'), lambda outcome: f"{outcome['type']} check")
+
+        self.assertEqual(result['checks'], [{'type': 'tcp', 'name': 'cql', 'changed': True, 'action': 'create'}])
+        self.assertEqual(result['diff'][0]['before_header'], 'tcp check')
+
+
+class TestAggregateClusterOutcomes(unittest.TestCase):
+    def test_clusters_are_reported_apart(self):
+        outcomes = run_per_cluster(['eu', 'us'], lambda name: (cluster_result(name == 'us'), None))
+
+        result, error = aggregate_cluster_outcomes(outcomes, 'dashboards', "set the dashboards")
+
+        self.assertIsNone(error)
+        self.assertTrue(result['changed'])
+        self.assertEqual(list(result['clusters']), ['eu', 'us'])
+        self.assertFalse(result['clusters']['eu']['changed'])
+        self.assertEqual([diff['before_header'] for diff in result['diff']], ['us: System'])
+
+    def test_failed_clusters(self):
+        def reconcile(name):
+            if name == 'eu':
+                raise ValueError("boom")
+            return cluster_result(False), None
+
+        result, error = aggregate_cluster_outcomes(run_per_cluster(['eu', 'us'], reconcile), 'dashboards',
+                                                   "set the dashboards")
+
+        self.assertEqual(error, "Failed to set the dashboards on 1 of 2 clusters: eu")
+        self.assertTrue(result['clusters']['eu']['failed'])
+        self.assertIn('boom', result['clusters']['eu']['msg'])
+        self.assertEqual(result['clusters']['eu']['dashboards'], [])
+        self.assertNotIn('failed', result['clusters']['us'])
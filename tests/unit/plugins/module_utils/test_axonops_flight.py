@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_flight import SingleFlight, url_family
+
+ON_PREM = 'https://axonops.example.com'
+SAAS = 'https://dash.axonops.cloud/myorg'
+SAML = 'https://dash.axonops.cloud/dashboard'
+
+
+class TestUrlFamily(unittest.TestCase):
+    def test_item_and_list_share_the_family(self):
+        for base in (ON_PREM, SAAS, SAML):
+            self.assertEqual(url_family(f"{base}/api/v1/alert-rules/o/cassandra/c/123"),
+                             url_family(f"{base}/api/v1/alert-rules/o/cassandra/c"))
+
+    def test_related_resources_share_the_family(self):
+        for base in (ON_PREM, SAAS, SAML):
+            self.assertEqual(url_family(f"{base}/api/v1/integrations-routing/o/cassandra/c?x=1"),
+                             url_family(f"{base}/api/v1/integrations/o/cassandra/c"))
+
+    def test_orgs_and_resources_are_apart(self):
+        self.assertNotEqual(url_family(f"{SAAS}/api/v1/alert-rules/o/cassandra/c"),
+                            url_family("https://dash.axonops.cloud/other/api/v1/alert-rules/o/cassandra/c"))
+        self.assertNotEqual(url_family(f"{SAAS}/api/v1/alert-rules/o/cassandra/c"),
+                            url_family(f"{SAAS}/api/v1/dashboardtemplate/o/cassandra/c"))
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_concurrent_calls_share_one_call(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        def call():
+            calls.append(1)
+            time.sleep(0.1)
+            return {'metricrules': []}
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: single_flight.do(f"{SAAS}/api/v1/alert-rules/o/cassandra/c", call),
+                                        range(4)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(shared for _, shared in results), [False, True, True, True])
+
+    def test_item_write_detaches_the_list_in_flight(self):
+        for base in (ON_PREM, SAAS, SAML):
+            single_flight = SingleFlight()
+            rules = f"{base}/api/v1/alert-rules/o/cassandra/c"
+            started = threading.Event()
+            calls = []
+
+            def call(value):
+                calls.append(value)
+                started.set()
+                time.sleep(0.1)
+                return value
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                before = executor.submit(single_flight.do, rules, lambda: call('before'))
+                started.wait()
+                single_flight.forget(f"{rules}/123")
+                after = executor.submit(single_flight.do, rules, lambda: call('after'))
+
+            self.assertEqual((before.result(), after.result()), (('before', False), ('after', False)), base)
+            self.assertEqual(calls, ['before', 'after'])
+
+    def test_tuple_keys(self):
+        single_flight = SingleFlight()
+        rules = ('/api/v1/alert-rules/o/cassandra/c', (200,))
+        started = threading.Event()
+
+        def call(value):
+            started.set()
+            time.sleep(0.1)
+            return value
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            before = executor.submit(single_flight.do, rules, lambda: call('before'))
+            started.wait()
+            single_flight.forget('/api/v1/dashboardtemplate/o/cassandra/c')
+            shared = executor.submit(single_flight.do, rules, lambda: call('other'))
+            time.sleep(0.02)
+            single_flight.forget('/api/v1/alert-rules/o/cassandra/c/123')
+            after = executor.submit(single_flight.do, rules, lambda: call('after'))
+
+        self.assertEqual((before.result(), shared.result(), after.result()),
+                         (('before', False), ('before', True), ('after', False)))
+
+
+if __name__ == "__main__":
+    unittest.main()
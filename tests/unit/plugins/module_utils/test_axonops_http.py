@@ -0,0 +1,41 @@
+import http.client
+import unittest
+from unittest.mock import MagicMock, patch
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_http import ConnectionPool
+
+URL = 'https://axonops.example.com/api/v1/alert-rules/o/cassandra/c'
+
+
+class TestStaleConnection(unittest.TestCase):
+    def open(self, method, reused=True):
+        """
+        Open a request on a connection the server closed while it was idle, returns the new connections made
+        and what was sent
+        """
+        pool = ConnectionPool()
+        stale = MagicMock(name='stale')
+        stale.getresponse.side_effect = http.client.RemoteDisconnected('closed')
+        fresh = MagicMock(name='fresh')
+        fresh.getresponse.return_value = MagicMock(status=200, reason='OK', headers={})
+        with patch.object(pool, '_checkout', return_value=(stale, reused)), \
+                patch.object(pool, '_new_connection', return_value=fresh) as new_connection:
+            pool.open(method, URL, {}, b'{}')
+        return new_connection, fresh
+
+    def test_idempotent_request_is_sent_again(self):
+        for method in ('GET', 'PUT', 'DELETE'):
+            new_connection, fresh = self.open(method)
+
+            new_connection.assert_called_once()
+            fresh.request.assert_called_once_with(method, '/api/v1/alert-rules/o/cassandra/c', body=b'{}',
+                                                  headers={})
+
+    def test_other_requests_are_left_to_the_retry_policy(self):
+        for method in ('POST', 'PATCH'):
+            with self.assertRaises(http.client.RemoteDisconnected):
+                self.open(method)
+
+    def test_new_connection_is_not_retried(self):
+        with self.assertRaises(http.client.RemoteDisconnected):
+            self.open('GET', reused=False)
@@ -0,0 +1,92 @@
+import copy
+import unittest
+from unittest.mock import patch
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops import AxonOps
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_integrations import IntegrationIndex
+
+INTEGRATIONS_URL = '/api/v1/integrations/o/cassandra/c'
+
+
+def definition(integration_id, integration_type, name):
+    return {'ID': integration_id, 'Type': integration_type, 'Params': {'name': name}}
+
+
+INTEGRATIONS = {'Definitions': [
+    definition('1', 'slack', 'ops'),
+    definition('2', 'pagerduty', 'oncall'),
+    definition('3', 'email', 'ops'),
+    {'ID': '4', 'Type': 'webhook', 'Params': {}},
+]}
+
+
+class TestIntegrationIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = IntegrationIndex(INTEGRATIONS)
+
+    def test_by_name(self):
+        self.assertEqual(self.index.find_id_by_name('oncall'), '2')
+        # the first definition wins when the names are repeated
+        self.assertEqual(self.index.find_id_by_name('ops'), '1')
+        self.assertIsNone(self.index.find_id_by_name('missing'))
+
+    def test_by_type_and_name(self):
+        self.assertEqual(self.index.find_by_name_and_type('email', 'ops'), definition('3', 'email', 'ops'))
+        self.assertEqual(self.index.find_by_name_and_type('slack', 'ops')['ID'], '1')
+        self.assertIsNone(self.index.find_by_name_and_type('slack', 'oncall'))
+
+    def test_by_id(self):
+        self.assertEqual(self.index.find_name_by_id('3'), 'ops')
+        self.assertIsNone(self.index.find_name_by_id('4'))
+        self.assertIsNone(self.index.find_name_by_id('5'))
+
+    def test_no_definitions(self):
+        for integrations in (None, {}, {'Definitions': None}):
+            self.assertIsNone(IntegrationIndex(integrations).find_id_by_name('ops'))
+
+
+class TestIntegrationInvalidation(unittest.TestCase):
+    def setUp(self):
+        self.documents = {INTEGRATIONS_URL: copy.deepcopy(INTEGRATIONS)}
+        self.gets = 0
+        self.client = AxonOps('o', auth_token='token', base_url='https://axonops.example.com')
+        do_request = patch.object(self.client, '_do_request', side_effect=self.api)
+        do_request.start()
+        self.addCleanup(do_request.stop)
+
+    def api(self, rel_url, method, ok_codes, data, json_data, form_field, fresh=False):
+        if method == 'GET':
+            self.gets += 1
+            return copy.deepcopy(self.documents[rel_url]), None, 200
+        if method == 'POST' and rel_url == INTEGRATIONS_URL:
+            self.documents[rel_url]['Definitions'].append(json_data)
+        return None, None, 200
+
+    def test_lookups_share_one_fetch(self):
+        self.assertEqual(self.client.find_integration_id_by_name('c', 'oncall'), ('2', None))
+        self.assertEqual(self.client.find_integration_name_by_id('c', '1'), ('ops', None))
+        self.assertEqual(self.client.find_integration_by_name_and_type('c', 'slack', 'ops')[0]['ID'], '1')
+
+        self.assertEqual(self.gets, 1)
+
+    def test_write_invalidates_the_index(self):
+        self.assertEqual(self.client.find_integration_id_by_name('c', 'team'), (None, None))
+
+        _, error = self.client.do_request(INTEGRATIONS_URL, method='POST',
+                                          json_data=definition('5', 'slack', 'team'))
+
+        self.assertIsNone(error)
+        self.assertEqual(self.client.find_integration_id_by_name('c', 'team'), ('5', None))
+        self.assertEqual(self.gets, 2)
+
+    def test_other_writes_keep_the_index(self):
+        self.client.find_integration_id_by_name('c', 'ops')
+
+        self.client.do_request('/api/v1/alert-rules/o/cassandra/c', method='POST', json_data={})
+        self.client.find_integration_id_by_name('c', 'ops')
+
+        self.assertEqual(self.gets, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_service_checks import plan_service_checks, \
+    service_check_args, service_checks_builder
+
+
+def check(check_type, name, **options):
+    desired = {option: spec.get('default') for option, spec in service_check_args().items()}
+    desired.update(type=check_type, name=name, interval='1m', timeout='10s', **options)
+    return desired
+
+
+def server_check(check_id, name, **fields):
+    return dict({'id': check_id, 'name': name, 'interval': '1m', 'timeout': '10s', 'readonly': False}, **fields)
+
+
+def healthchecks():
+    return {
+        'httpchecks': [server_check('h1', 'api', http='https://api', method='GET', tls_skip_verify=False)],
+        'tcpchecks': [server_check('t1', 'cql', tcp='{{.comp_listen_address}}:9042'),
+                      server_check('t2', 'gossip', tcp='{{.comp_listen_address}}:7000'),
+                      server_check('t3', 'jmx', tcp='{{.comp_listen_address}}:7199')],
+        'shellchecks': [server_check('s1', 'disk', script='df -h', shell='/bin/bash')],
+    }
+
+
+class TestPlanServiceChecks(unittest.TestCase):
+    def test_add(self):
+        document = healthchecks()
+
+        payload, outcomes, error = plan_service_checks(document, [
+            check('tcp', 'thrift', tcp='{{.comp_listen_address}}:9160'),
+            check('http', 'health', http='https://health'),
+        ])
+
+        self.assertIsNone(error)
+        self.assertEqual([(o['type'], o['name'], o['changed'], o['action']) for o in outcomes],
+                         [('tcp', 'thrift', True, 'create'), ('http', 'health', True, 'create')])
+        self.assertEqual([c['name'] for c in payload['tcpchecks']], ['cql', 'gossip', 'jmx', 'thrift'])
+        self.assertEqual([c['name'] for c in payload['httpchecks']], ['api', 'health'])
+        self.assertEqual(payload['tcpchecks'][3]['tcp'], '{{.comp_listen_address}}:9160')
+        self.assertEqual(payload['tcpchecks'][3]['id'], outcomes[0]['after']['id'])
+        self.assertIs(payload['shellchecks'], document['shellchecks'])
+
+    def test_update_is_in_place(self):
+        document = healthchecks()
+
+        payload, outcomes, error = plan_service_checks(document, [
+            check('tcp', 'gossip', tcp='{{.comp_listen_address}}:7001'),
+            check('shell', 'disk', script='df -h /var'),
+        ])
+
+        self.assertIsNone(error)
+        self.assertEqual([(o['type'], o['name'], o['action']) for o in outcomes],
+                         [('tcp', 'gossip', 'update'), ('shell', 'disk', 'update')])
+        self.assertEqual([(c['id'], c['tcp']) for c in payload['tcpchecks']],
+                         [('t1', '{{.comp_listen_address}}:9042'), ('t2', '{{.comp_listen_address}}:7001'),
+                          ('t3', '{{.comp_listen_address}}:7199')])
+        self.assertIs(payload['tcpchecks'][0], document['tcpchecks'][0])
+        self.assertEqual(payload['shellchecks'][0]['script'], 'df -h /var')
+        self.assertIs(payload['httpchecks'], document['httpchecks'])
+
+    def test_remove(self):
+        payload, outcomes, error = plan_service_checks(healthchecks(), [
+            check('tcp', 'gossip', present=False),
+            check('http', 'missing', present=False),
+        ])
+
+        self.assertIsNone(error)
+        self.assertEqual([(o['type'], o['name'], o['changed'], o['action']) for o in outcomes],
+                         [('tcp', 'gossip', True, 'delete'), ('http', 'missing', False, 'none')])
+        self.assertEqual([c['name'] for c in payload['tcpchecks']], ['cql', 'jmx'])
+        self.assertEqual([c['name'] for c in payload['httpchecks']], ['api'])
+
+    def test_unchanged(self):
+        payload, outcomes, error = plan_service_checks(healthchecks(), [
+            check('tcp', 'cql', tcp='{{.comp_listen_address}}:9042'),
+            check('http', 'api', http='https://api'),
+        ])
+
+        self.assertIsNone(error)
+        self.assertEqual([(o['changed'], o['action']) for o in outcomes], [(False, 'none'), (False, 'none')])
+        self.assertEqual(payload, healthchecks())
+
+    def test_same_name_of_another_type(self):
+        payload, outcomes, error = plan_service_checks(healthchecks(),
+                                                       [check('shell', 'cql', script='nodetool info')])
+
+        self.assertIsNone(error)
+        self.assertEqual(outcomes[0]['action'], 'create')
+        self.assertEqual([c['name'] for c in payload['tcpchecks']], ['cql', 'gossip', 'jmx'])
+        self.assertEqual([c['name'] for c in payload['shellchecks']], ['disk', 'cql'])
+
+    def test_missing_required_option(self):
+        payload, outcomes, error = plan_service_checks(healthchecks(), [check('tcp', 'thrift')])
+
+        self.assertIsNone(payload)
+        self.assertEqual(outcomes, [])
+        self.assertEqual(error, "The tcp check 'thrift' is missing tcp")
+
+
+class TestServiceChecksBuilder(unittest.TestCase):
+    def test_build(self):
+        build = service_checks_builder([check('tcp', 'gossip', present=False)])
+
+        payload, error = build(healthchecks())
+
+        self.assertIsNone(error)
+        self.assertEqual([c['name'] for c in payload['tcpchecks']], ['cql', 'jmx'])
+
+    def test_nothing_to_write(self):
+        build = service_checks_builder([check('tcp', 'cql', tcp='{{.comp_listen_address}}:9042')])
+
+        self.assertEqual(build(healthchecks()), (None, None))
+
+    def test_error(self):
+        self.assertEqual(service_checks_builder([check('http', 'health')])(None),
+                         (None, "The http check 'health' is missing http"))
+
+
+if __name__ == "__main__":
+    unittest.main()
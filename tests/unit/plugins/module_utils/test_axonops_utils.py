@@ -0,0 +1,24 @@
+import unittest
+
+from ansible_collections.axonops.axonops.plugins.module_utils import axonops_utils
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_utils import get_axonops_instance
+
+PARAMS = {'org': 'o', 'base_url': 'https://axonops.example.com', 'auth_token': 'secret-token', 'password': 'pw'}
+
+
+class TestAxonOpsInstances(unittest.TestCase):
+    def tearDown(self):
+        axonops_utils._axonops_instances.clear()
+
+    def test_the_same_settings_share_a_client(self):
+        first = get_axonops_instance(dict(PARAMS))
+
+        self.assertIs(get_axonops_instance(dict(PARAMS)), first)
+        self.assertIsNot(get_axonops_instance(dict(PARAMS, auth_token='other-token')), first)
+
+    def test_the_credentials_are_not_in_the_keys(self):
+        get_axonops_instance(dict(PARAMS))
+
+        for key in axonops_utils._axonops_instances:
+            self.assertNotIn('secret-token', key)
+            self.assertNotIn('pw', key)
@@ -0,0 +1,105 @@
+import copy
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops import AxonOps
+from ansible_collections.axonops.axonops.plugins.module_utils.axonops_alert_rules import alert_rule_args, \
+    alert_rules_url, dashboard_templates_url
+from ansible_collections.axonops.axonops.plugins.modules.alert_rules import reconcile_cluster
+
+RULES_URL = alert_rules_url('o', 'cassandra', 'c')
+
+DASHBOARDS = {'dashboards': [{'name': 'System', 'uuid': 'd1', 'panels': [
+    {'title': title, 'uuid': f"c{number}", 'type': 'line-chart', 'details': {'queries': [
+        {'query': f"{metric}{{axonfunction='rate',dc=~'$dc',rack=~'$rack',host_id=~'$host_id'}} by ($groupBy)"}]}}
+    for number, (title, metric) in enumerate((('CPU usage', 'host_CPU_Percent_Merge'),
+                                              ('Disk usage', 'host_Disk_UsedPercent')))
+]}]}
+
+
+def rule(chart, **overrides):
+    desired = {name: spec.get('default') for name, spec in alert_rule_args().items()}
+    desired.update(name=f"{chart} high", dashboard='System', chart=chart, operator='>=', warning_value=80,
+                   critical_value=90, duration='15m')
+    desired.update(overrides)
+    return desired
+
+
+class TestReconcileClusterFingerprint(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.client = AxonOps('o', auth_token='token', base_url='https://axonops.example.com', cache_dir=tmp.name,
+                              skip_unchanged=True)
+        self.documents = {RULES_URL: {'metricrules': []},
+                          dashboard_templates_url('o', 'cassandra', 'c'): DASHBOARDS}
+        self.failing = set()
+        self.writes = []
+        do_request = patch.object(self.client, '_do_request', side_effect=self.api)
+        do_request.start()
+        self.addCleanup(do_request.stop)
+        self.rules = [rule('CPU usage'), rule('Disk usage')]
+
+    def api(self, rel_url, method, ok_codes, data, json_data, form_field, fresh=False):
+        if method == 'GET':
+            return copy.deepcopy(self.documents[rel_url]), None, 200
+        self.writes.append(json_data['alert'])
+        if json_data['alert'] in self.failing:
+            return None, "HTTP Error 500: Internal Server Error", 500
+        self.documents[RULES_URL]['metricrules'].append(json_data)
+        return None, None, 200
+
+    def test_remembered_once_every_write_succeeded(self):
+        result, error = reconcile_cluster(self.client, 'o', 'c', self.rules, False)
+
+        self.assertIsNone(error)
+        self.assertTrue(result['changed'])
+        self.assertEqual(self.writes, ['CPU usage high', 'Disk usage high'])
+        self.assertTrue(self.client.desired_state_unchanged(('alert_rules', 'c'), self.rules))
+
+        result, error = reconcile_cluster(self.client, 'o', 'c', self.rules, False)
+
+        self.assertIsNone(error)
+        self.assertEqual(result, {'changed': False, 'rules': [], 'diff': [], 'fingerprint_matched': True})
+        self.assertEqual(len(self.writes), 2)
+
+    def test_not_remembered_when_a_write_failed(self):
+        self.failing.add('Disk usage high')
+
+        _, error = reconcile_cluster(self.client, 'o', 'c', self.rules, False)
+
+        self.assertEqual(error,
+                         "Failed to apply the alert rules: Disk usage high: HTTP Error 500: Internal Server Error")
+        self.assertFalse(self.client.desired_state_unchanged(('alert_rules', 'c'), self.rules))
+
+        # the next run compares the rules again and only writes the missing one
+        self.failing.clear()
+        self.writes.clear()
+        result, error = reconcile_cluster(self.client, 'o', 'c', self.rules, False)
+
+        self.assertIsNone(error)
+        self.assertEqual([(r['name'], r['action']) for r in result['rules']],
+                         [('CPU usage high', 'none'), ('Disk usage high', 'create')])
+        self.assertEqual(self.writes, ['Disk usage high'])
+
+    def test_not_remembered_in_check_mode(self):
+        result, error = reconcile_cluster(self.client, 'o', 'c', self.rules, True)
+
+        self.assertIsNone(error)
+        self.assertTrue(result['changed'])
+        self.assertEqual(self.writes, [])
+        self.assertFalse(self.client.desired_state_unchanged(('alert_rules', 'c'), self.rules))
+
+    def test_edited_rules_are_compared_again(self):
+        reconcile_cluster(self.client, 'o', 'c', self.rules, False)
+
+        result, error = reconcile_cluster(self.client, 'o', 'c', [rule('CPU usage', warning_value=85)], False)
+
+        self.assertIsNone(error)
+        self.assertNotIn('fingerprint_matched', result)
+        self.assertEqual([(r['name'], r['action']) for r in result['rules']], [('CPU usage high', 'update')])
+
+
+if __name__ == "__main__":
+    unittest.main()